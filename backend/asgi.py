@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""ASGI entry point that creates AI agents without holding a thread per request.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5002
+
+``POST /api/ai-agent/create`` is served natively with ``AsyncTavusAgent``, so
+hundreds of concurrent creations wait on Tavus from one event loop. Every
+other HTTP request is passed to the Flask app through asgiref's
+``WsgiToAsgi`` when asgiref is installed. The
+Socket.IO signaling server is not served here; keep running ``main.py`` for
+``/meet`` and set ``TAVUS_ASYNC_AGENTS=1`` there so ``request-ai-agent`` uses
+the same asyncio path.
+"""
+
+import logging
+from routes.ai_agent_asgi import AgentASGIApp
+
+logger = logging.getLogger(__name__)
+
+
+def create_asgi_app():
+    """Build the ASGI app, mounting the Flask app when asgiref is available."""
+    try:
+        from asgiref.wsgi import WsgiToAsgi
+    except ImportError:
+        logger.warning("asgiref is not installed; only agent creation is served over ASGI")
+        return AgentASGIApp()
+
+    from main import create_app
+    flask_app, _ = create_app()
+    return AgentASGIApp(WsgiToAsgi(flask_app))
+
+
+app = create_asgi_app()
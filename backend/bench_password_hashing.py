@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Benchmark /api/auth/login throughput at each bcrypt cost, inline and on the hashing pool.
+
+    python bench_password_hashing.py --costs 10,11,12 --logins 64 --concurrency 16
+
+Each cost and mode runs in a fresh process configured through the environment
+(``BCRYPT_LOG_ROUNDS``, ``PASSWORD_HASH_WORKERS``). The process signs up a user
+at one cost lower and then logs in ``--logins`` times from ``--concurrency``
+threads, so the first login also exercises the rehash to the configured cost.
+It prints one JSON line per run with:
+
+- logins per second;
+- login latency p50/p99;
+- the longest a 5 ms timer in the server process was held up, which is how
+  long other work such as signaling would have waited;
+- the hasher's counters.
+
+``--async-mode gevent`` (or ``eventlet``) runs the logins on green threads.
+There an inline hash stops the whole loop, which is what the process pool
+avoids.
+"""
+
+import sys
+
+if '--run' in sys.argv:
+    # Run role: eventlet/gevent must patch the standard library before anything else is imported
+    from services.async_mode import patch_for_async_mode
+    patch_for_async_mode()
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class StallMonitor:
+    """Measure how late a short periodic timer fires while work runs."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.max_stall = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            self.max_stall = max(self.max_stall, now - last - self.interval)
+            last = now
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(args):
+    """Sign up one user and time concurrent logins against the auth routes."""
+    from flask import Flask
+    from flask_jwt_extended import JWTManager
+    from models.account import db
+    from routes.auth import auth_bp
+    from services.password_hashing import password_hasher
+
+    workdir = tempfile.mkdtemp(prefix='bench-login-')
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'app.db')}",
+                      JWT_SECRET_KEY='bench-secret-key-of-sufficient-length')
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(auth_bp)
+    with app.app_context():
+        db.create_all()
+
+    # The auth routes print each step; keep that out of the results
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        client = app.test_client()
+        credentials = {'username': 'bench', 'password': 'correct horse battery staple'}
+        # Sign up at a lower cost so the first login rehashes
+        rounds = password_hasher.rounds
+        password_hasher.rounds = max(4, rounds - 1)
+        client.post('/api/auth/signup', json={**credentials, 'email': 'bench@example.com'})
+        password_hasher.rounds = rounds
+        # Start the workers before timing
+        password_hasher.verify(password_hasher.hash('warm up'), 'warm up')
+
+        latencies = []
+        statuses = []
+        lock = threading.Lock()
+        remaining = [args.logins]
+
+        def worker():
+            local = app.test_client()
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                response = local.post('/api/auth/login', json=credentials)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    statuses.append(response.status_code)
+
+        with StallMonitor() as monitor:
+            started = time.perf_counter()
+            threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+    stats = password_hasher.stats()
+    password_hasher.close()
+    return {
+        'cost': rounds,
+        'mode': 'pool' if password_hasher.workers else 'inline',
+        'async_mode': os.environ.get('SOCKETIO_ASYNC_MODE', 'threading'),
+        'logins': f"{statuses.count(200)}/{len(statuses)}",
+        'logins_per_s': round(len(statuses) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000),
+        'p99_ms': round(percentile(latencies, 99) * 1000),
+        'max_stall_ms': round(monitor.max_stall * 1000, 1),
+        'rehashes': stats['rehashes'],
+        'rejected': stats['rejected'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login throughput at each bcrypt cost')
+    parser.add_argument('--costs', default='10,11,12', help='Comma-separated bcrypt cost factors')
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Hashing processes in pool mode')
+    parser.add_argument('--mode', choices=('both', 'inline', 'pool'), default='both')
+    parser.add_argument('--async-mode', choices=('threading', 'eventlet', 'gevent'), default='threading')
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args)), flush=True)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for cost in args.costs.split(','):
+        for mode, workers in (('inline', 0), ('pool', args.workers)):
+            if args.mode not in ('both', mode):
+                continue
+            env = {**os.environ, 'BCRYPT_LOG_ROUNDS': cost.strip(), 'PASSWORD_HASH_WORKERS': str(workers),
+                   'PASSWORD_HASH_MAX_PENDING': str(max(args.concurrency, workers * 4)),
+                   'SOCKETIO_ASYNC_MODE': args.async_mode}
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--run',
+                            '--logins', str(args.logins), '--concurrency', str(args.concurrency)],
+                           cwd=here, env=env, check=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Load test /meet signaling under each Socket.IO async mode.
+
+    python bench_signaling.py --clients 2000 --room-size 4 --candidates 10
+
+For each mode (``threading`` and whichever of ``eventlet``/``gevent`` is
+installed, or ``--modes``) it starts a server process with only the signaling
+routes and ``SOCKETIO_ASYNC_MODE`` set to that mode. It then connects
+``--clients`` WebSocket clients, puts them in rooms of ``--room-size`` and has
+every client send ``--candidates`` ICE candidates, one every ``--interval``
+seconds. Each candidate carries its send time, so every peer that receives it
+records the relay latency.
+
+``--relay room`` broadcasts each candidate to the rest of the room.
+``--relay targeted`` addresses each candidate to one peer, taking the peers in
+turn, as a mesh with a peer connection per pair would. ``--batch-ms`` sets
+``ICE_BATCH_WINDOW_MS`` on the server so candidates arrive coalesced in
+``ice-candidates`` events.
+
+For each mode it prints one JSON line with:
+- join p99;
+- candidates sent and relayed (against the number expected);
+- relayed messages per second;
+- relay latency p50/p99/max;
+- the server's emit and delivery counts from ``/api/meet/metrics``;
+- the server's peak thread count and memory.
+
+The clients are plain asyncio WebSocket connections speaking the Engine.IO /
+Socket.IO wire protocol, so thousands of them fit in one process. The
+generator and the server share this host's CPUs; watch that the generator is
+not the bottleneck when comparing modes. Pass ``--target host:port`` to load
+a server that is already running instead.
+"""
+
+import sys
+
+if '--serve' in sys.argv:
+    # Server role: eventlet/gevent must patch the standard library before anything else is imported
+    from services.async_mode import patch_for_async_mode
+    patch_for_async_mode()
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import time
+import urllib.request
+from collections import Counter
+
+
+def run_server(port):
+    """Serve only the signaling routes in the configured async mode."""
+    from flask import Flask
+    from flask_socketio import SocketIO
+    from routes.webrtc import init_webrtc_routes, webrtc_bp
+    from services.async_mode import socketio_async_mode, socketio_run_options
+    from services.socketio_queue import socketio_queue_options
+
+    mode = socketio_async_mode()
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode=mode, cors_allowed_origins='*',
+                        ping_timeout=60, ping_interval=25, **socketio_queue_options())
+    init_webrtc_routes(socketio)
+    app.register_blueprint(webrtc_bp)
+    socketio.run(app, host='127.0.0.1', port=port, log_output=False, allow_unsafe_werkzeug=True,
+                 **socketio_run_options(mode))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host, port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class ProcessSampler:
+    """Record the peak thread count and resident memory of a process from /proc."""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+
+    def sample(self):
+        try:
+            with open(f"/proc/{self.pid}/status") as status:
+                for line in status:
+                    if line.startswith('Threads:'):
+                        self.peak_threads = max(self.peak_threads, int(line.split()[1]))
+                    elif line.startswith('VmRSS:'):
+                        self.peak_rss_mb = max(self.peak_rss_mb, int(line.split()[1]) / 1024)
+        except OSError:
+            pass
+
+    async def run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+
+class SignalingClient:
+    """Minimal Socket.IO client for the /meet namespace over one WebSocket."""
+
+    def __init__(self, host, port, stats):
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.sid = None
+        self.room = None
+        self.peers = []
+        self._reader = None
+        self._writer = None
+        self._waiters = {}
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self._writer.write((f"GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+                            f"Host: {self.host}:{self.port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        response = await self._reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+            raise ConnectionError(response.split(b'\r\n', 1)[0].decode(errors='replace'))
+        opened = await self._read_message()
+        if not opened.startswith('0'):
+            raise ConnectionError(f"unexpected open packet {opened[:40]!r}")
+        self._send('40/meet,')
+        while True:
+            message = await self._read_message()
+            if message.startswith('40/meet,'):
+                self.sid = json.loads(message[len('40/meet,'):])['sid']
+                break
+            if message.startswith('44/meet,'):
+                raise ConnectionError(message)
+        asyncio.get_running_loop().create_task(self._read_loop())
+
+    def emit(self, event, data):
+        self._send('42/meet,' + json.dumps([event, data], separators=(',', ':')))
+
+    def wait_for(self, event):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[event] = future
+        return future
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def _send(self, text):
+        self._send_frame(0x1, text.encode())
+
+    def _send_frame(self, opcode, payload):
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        repeated = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+        self._writer.write(header + mask + masked)
+
+    async def _read_message(self):
+        """Return the next text message, answering WebSocket pings on the way."""
+        fragments = []
+        while True:
+            first, second = await self._reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await self._reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self._reader.readexactly(8))[0]
+            payload = await self._reader.readexactly(length)
+            if opcode == 0x8:
+                raise ConnectionError('server closed the connection')
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode in (0x1, 0x0):
+                fragments.append(payload)
+                if first & 0x80:
+                    return b''.join(fragments).decode()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                message = await self._read_message()
+                if message == '2':
+                    # Engine.IO ping
+                    self._send('3')
+                elif message.startswith('42/meet,'):
+                    self._on_event(message)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            pass
+
+    def _relayed(self, received, candidates):
+        self.stats['relayed'] += len(candidates)
+        self.stats['latencies'].extend(received - candidate['sentAt'] for candidate in candidates)
+        self.stats['last_relay'] = received
+
+    def _on_event(self, message):
+        received = time.time()
+        event, *args = json.loads(message[len('42/meet,'):])
+        if event == 'ice-candidate':
+            self._relayed(received, [args[0]['candidate']])
+        elif event == 'ice-candidates':
+            self._relayed(received, args[0]['candidates'])
+        elif event == 'room-joined':
+            self.peers.extend(args[0]['participants'])
+        elif event == 'user-joined':
+            self.peers.append(args[0]['userId'])
+        waiter = self._waiters.pop(event, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(args[0] if args else None)
+
+
+async def run_load(host, port, args, server_pid=None):
+    stats = {'sent': 0, 'relayed': 0, 'latencies': [], 'last_relay': None}
+    sampler = ProcessSampler(server_pid) if server_pid else None
+    sampler_task = asyncio.get_running_loop().create_task(sampler.run()) if sampler else None
+    clients = []
+    join_latencies = []
+    failures = 0
+    gate = asyncio.Semaphore(args.connect_concurrency)
+
+    async def join(index):
+        nonlocal failures
+        async with gate:
+            client = SignalingClient(host, port, stats)
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(client.connect(), timeout=30)
+                joined = client.wait_for('room-joined')
+                client.room = f"bench-{index // args.room_size}"
+                client.emit('join-room', {'roomId': client.room})
+                await asyncio.wait_for(joined, timeout=30)
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                failures += 1
+                client.close()
+                return
+            join_latencies.append(time.perf_counter() - started)
+            clients.append(client)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(join(i) for i in range(args.clients)))
+    join_elapsed = time.perf_counter() - started
+
+    # Wait until every client has heard of all the others in its room
+    room_sizes = Counter(client.room for client in clients)
+    deadline = time.monotonic() + 10
+    while (any(len(client.peers) < room_sizes[client.room] - 1 for client in clients)
+           and time.monotonic() < deadline):
+        await asyncio.sleep(0.05)
+
+    # Every connected client sends its candidates, starting at a random offset within one interval
+    async def send_candidates(client):
+        await asyncio.sleep(random.uniform(0, args.interval))
+        for n in range(args.candidates):
+            message = {'candidate': {
+                'candidate': f"candidate:{n} 1 udp 2122260223 10.0.0.{n % 250} {50000 + n} typ host",
+                'sdpMid': '0', 'sdpMLineIndex': 0, 'sentAt': time.time()}}
+            if args.relay == 'targeted':
+                if not client.peers:
+                    return
+                message['target'] = client.peers[n % len(client.peers)]
+            client.emit('ice-candidate', message)
+            stats['sent'] += 1
+            await asyncio.sleep(args.interval)
+
+    send_started = time.time()
+    await asyncio.gather(*(send_candidates(client) for client in clients))
+    sent_at = time.time()
+
+    # A broadcast candidate reaches every other connected member of the sender's room,
+    # a targeted one reaches one peer
+    if args.relay == 'targeted':
+        expected = args.candidates * sum(n for n in room_sizes.values() if n > 1)
+    else:
+        expected = args.candidates * sum(n * (n - 1) for n in room_sizes.values())
+    deadline = time.monotonic() + args.drain
+    while stats['relayed'] < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+    for client in clients:
+        client.close()
+    if sampler_task:
+        sampler_task.cancel()
+
+    server = server_counters(host, port)
+    finished = stats['last_relay'] or sent_at
+    duration = max(finished - send_started, 1e-9)
+    latencies = stats['latencies']
+    return {
+        'clients': f"{len(clients)}/{args.clients}",
+        'connect_failures': failures,
+        'join_s': round(join_elapsed, 2),
+        'join_p99_ms': ms(percentile(join_latencies, 99)),
+        'sent': stats['sent'],
+        'relayed': f"{stats['relayed']}/{expected}",
+        'relayed_per_s': round(stats['relayed'] / duration),
+        'relay_p50_ms': ms(percentile(latencies, 50)),
+        'relay_p99_ms': ms(percentile(latencies, 99)),
+        'relay_max_ms': ms(max(latencies) if latencies else None),
+        'server_emits': server.get('emits'),
+        'server_deliveries': server.get('deliveries'),
+        'server_peak_threads': sampler.peak_threads if sampler else None,
+        'server_peak_rss_mb': round(sampler.peak_rss_mb) if sampler else None,
+    }
+
+
+def server_counters(host, port):
+    """Return the server's signaling counter totals, or {} if it does not expose them."""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/api/meet/metrics", timeout=10) as response:
+            return json.load(response).get('totals', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def run_mode(mode, args):
+    """Start a signaling server in ``mode``, load it and return the results."""
+    port = free_port()
+    env = {**os.environ, 'SOCKETIO_ASYNC_MODE': mode, 'TAVUS_WARM_POOL': '0',
+           'ICE_BATCH_WINDOW_MS': str(args.batch_ms)}
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port)],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_port('127.0.0.1', port):
+            raise RuntimeError(f"{mode} server did not start")
+        return {'mode': mode, 'relay': args.relay, 'batch_ms': args.batch_ms, **asyncio.run(run_load('127.0.0.1', port, args, server.pid))}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def installed_modes():
+    import importlib.util
+    return ['threading'] + [mode for mode in ('eventlet', 'gevent') if importlib.util.find_spec(mode)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /meet signaling under each Socket.IO async mode')
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--room-size', type=int, default=4)
+    parser.add_argument('--candidates', type=int, default=10, help='ICE candidates sent by each client')
+    parser.add_argument('--interval', type=float, default=0.1, help='Seconds between a client\'s candidates')
+    parser.add_argument('--relay', choices=('room', 'targeted'), default='room',
+                        help='Broadcast candidates to the room or address each to one peer')
+    parser.add_argument('--batch-ms', type=float, default=0, help='Server ICE_BATCH_WINDOW_MS (0: no batching)')
+    parser.add_argument('--connect-concurrency', type=int, default=50, help='Clients connecting at once')
+    parser.add_argument('--drain', type=float, default=10, help='Seconds to wait for relays after the last send')
+    parser.add_argument('--modes', help='Comma-separated async modes (default: threading and those installed)')
+    parser.add_argument('--target', help='host:port of a running server to load instead of starting one')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return run_server(args.port)
+
+    if args.target:
+        host, _, port = args.target.rpartition(':')
+        print(json.dumps({'target': args.target, **asyncio.run(run_load(host or '127.0.0.1', int(port), args))}))
+        return
+
+    modes = args.modes.split(',') if args.modes else installed_modes()
+    for mode in modes:
+        print(json.dumps(run_mode(mode.strip(), args)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Benchmark concurrent /api/auth/signup against the configured database and check the result.
+
+    python bench_signup.py --signups 400 --concurrency 32 --duplicates 0.2
+
+Each configuration runs in a fresh process set up through the environment.
+By default two runs use a temporary SQLite file, one with ``SQLITE_WAL=1``
+(WAL and the tuned pragmas) and one with ``SQLITE_WAL=0`` (SQLite defaults).
+``--database-url`` runs once against that database instead, for example a
+disposable PostgreSQL database whose driver is installed. Its ``users``
+table is dropped first.
+
+A ``--duplicates`` fraction of the requests reuse an earlier username or
+email, and threads race to create them. Passwords are hashed inline at cost
+4, so the numbers measure the database rather than bcrypt. Each run prints
+one JSON line with:
+
+- signups per second;
+- latency p50/p99;
+- the count of each status code;
+- ``correct``: one row per 201 and no two rows sharing a username or email,
+  every 409 clashes with a stored user, and no request failed with a 5xx.
+  Which of two racing signups wins depends on arrival order, so the check
+  does not predict the winners.
+"""
+
+import sys
+
+if '--run' in sys.argv:
+    # Run role: eventlet/gevent must patch the standard library before anything else is imported
+    from services.async_mode import patch_for_async_mode
+    patch_for_async_mode()
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def signup_payloads(count, duplicates, seed=7):
+    """Return ``count`` signup bodies, a ``duplicates`` fraction of which clash with an earlier one."""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        if payloads and rng.random() < duplicates:
+            original = rng.choice(payloads)
+            # Clash on the username, the email, or both
+            clash = rng.choice(('username', 'email', 'both'))
+            payload = {
+                'username': original['username'] if clash != 'email' else f"bench{i}",
+                'email': original['email'] if clash != 'username' else f"bench{i}@example.com",
+            }
+        else:
+            payload = {'username': f"bench{i}", 'email': f"bench{i}@example.com"}
+        payload['password'] = 'correct horse battery staple'
+        payloads.append(payload)
+    return payloads
+
+
+def run(args):
+    """Post the signups from ``--concurrency`` threads and check the users table."""
+    from flask import Flask
+    from flask_jwt_extended import JWTManager
+    from models.account import User, db
+    from routes.auth import auth_bp
+    from services.database import configure_database, tune_sqlite
+
+    app = Flask(__name__)
+    configure_database(app)
+    app.config['JWT_SECRET_KEY'] = 'bench-secret-key-of-sufficient-length'
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(auth_bp)
+    with app.app_context():
+        tune_sqlite(db.engine)
+        User.__table__.drop(db.engine, checkfirst=True)
+        db.create_all()
+
+    payloads = signup_payloads(args.signups, args.duplicates)
+    latencies = []
+    statuses = []
+    lock = threading.Lock()
+    queue = list(reversed(payloads))
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                payload = queue.pop()
+            started = time.perf_counter()
+            response = client.post('/api/auth/signup', json=payload)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                statuses.append((response.status_code, payload))
+
+    # The auth routes print each step; keep that out of the results
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        users = User.query.with_entities(User.username, User.email).all()
+        url = db.engine.url.render_as_string(hide_password=True)
+    usernames = {user.username for user in users}
+    emails = {user.email for user in users}
+    counts = Counter(code for code, _ in statuses)
+    rejected = [payload for code, payload in statuses if code == 409]
+    return {
+        'database': url,
+        'sqlite_wal': os.environ.get('SQLITE_WAL', '1'),
+        'signups_per_s': round(len(statuses) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'statuses': {str(code): n for code, n in sorted(counts.items())},
+        'rows': len(users),
+        'correct': (len(users) == counts[201] == len(usernames) == len(emails)
+                    and all(p['username'] in usernames or p['email'] in emails for p in rejected)
+                    and counts[201] + counts[409] == len(payloads)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent signups and check their correctness')
+    parser.add_argument('--signups', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duplicates', type=float, default=0.2, help='Fraction of signups that clash with an earlier one')
+    parser.add_argument('--database-url', help='Run against this database instead of temporary SQLite files')
+    parser.add_argument('--async-mode', choices=('threading', 'eventlet', 'gevent'), default='threading')
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args)), flush=True)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    if args.database_url:
+        runs = [{'DATABASE_URL': args.database_url}]
+    else:
+        workdir = tempfile.mkdtemp(prefix='bench-signup-')
+        runs = [{'DATABASE_URL': f"sqlite:///{os.path.join(workdir, f'wal{wal}.db')}", 'SQLITE_WAL': wal}
+                for wal in ('1', '0')]
+    for overrides in runs:
+        env = {**os.environ, **overrides, 'BCRYPT_LOG_ROUNDS': '4', 'PASSWORD_HASH_WORKERS': '0',
+               'PASSWORD_HASH_MAX_PENDING': str(args.concurrency), 'SOCKETIO_ASYNC_MODE': args.async_mode}
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--run',
+                        '--signups', str(args.signups), '--concurrency', str(args.concurrency),
+                        '--duplicates', str(args.duplicates)],
+                       cwd=here, env=env, check=False)
+
+
+if __name__ == '__main__':
+    main()
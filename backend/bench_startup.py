@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Report where backend startup time goes, per import of ``main.py``.
+
+    python bench_startup.py [--create-app] [--top 5] [--json]
+
+The script reads the top-level imports of ``main.py`` in order, so each
+blueprint module is one row. It imports them in a fresh interpreter run with
+``python -X importtime``. Each row shows the time that import added on top of
+everything imported before it, and the packages that time went to. The
+``-X importtime`` self times are summed by top-level package. A module that
+fails to import (a missing SDK, say) is reported with its error, and the rest
+still run. ``--create-app`` also times ``main.create_app()``, including
+anything it imports lazily.
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+MARKER = '# startup-report: '
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+# Runs in the child; main.py loads .env and patches for the async mode before its other imports
+CHILD_SCRIPT = '''
+import importlib, json, sys, time
+results = []
+
+def step(label, fn):
+    sys.stderr.write({marker!r} + label + "\\n")
+    sys.stderr.flush()
+    started = time.perf_counter()
+    error = None
+    try:
+        fn()
+    except Exception as e:
+        error = f"{{type(e).__name__}}: {{e}}"
+    results.append({{"module": label, "wall_ms": (time.perf_counter() - started) * 1000, "error": error}})
+
+def startup():
+    from dotenv import load_dotenv
+    load_dotenv()
+    from services.async_mode import patch_for_async_mode
+    patch_for_async_mode()
+
+step("startup (.env, async mode)", startup)
+for name in {modules!r}:
+    step(name, lambda: importlib.import_module(name))
+if {create_app!r}:
+    step("create_app()", lambda: importlib.import_module("main").create_app())
+sys.stderr.write({marker!r} + "end\\n")
+print(json.dumps(results))
+'''
+
+
+def main_imports(path):
+    """Return the modules imported at the top level of ``path``, in order."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules and name != '__future__')
+    return modules
+
+
+def parse_importtime(stderr):
+    """Sum ``-X importtime`` self times per step and per top-level package, in milliseconds."""
+    steps = {}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            current = line[len(MARKER):]
+            steps.setdefault(current, defaultdict(float))
+            continue
+        match = IMPORTTIME_LINE.match(line)
+        if match and current is not None:
+            package = match.group(4).split('.')[0]
+            steps[current][package] += int(match.group(1)) / 1000
+    return steps
+
+
+def run_report(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    modules = args.modules.split(',') if args.modules else main_imports(os.path.join(here, 'main.py'))
+    script = CHILD_SCRIPT.format(marker=MARKER, modules=modules, create_app=args.create_app)
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                           cwd=here, capture_output=True, text=True, timeout=args.timeout)
+    if child.returncode != 0 or not child.stdout.strip():
+        sys.exit(f"Startup report failed:\n{child.stderr[-2000:]}")
+    results = json.loads(child.stdout.strip().splitlines()[-1])
+    packages = parse_importtime(child.stderr)
+    for result in results:
+        by_package = packages.get(result['module'], {})
+        result['import_ms'] = round(sum(by_package.values()), 1)
+        result['wall_ms'] = round(result['wall_ms'], 1)
+        heaviest = sorted(by_package.items(), key=lambda item: -item[1])[:args.top]
+        result['heaviest'] = {package: round(ms, 1) for package, ms in heaviest}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Break down backend startup time per import of main.py')
+    parser.add_argument('--modules', help='Comma-separated modules to import instead of those of main.py')
+    parser.add_argument('--create-app', action='store_true', help='Also time main.create_app()')
+    parser.add_argument('--top', type=int, default=5, help='Heaviest packages shown per row')
+    parser.add_argument('--json', action='store_true', help='Print the rows as JSON')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    results = run_report(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    total = sum(result['wall_ms'] for result in results)
+    print(f"{'step':32} {'wall ms':>9} {'share':>6}  heaviest packages (ms)")
+    for result in results:
+        share = result['wall_ms'] / total * 100 if total else 0
+        detail = result['error'] or ', '.join(f"{name} {ms}" for name, ms in result['heaviest'].items())
+        print(f"{result['module'][:32]:32} {result['wall_ms']:9.1f} {share:5.0f}%  {detail}")
+    print(f"{'total':32} {total:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Compare threaded and asyncio AI agent creation against the local Tavus mock.
+
+    python bench_tavus_async.py --agents 200 --latency 0.3
+
+Starts ``mock_tavus_server.py`` in a subprocess and creates the same number of
+agents twice, all requested at once:
+
+- threads: the Flask ``/api/ai-agent/create`` route, one thread per request as
+  under the threaded server.
+- asyncio: the ASGI route from ``routes/ai_agent_asgi.py`` on one event loop.
+
+Both use the same connection cap (``TAVUS_POOL_SIZE``, set to ``--pool-size``).
+The replica check is cached up front and the inline conversation cleanup is
+skipped as it is with the reaper enabled, so each creation is one create call.
+For each mode it prints wall time, request latency percentiles and the peak
+thread count.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ThreadSampler:
+    """Record the peak number of live threads while running."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(mode, elapsed, latencies, statuses, peak_threads):
+    ok = sum(1 for status in statuses if status == 200)
+    return {
+        'mode': mode,
+        'agents': f"{ok}/{len(statuses)}",
+        'wall_s': round(elapsed, 2),
+        'per_s': round(len(statuses) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000),
+        'p95_ms': round(percentile(latencies, 95) * 1000),
+        'max_ms': round(max(latencies) * 1000),
+        'peak_threads': peak_threads,
+    }
+
+
+def payload(i):
+    return {'custom_script': f"[0:00] Lesson {i}. [0:05] Done.", 'room_id': f"bench-{i}"}
+
+
+def run_threads(agents):
+    from flask import Flask
+    from routes.ai_agent import ai_agent_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(ai_agent_bp)
+    client = app.test_client()
+
+    def create(i):
+        started = time.perf_counter()
+        response = client.post('/api/ai-agent/create', json=payload(i))
+        return response.status_code, time.perf_counter() - started
+
+    with ThreadSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=agents) as executor:
+            results = list(executor.map(create, range(agents)))
+        elapsed = time.perf_counter() - started
+    return report('threads', elapsed, [r[1] for r in results], [r[0] for r in results], sampler.peak)
+
+
+def run_asyncio(agents):
+    import httpx
+    from routes.ai_agent_asgi import AgentASGIApp
+
+    async def main():
+        transport = httpx.ASGITransport(app=AgentASGIApp())
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            async def create(i):
+                started = time.perf_counter()
+                response = await client.post('/api/ai-agent/create', json=payload(i))
+                return response.status_code, time.perf_counter() - started
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(create(i) for i in range(agents)))
+            return results, time.perf_counter() - started
+
+    with ThreadSampler() as sampler:
+        results, elapsed = asyncio.run(main())
+    return report('asyncio', elapsed, [r[1] for r in results], [r[0] for r in results], sampler.peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark threaded vs asyncio Tavus agent creation')
+    parser.add_argument('--agents', type=int, default=200, help='Agents requested at once')
+    parser.add_argument('--latency', type=float, default=0.3, help='Mock Tavus latency per request in seconds')
+    parser.add_argument('--pool-size', type=int, default=25, help='Connection cap for both clients')
+    parser.add_argument('--mode', choices=('both', 'threads', 'asyncio'), default='both')
+    args = parser.parse_args()
+
+    port = free_port()
+    mock = subprocess.Popen([sys.executable, 'mock_tavus_server.py', '--port', str(port),
+                             '--latency', str(args.latency)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(50):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        os.environ.update({
+            'TAVUS_BASE_URL': f"http://127.0.0.1:{port}",
+            'TAVUS_API_KEY': 'mock',
+            'TAVUS_POOL_SIZE': str(args.pool_size),
+            'TAVUS_REAPER_INTERVAL': '3600',
+        })
+        from services.tavus_agent import get_tavus_agent
+        from services.tavus_reaper import start_conversation_reaper
+        # With the reaper running, creation skips the inline cleanup
+        start_conversation_reaper()
+        get_tavus_agent().test_replica(os.getenv('TAVUS_REPLICA_ID', 'r1a4e22fa0d9'))
+
+        results = []
+        for mode, run in (('threads', run_threads), ('asyncio', run_asyncio)):
+            if args.mode in ('both', mode):
+                results.append(run(args.agents))
+                print(json.dumps(results[-1]))
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Check the LLM gateway's limits, retries, coalescing and accounting against the fake provider.
+
+    python check_llm_gateway.py
+
+Every check runs a fresh gateway against ``FakeLLMClient`` (provider
+``fake``), so no API key or network is needed. The checks cover:
+
+- identical in-flight prompts share one upstream call;
+- the concurrency limit and the token bucket hold under a burst;
+- transient failures are retried, timeouts surface as ``LLMTimeoutError``, and
+  a call that cannot get a slot fails with ``LLMBusyError``;
+- tokens and latency are counted per route.
+
+A last check sends concurrent ``/api/gemini/generate`` requests through
+the real handler with ``LLM_BACKEND=stub``.
+"""
+
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault('LLM_BACKEND', 'stub')
+os.environ.setdefault('LLM_CACHE_ENABLED', '0')
+
+
+def burst(fn, count):
+    """Call ``fn(i)`` from ``count`` threads at once; return the results and exceptions in order."""
+    results = [None] * count
+    start = threading.Event()
+
+    def run(i):
+        start.wait()
+        try:
+            results[i] = fn(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def gateway(env=None, **options):
+    """Return a new gateway and a new fake client, with ``LLM_FAKE_*`` limits from ``env``."""
+    from services.llm_gateway import LLMGateway
+    from services.llm_providers import llm_providers
+    from services.llm_stub import FakeLLMClient
+    for name in ('LLM_FAKE_MAX_CONCURRENT', 'LLM_FAKE_RATE', 'LLM_FAKE_BURST'):
+        os.environ.pop(name, None)
+    os.environ.update(env or {})
+    client = FakeLLMClient(latency=0.05)
+    llm_providers.register('fake', lambda: client)
+    return LLMGateway(**{'retry_base': 0.01, 'queue_timeout': 10, **options}), client
+
+
+def main():
+    from services.llm_gateway import LLMBusyError, LLMTimeoutError
+
+    results = []
+
+    def check(name, ok, detail=''):
+        results.append(bool(ok))
+        print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f" ({detail})" if detail else ''))
+
+    # Coalescing
+    llm, fake = gateway()
+    fake.latency = 0.2
+    answers = burst(lambda i: llm.generate('fake', 'same prompt', route='coalesce'), 20)
+    route = llm.stats()['routes']['coalesce']
+    check('identical in-flight prompts make one upstream call',
+          fake.calls == 1 and len(set(answers)) == 1 and route['coalesced'] == 19,
+          f"{fake.calls} upstream calls for 20 requests")
+
+    # Concurrency limit
+    llm, fake = gateway({'LLM_FAKE_MAX_CONCURRENT': '3', 'LLM_FAKE_RATE': '0'})
+    fake.latency = 0.1
+    started = time.perf_counter()
+    burst(lambda i: llm.generate('fake', f"prompt {i}"), 30)
+    elapsed = time.perf_counter() - started
+    check('at most LLM_<PROVIDER>_MAX_CONCURRENT calls run at once',
+          fake.max_in_flight == 3 and fake.calls == 30 and elapsed >= 0.9,
+          f"max in flight {fake.max_in_flight}, {elapsed:.2f}s")
+
+    # Rate limit
+    llm, fake = gateway({'LLM_FAKE_MAX_CONCURRENT': '50', 'LLM_FAKE_RATE': '20', 'LLM_FAKE_BURST': '5'})
+    fake.latency = 0
+    started = time.perf_counter()
+    burst(lambda i: llm.generate('fake', f"prompt {i}"), 25)
+    elapsed = time.perf_counter() - started
+    check('the token bucket spaces calls beyond the burst', 0.95 <= elapsed < 2,
+          f"25 calls at 20/s with a burst of 5 took {elapsed:.2f}s")
+
+    # Retries
+    llm, fake = gateway({'LLM_FAKE_RATE': '0'}, retries=8)
+    fake.failure_rate = 0.3
+    answers = burst(lambda i: llm.generate('fake', f"prompt {i}", route='retry'), 20)
+    route = llm.stats()['routes']['retry']
+    check('transient failures are retried with backoff',
+          not any(isinstance(a, Exception) for a in answers) and route['retries'] == fake.failures > 0,
+          f"{fake.failures} failures, {route['retries']} retries")
+
+    # Timeouts
+    llm, fake = gateway({'LLM_FAKE_RATE': '0'}, timeout=0.05, retries=1)
+    fake.latency = 0.5
+    answer = burst(lambda i: llm.generate('fake', 'slow prompt', route='timeout'), 1)[0]
+    route = llm.stats()['routes']['timeout']
+    check('a slow provider raises LLMTimeoutError after the retries',
+          isinstance(answer, LLMTimeoutError) and route['timeouts'] == 2 and route['errors'] == 1,
+          f"{type(answer).__name__}, {route['timeouts']} timeouts")
+
+    # Busy
+    llm, fake = gateway({'LLM_FAKE_MAX_CONCURRENT': '1', 'LLM_FAKE_RATE': '0'}, queue_timeout=0.05)
+    fake.latency = 0.3
+    answers = burst(lambda i: llm.generate('fake', f"prompt {i}"), 2)
+    check('a call that cannot get a slot in time raises LLMBusyError',
+          sum(isinstance(a, LLMBusyError) for a in answers) == 1 and llm.stats()['providers']['fake']['rejected'] == 1)
+
+    # Accounting
+    llm, fake = gateway({'LLM_FAKE_RATE': '0'})
+    llm.generate('fake', 'x' * 400, system='be brief', route='quiz')
+    llm.generate('fake', 'y' * 40, route='quiz')
+    route = llm.stats()['routes']['quiz']
+    check('tokens and latency are counted per route',
+          route['upstream'] == 2 and route['input_tokens'] > 100 and route['output_tokens'] > 0
+          and route['latency']['count'] == 2,
+          f"{route['input_tokens']} in, {route['output_tokens']} out")
+
+    # The real handler, on the stub Gemini client
+    from flask import Flask
+    from routes.gemini import gemini_bp
+    from services.llm_gateway import llm_gateway
+    from services.llm_providers import get_llm_client
+    app = Flask(__name__)
+    app.register_blueprint(gemini_bp)
+    stub = get_llm_client('gemini')
+    calls_before = stub.calls
+    responses = burst(lambda i: app.test_client().post('/api/gemini/generate',
+                                                       json={'prompt': 'gradients', 'cache': False}), 10)
+    route = llm_gateway.stats()['routes']['generate']
+    check('/api/gemini/generate goes through the gateway',
+          all(r.status_code == 200 for r in responses) and route['calls'] == 10
+          and route['upstream'] == stub.calls - calls_before,
+          f"{stub.calls - calls_before} upstream calls, {route['coalesced']} coalesced")
+
+    print(f"{sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Run the /meet signaling handlers on several worker processes and check they act as one server.
+
+    python check_signaling_cluster.py --workers 3
+
+Each worker is a separate process with only the signaling routes, sharing a
+SQLite room store (``ROOM_STORE=sqlite``) and a SQLite Socket.IO message
+queue (``SOCKETIO_MESSAGE_QUEUE=sqlite:///...``) in a temporary directory.
+Clients connect to different workers and the script checks that:
+
+- a client sees participants that joined through other workers;
+- user-joined, offer, answer, ice-candidate and user-left reach peers on
+  other workers;
+- a room's AI agent in the shared store is visible to every worker;
+- participants of a killed worker are dropped when a worker starts again.
+
+Pass ``--room-store memory`` to see the checks fail without shared state, and
+``--async-mode eventlet`` or ``gevent`` to run the workers on green threads.
+"""
+
+import sys
+
+if '--worker' in sys.argv:
+    # Worker role: eventlet/gevent must patch the standard library before anything else is imported
+    from services.async_mode import patch_for_async_mode
+    patch_for_async_mode()
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def run_worker(port):
+    """Serve only the signaling routes, configured from the environment."""
+    from flask import Flask
+    from flask_socketio import SocketIO
+    from routes.webrtc import init_webrtc_routes
+    from services.async_mode import socketio_async_mode, socketio_run_options
+    from services.socketio_queue import socketio_queue_options
+
+    mode = socketio_async_mode()
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode=mode, cors_allowed_origins='*', **socketio_queue_options())
+    init_webrtc_routes(socketio)
+    socketio.run(app, host='127.0.0.1', port=port, allow_unsafe_werkzeug=True, **socketio_run_options(mode))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+class MeetClient:
+    """Socket.IO client on /meet that records every event it receives."""
+
+    def __init__(self, name, port):
+        import socketio
+
+        self.name = name
+        self.events = []
+        self._changed = threading.Condition()
+        self.sio = socketio.Client()
+        self.sio.on('*', self._record, namespace='/meet')
+        self.sio.connect(f"http://127.0.0.1:{port}", namespaces=['/meet'], transports=['polling'])
+        self.sid = self.sio.get_sid('/meet')
+
+    def _record(self, event, data=None):
+        with self._changed:
+            self.events.append((event, data))
+            self._changed.notify_all()
+
+    def emit(self, event, data=None):
+        self.sio.emit(event, data or {}, namespace='/meet')
+
+    def wait_for(self, event, match=lambda data: True, timeout=5):
+        """Return the first ``event`` whose data satisfies ``match``, or None on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                for name, data in self.events:
+                    if name == event and match(data):
+                        return data
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def close(self):
+        self.sio.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check /meet signaling across worker processes')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--room-store', choices=('sqlite', 'memory'), default='sqlite')
+    parser.add_argument('--async-mode', choices=('threading', 'eventlet', 'gevent'), default='threading')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.port)
+
+    workdir = tempfile.mkdtemp(prefix='signaling-cluster-')
+    env = {
+        **os.environ,
+        'ROOM_STORE': args.room_store,
+        'ROOM_STORE_PATH': os.path.join(workdir, 'rooms.db'),
+        'SOCKETIO_MESSAGE_QUEUE': f"sqlite:///{os.path.join(workdir, 'queue.db')}",
+        'TAVUS_WARM_POOL': '0',
+        'SOCKETIO_ASYNC_MODE': args.async_mode,
+    }
+    here = os.path.dirname(os.path.abspath(__file__))
+    workers = {}
+
+    def start_worker(index):
+        port = free_port()
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', '--port', str(port)],
+                                   cwd=here, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not wait_for_port(port):
+            raise RuntimeError(f"worker {index} did not start")
+        workers[index] = (process, port)
+        return port
+
+    results = []
+
+    def check(name, ok):
+        results.append(ok)
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+
+    clients = []
+    try:
+        for index in range(args.workers):
+            start_worker(index)
+        print(f"Started {args.workers} {args.async_mode} workers ({args.room_store} room store) in {workdir}")
+
+        def port_of(i):
+            return workers[i % args.workers][1]
+
+        alice = MeetClient('alice', port_of(0))
+        bob = MeetClient('bob', port_of(1))
+        clients += [alice, bob]
+
+        alice.emit('join-room', {'roomId': 'lesson'})
+        alice.wait_for('room-joined')
+        bob.emit('join-room', {'roomId': 'lesson'})
+        joined = bob.wait_for('room-joined')
+        check('participants include users on other workers', bool(joined) and alice.sid in joined['participants'])
+        check('user-joined reaches another worker',
+              alice.wait_for('user-joined', lambda d: d['userId'] == bob.sid) is not None)
+        check('second user is asked to create the offer', bob.wait_for('initiate-call') is not None)
+
+        bob.emit('offer', {'offer': {'type': 'offer', 'sdp': 'v=0'}})
+        check('offer relayed across workers', alice.wait_for('offer', lambda d: d['from'] == bob.sid) is not None)
+        alice.emit('answer', {'answer': {'type': 'answer', 'sdp': 'v=0'}})
+        check('answer relayed across workers', bob.wait_for('answer', lambda d: d['from'] == alice.sid) is not None)
+        alice.emit('ice-candidate', {'candidate': {'candidate': 'candidate:1 1 udp 1 127.0.0.1 9 typ host'}})
+        check('ICE candidate relayed across workers',
+              bob.wait_for('ice-candidate', lambda d: d['from'] == alice.sid) is not None)
+
+        if args.workers > 2:
+            # A participant on a worker that dies without cleaning up
+            carol = MeetClient('carol', port_of(2))
+            clients.append(carol)
+            carol.emit('join-room', {'roomId': 'lesson'})
+            carol.wait_for('room-joined')
+            process, _ = workers[2]
+            process.send_signal(signal.SIGKILL)
+            process.wait()
+            start_worker(2)
+            dave = MeetClient('dave', port_of(2))
+            clients.append(dave)
+            dave.emit('join-room', {'roomId': 'lesson'})
+            joined = dave.wait_for('room-joined')
+            check('participants of a killed worker are pruned on restart',
+                  bool(joined) and carol.sid not in joined['participants']
+                  and {alice.sid, bob.sid} <= set(joined['participants']))
+
+        # Agents recorded by one worker are read by another
+        from services import room_store
+        if args.room_store == 'sqlite':
+            store = room_store.SQLiteRoomStore(env['ROOM_STORE_PATH'])
+            store.set_agent('lesson', {'conversation_id': 'c-shared'})
+        bob.emit('send-to-ai', {'roomId': 'lesson', 'message': 'hello'})
+        check('room agent visible to every worker',
+              alice.wait_for('ai-message-sent', lambda d: d['sender'] == bob.sid) is not None)
+
+        bob.close()
+        clients.remove(bob)
+        check('user-left reaches another worker',
+              alice.wait_for('user-left', lambda d: d['userId'] == bob.sid) is not None)
+    finally:
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+        for process, _ in workers.values():
+            process.terminate()
+            process.wait()
+
+    print(f"{sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
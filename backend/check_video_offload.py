@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Check X-Accel-Redirect / X-Sendfile video delivery without a real proxy.
+
+``OffloadEmulator`` wraps a WSGI app and does what nginx or Apache would do
+with an offload header: it checks the Flask response is empty, resolves the
+header to a file and sends that file itself, honouring Range requests. The
+script serves a sample video in each VIDEO_DELIVERY_MODE and verifies that
+the bytes, range responses and cache headers match direct delivery.
+"""
+
+import os
+import sys
+import tempfile
+from flask import Flask
+from werkzeug.utils import send_file as werkzeug_send_file
+from services.video_delivery import send_video
+
+
+class OffloadEmulator:
+    """WSGI middleware standing in for a front proxy that honours offload headers."""
+
+    def __init__(self, app, accel_prefix='/protected-media/', accel_root='.'):
+        self.app = app
+        self.accel_prefix = accel_prefix.rstrip('/') + '/'
+        self.accel_root = os.path.abspath(accel_root)
+        self.offloaded = []
+
+    def __call__(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            return lambda data: None
+
+        body = b''.join(self.app(environ, capture))
+        headers = dict(captured['headers'])
+        path = None
+        if 'X-Accel-Redirect' in headers:
+            uri = headers['X-Accel-Redirect']
+            assert uri.startswith(self.accel_prefix), f"X-Accel-Redirect {uri} is outside {self.accel_prefix}"
+            path = os.path.join(self.accel_root, uri[len(self.accel_prefix):])
+        elif 'X-Sendfile' in headers:
+            path = headers['X-Sendfile']
+            assert os.path.isabs(path), f"X-Sendfile {path} is not an absolute path"
+
+        if path is None:
+            start_response(captured['status'], captured['headers'])
+            return [body]
+
+        assert body == b'', "Offloaded responses must not carry a body"
+        assert os.path.isfile(path), f"Offloaded file {path} does not exist"
+        self.offloaded.append(path)
+
+        # Like nginx, keep the upstream Content-Type and Cache-Control and serve the file itself
+        response = werkzeug_send_file(path, environ, mimetype=headers.get('Content-Type'), conditional=True)
+        response.headers['Cache-Control'] = headers.get('Cache-Control', '')
+        return response(environ, start_response)
+
+
+def check_mode(mode, video_path, expected):
+    """Serve the sample video in one delivery mode and compare against the file."""
+    os.environ['VIDEO_DELIVERY_MODE'] = mode
+    os.environ['VIDEO_ACCEL_ROOT'] = os.path.dirname(video_path)
+
+    app = Flask(__name__)
+
+    @app.route('/video')
+    def video():
+        return send_video(video_path, immutable=True)
+
+    emulator = OffloadEmulator(app.wsgi_app, accel_root=os.path.dirname(video_path))
+    app.wsgi_app = emulator
+    client = app.test_client()
+
+    full = client.get('/video')
+    assert full.status_code == 200, full.status_code
+    assert full.data == expected, "Full response does not match the file"
+    assert 'immutable' in full.headers['Cache-Control'], full.headers['Cache-Control']
+    assert full.mimetype == 'video/mp4', full.mimetype
+
+    partial = client.get('/video', headers={'Range': 'bytes=1000-1999'})
+    assert partial.status_code == 206, partial.status_code
+    assert partial.data == expected[1000:2000], "Range response does not match the file"
+
+    offloaded = len(emulator.offloaded)
+    if mode == 'direct':
+        assert offloaded == 0, "Direct mode should not offload"
+    else:
+        assert offloaded == 2, f"Expected 2 offloaded responses, got {offloaded}"
+    print(f"{mode}: OK ({offloaded} responses offloaded)")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as media_dir:
+        video_path = os.path.join(media_dir, 'sample.mp4')
+        expected = os.urandom(64 * 1024)
+        with open(video_path, 'wb') as f:
+            f.write(expected)
+
+        failed = False
+        for mode in ('direct', 'x-accel', 'x-sendfile'):
+            try:
+                check_mode(mode, video_path, expected)
+            except AssertionError as e:
+                failed = True
+                print(f"{mode}: FAILED - {e}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
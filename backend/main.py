@@ -1,24 +1,33 @@
 """Main application file for the backend service."""
 
 import os
+from dotenv import load_dotenv
+from services.async_mode import patch_for_async_mode, socketio_run_options
+
+# Load environment variables; eventlet/gevent must patch the standard library
+# before anything below imports it
+load_dotenv()
+SOCKETIO_ASYNC_MODE = patch_for_async_mode()
+
 from datetime import timedelta
 from flask import Flask, jsonify
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_socketio import SocketIO
-from dotenv import load_dotenv
 from models.account import db, User
 from routes.auth import auth_bp, token_blocklist
 from routes.animation import animation_bp
 from routes.tavus import tavus_bp
 from routes.ai_config import ai_config_bp
 from routes.ai_agent import ai_agent_bp
-from routes.webrtc import init_webrtc_routes
-
-# Load environment variables
-load_dotenv()
-from routes.gemini import gemini_bp
+from routes.webrtc import init_webrtc_routes, webrtc_bp
+from services.manim_pool import get_manim_pool
+from services.animation_library import start_prerender
+from services.tavus_reaper import start_conversation_reaper
+from services.socketio_queue import socketio_queue_options
+from services.database import configure_database, tune_sqlite
+from routes.gemini import gemini_bp, init_presentation_job_events
 
 
 def create_app():
@@ -26,7 +35,8 @@ def create_app():
     app = Flask(__name__)
     
     # Configure the app
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
+    # DATABASE_URL and pool sizing; SQLite by default
+    configure_database(app)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'super-secret-key-for-development')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
@@ -49,14 +59,18 @@ def create_app():
         cors_allowed_origins="*", 
         logger=False, 
         engineio_logger=False,
-        async_mode='threading',
+        # threading, eventlet or gevent (SOCKETIO_ASYNC_MODE)
+        async_mode=SOCKETIO_ASYNC_MODE,
         transports=['websocket', 'polling'],
         ping_timeout=60,
-        ping_interval=25
+        ping_interval=25,
+        # Relay emits between worker processes when SOCKETIO_MESSAGE_QUEUE is set
+        **socketio_queue_options()
     )
     
     # Initialize WebRTC routes
     init_webrtc_routes(socketio)
+    init_presentation_job_events(socketio)
     
     # Register blueprints
     app.register_blueprint(auth_bp)
@@ -65,12 +79,13 @@ def create_app():
     app.register_blueprint(ai_config_bp)
     app.register_blueprint(ai_agent_bp)
     app.register_blueprint(gemini_bp)
+    app.register_blueprint(webrtc_bp)
     
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload):
         """Check if a token is in the blocklist."""
         jti = jwt_payload["jti"]
-        return jti in token_blocklist
+        return token_blocklist.is_revoked(jti)
         
     @jwt.invalid_token_loader
     def invalid_token_callback(error_string):
@@ -103,7 +118,18 @@ def create_app():
     
     # Create tables
     with app.app_context():
+        tune_sqlite(db.engine)
         db.create_all()
+    
+    # Start warm manim render workers when MANIM_WORKER_POOL is set
+    get_manim_pool()
+    
+    # Pre-render the fixed example animations in the background when ANIMATION_PRERENDER is set
+    if os.environ.get('ANIMATION_PRERENDER', '0').lower() in ('1', 'true', 'yes'):
+        start_prerender()
+    
+    # End stale Tavus conversations in the background when TAVUS_REAPER_INTERVAL is set
+    start_conversation_reaper()
         
     return app, socketio
 
@@ -117,7 +143,8 @@ def main():
         debug=True, 
         host='0.0.0.0', 
         port=int(os.environ.get('PORT', 5002)),
-        use_reloader=False
+        use_reloader=False,
+        **socketio_run_options(SOCKETIO_ASYNC_MODE)
     )
 
 
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Local mock of the Tavus v2 API for exercising TavusAgent without an account.
+
+Run it as a server and point the backend at it:
+
+    python mock_tavus_server.py --port 5055
+    TAVUS_BASE_URL=http://127.0.0.1:5055 TAVUS_API_KEY=mock python main.py
+
+or run ``python mock_tavus_server.py --check`` to provision agents against an
+in-process mock (with injected failures) and print connection reuse and
+latency histograms.
+
+The mock is built on ``http.server`` rather than Flask because the Werkzeug
+development server closes every connection, which would hide whether the
+client reuses them.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class MockTavusServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server holding the mock API state.
+
+    ``latency`` adds a delay (seconds) to every request and ``fail_every``
+    fails every n-th request to exercise client retries: creates get a 429
+    (rate limited, safe to retry) and other calls a 503. ``stale`` seeds that
+    many active conversations created an hour ago.
+    """
+
+    daemon_threads = True
+    # The socketserver default backlog of 5 resets bursts of new connections
+    request_queue_size = 256
+
+    def __init__(self, address, latency=0.0, fail_every=0, replica_id='r1a4e22fa0d9', stale=0):
+        super().__init__(address, MockTavusHandler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.replica_id = replica_id
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.connections = 0
+        self.conversations = {}
+        created_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() - 3600))
+        for i in range(stale):
+            conversation_id = f"stale{i:05d}"
+            self.conversations[conversation_id] = {
+                'conversation_id': conversation_id,
+                'conversation_url': f"https://tavus.daily.co/{conversation_id}",
+                'replica_id': replica_id,
+                'status': 'active',
+                'created_at': created_at,
+            }
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'injected_failures': self.failures,
+                'connections': self.connections,
+                'conversations': len(self.conversations),
+            }
+
+
+class MockTavusHandler(BaseHTTPRequestHandler):
+    """Route requests to the handful of Tavus endpoints TavusAgent uses."""
+
+    protocol_version = 'HTTP/1.1'  # keep connections open like the real API
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        if body:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def _handle(self, method):
+        server = self.server
+        body = self._read_json()
+        path, _, query = self.path.partition('?')
+        params = dict(parse_qsl(query))
+
+        if path == '/_mock/stats':
+            return self._send(200, server.stats())
+
+        with server.lock:
+            server.requests += 1
+            fail = server.fail_every and server.requests % server.fail_every == 0
+            if fail:
+                server.failures += 1
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+        if self.headers.get('x-api-key') is None:
+            return self._send(401, {'message': 'Missing x-api-key'})
+        if fail:
+            return self._send(429 if method == 'POST' else 503, {'message': 'Injected failure'})
+
+        if method == 'GET' and path == '/v2/replicas':
+            return self._send(200, {'data': [{'replica_id': server.replica_id, 'replica_name': 'Mock Replica',
+                                              'status': 'completed'}]})
+
+        match = re.fullmatch(r'/v2/replicas/([^/]+)', path)
+        if method == 'GET' and match:
+            if match.group(1) != server.replica_id:
+                return self._send(404, {'message': 'Replica not found'})
+            return self._send(200, {'replica_id': server.replica_id, 'name': 'Mock Replica', 'status': 'completed'})
+
+        if path == '/v2/conversations':
+            if method == 'GET':
+                limit = int(params.get('limit', 10))
+                page = int(params.get('page', 1))
+                with server.lock:
+                    conversations = list(server.conversations.values())
+                return self._send(200, {'data': conversations[(page - 1) * limit:page * limit],
+                                        'total_count': len(conversations)})
+            if method == 'POST':
+                conversation_id = f"c{uuid.uuid4().hex[:12]}"
+                conversation = {
+                    'conversation_id': conversation_id,
+                    'conversation_name': body.get('conversation_name'),
+                    'conversation_url': f"https://tavus.daily.co/{conversation_id}",
+                    'replica_id': body.get('replica_id'),
+                    'status': 'active',
+                    'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                }
+                with server.lock:
+                    server.conversations[conversation_id] = conversation
+                return self._send(200, conversation)
+
+        match = re.fullmatch(r'/v2/conversations/([^/]+)', path)
+        if match:
+            with server.lock:
+                conversation = server.conversations.get(match.group(1))
+                if conversation and method == 'DELETE':
+                    conversation['status'] = 'ended'
+            if not conversation:
+                return self._send(404, {'message': 'Conversation not found'})
+            if method == 'DELETE':
+                return self._send(204)
+            if method == 'GET':
+                return self._send(200, conversation)
+
+        return self._send(404, {'message': f'No mock for {method} {path}'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+def start_mock_server(host='127.0.0.1', port=0, **options):
+    """Serve the mock API on a background thread and return the server."""
+    server = MockTavusServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_check(provisions=20, concurrency=4, fail_every=7, latency=0.01):
+    """Provision agents against a mock server and report connection reuse and latencies."""
+    from services.tavus_agent import TavusAgent, build_session, latency as tavus_latency, session_config
+
+    server = start_mock_server(latency=latency, fail_every=fail_every)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    config = {**session_config(), 'pool_size': concurrency, 'backoff_factor': 0.01}
+    agent = TavusAgent('mock', base_url=base_url, session=build_session(config))
+
+    def provision(i):
+        # The same sequence of calls provision_ai_agent makes
+        replica = agent.test_replica(server.replica_id)
+        agent.cleanup_active_conversations()
+        conversation = agent.create_conversation(replica_id=server.replica_id,
+                                                 custom_script=f"[0:00] Script {i}. [0:05] Done.")
+        url = agent.get_conversation_url(conversation['conversation_id']) if conversation else None
+        return bool(replica and url)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(provision, range(provisions)))
+    elapsed = time.perf_counter() - started
+
+    stats = server.stats()
+    server.shutdown()
+
+    print(json.dumps({'endpoints': tavus_latency.snapshot()}, indent=2))
+    print(f"{sum(results)}/{provisions} agents provisioned in {elapsed:.2f}s")
+    print(f"{stats['requests']} requests ({stats['injected_failures']} injected failures) "
+          f"over {stats['connections']} connections")
+
+    ok = all(results) and stats['connections'] <= concurrency
+    if not ok:
+        print(f"FAILED: expected every provision to succeed over at most {concurrency} pooled connections")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the Tavus v2 API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--latency', type=float, default=0.0, help='Added delay per request in seconds')
+    parser.add_argument('--fail-every', type=int, default=0, help='Fail every n-th request with a 429/503')
+    parser.add_argument('--stale', type=int, default=0, help='Seed this many hour-old active conversations')
+    parser.add_argument('--check', action='store_true', help='Run the in-process client check and exit')
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(run_check(fail_every=args.fail_every or 7, latency=args.latency or 0.01))
+
+    server = MockTavusServer((args.host, args.port), latency=args.latency, fail_every=args.fail_every,
+                             stale=args.stale)
+    print(f"Mock Tavus API on http://{args.host}:{args.port} (set TAVUS_BASE_URL to this)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 """Account model for the application."""
 
+import time
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
@@ -28,3 +29,16 @@ class User(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class RevokedToken(db.Model):
+    """JWT revoked by logout, kept until the token would have expired anyway."""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(64), unique=True, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False, index=True)  # Unix time of the token's exp
+    revoked_at = db.Column(db.Float, nullable=False, index=True, default=time.time)  # Unix time of the logout
+    
+    def __repr__(self):
+        """String representation of the RevokedToken object."""
+        return f'<RevokedToken {self.jti}>'
@@ -2,14 +2,182 @@
 
 import logging
 import os
-import time
 from flask import Blueprint, request, jsonify
-from services.tavus_agent import TavusAgent
+from services.render_jobs import RenderJobQueue
+from services.tavus_agent import get_tavus_agent
+from services.tavus_async import get_async_tavus_agent
+from services.tavus_pool import ConversationProfile, get_conversation_pool
+from services.tavus_reaper import get_conversation_reaper
 
 logger = logging.getLogger(__name__)
 
 ai_agent_bp = Blueprint('ai_agent', __name__, url_prefix='/api/ai-agent')
 
+class AgentProvisionError(Exception):
+    """Raised when a Tavus AI agent cannot be provisioned."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Tutor agent configuration, shared by every entry point and the warm conversation pool
+TUTOR_PERSONA = "The first thing you will do is read the script and time your self according to the time stamps but don't say the time stamps out loud. Then you will respond to the user in a helpful and insightful way. If they ask questions that are irrelavent, respond in a kind way that veers them back to the subject. If they ask about a related topic that is very vast in nature (i.e. explaining something that can't be learnt quickly, recommend them to asking the program a new prompt. Ignore things like asterisks and quotation marks when you read a script)"
+TUTOR_STYLE = "polite, insighful, focused, and helpful, super super slow paced"
+DEFAULT_TUTOR_SCRIPT = "You are a helpful AI tutor ready to discuss educational topics."
+
+# Background provisioning for the request-ai-agent socket event, at most one job per room at a time
+agent_jobs = RenderJobQueue(
+    max_workers=int(os.environ.get('AI_AGENT_WORKERS', 4)),
+    max_pending=int(os.environ.get('AI_AGENT_MAX_PENDING', 50)),
+    name='agent-job',
+)
+
+
+def _no_progress(stage, percent=None, **data):
+    pass
+
+
+def build_agent_data(room_id, conversation_id, conversation_url, replica_id, replica, persona_instructions,
+                     custom_script, conversation_style):
+    """Return the agent data sent to clients for a provisioned conversation."""
+    return {
+        'agent_id': f'tavus_agent_{room_id}',
+        'conversation_id': conversation_id,
+        'conversation_url': conversation_url,
+        'replica_id': replica_id,
+        'agent_name': replica.get('name', 'AI Assistant'),
+        'status': 'active',
+        'type': 'tavus_conversation',
+        'persona_instructions': persona_instructions,
+        'custom_script': custom_script,
+        'conversation_style': conversation_style
+    }
+
+
+def _provision_steps(tavus_agent, custom_script, room_id, persona_instructions, conversation_style, progress):
+    """The provisioning logic shared by the sync and asyncio versions.
+
+    A generator that yields ``(method, args, kwargs)`` for each Tavus call and
+    is sent back the result, so only performing the call differs between the
+    two. Returns the agent data; raises AgentProvisionError.
+    """
+    progress = progress or _no_progress
+    logger.info(f"Creating Tavus AI agent for room {room_id}")
+    logger.info(f"Using custom_script: '{custom_script[:100]}...'")
+
+    if not tavus_agent.api_key:
+        logger.error("No Tavus API key found")
+        raise AgentProvisionError("Tavus API key not configured")
+
+    # A conversation the warm pool pre-created for this profile skips the create round trips
+    pool = get_conversation_pool()
+    pooled = pool.acquire(ConversationProfile(persona_instructions, custom_script, conversation_style)) if pool else None
+    if pooled:
+        conversation_id = pooled.get('conversation_id')
+        # Checked when the slot was created, so this is a cache hit
+        replica = (yield 'test_replica', (pool.replica_id,), {}) or {}
+        logger.info(f"Using pre-created conversation from the warm pool: {conversation_id}")
+        return build_agent_data(room_id, conversation_id,
+                                pooled.get('conversation_url') or f"https://tavus.daily.co/{conversation_id}",
+                                pool.replica_id, replica, persona_instructions, custom_script, conversation_style)
+
+    # Use your specific replica ID
+    replica_id = os.getenv('TAVUS_REPLICA_ID', 'r1a4e22fa0d9')
+    logger.info(f"Using replica: {replica_id}")
+
+    # Test the replica first
+    progress('checking_replica', 10)
+    replica_test = yield 'test_replica', (replica_id,), {}
+    if not replica_test:
+        logger.error(f"Replica {replica_id} is not available")
+        raise AgentProvisionError(f"Replica {replica_id} is not ready", 400)
+
+    logger.info(f"Replica test successful: {replica_test.get('name', 'Unknown')}")
+
+    # Clean up any active conversations first, unless the background reaper keeps slots free
+    reaper = get_conversation_reaper()
+    if not reaper:
+        progress('cleaning_up', 25)
+        logger.info("Cleaning up active conversations...")
+        ended_count = yield 'cleanup_active_conversations', (), {'wait': True}
+        if ended_count > 0:
+            logger.info(f"Ended {ended_count} active conversations")
+
+    create_conversation = ('create_conversation', (), {
+        'replica_id': replica_id,
+        'persona_instructions': persona_instructions,
+        'custom_script': custom_script,
+        'conversation_style': conversation_style,
+    })
+
+    # Create a conversation with the script
+    progress('creating_conversation', 50)
+    conversation_response = yield create_conversation
+
+    if not conversation_response and reaper:
+        # The reaper only ends stale conversations, so free a slot now and try once more
+        if (yield 'cleanup_active_conversations', (), {'wait': True, 'use_cache': False}):
+            conversation_response = yield create_conversation
+
+    if not conversation_response:
+        logger.error("Failed to create Tavus conversation")
+        raise AgentProvisionError("Failed to create AI conversation")
+
+    # Get conversation details
+    conversation_id = conversation_response.get('conversation_id')
+    progress('fetching_url', 80)
+    conversation_url = yield 'get_conversation_url', (conversation_id,), {}
+
+    if not conversation_url:
+        # The conversation exists, so fall back to its room URL rather than leave it running unused
+        logger.warning(f"No URL returned for conversation {conversation_id}, using the default room URL")
+        conversation_url = f"https://tavus.daily.co/{conversation_id}"
+
+    logger.info(f"Conversation created successfully: {conversation_id}")
+
+    return build_agent_data(room_id, conversation_id, conversation_url, replica_id, replica_test,
+                            persona_instructions, custom_script, conversation_style)
+
+
+def provision_ai_agent(custom_script, room_id, persona_instructions=TUTOR_PERSONA,
+                       conversation_style=TUTOR_STYLE, progress=None):
+    """Create a Tavus conversation that uses the script and return its agent data.
+
+    A matching conversation from the warm pool is used instead when there is one.
+
+    ``progress(stage, percent)`` is called as each step starts, as for jobs on
+    ``agent_jobs``. Raises AgentProvisionError if the agent cannot be created.
+    """
+    # Shared agent whose pooled session keeps connections to Tavus alive between calls
+    tavus_agent = get_tavus_agent()
+    steps = _provision_steps(tavus_agent, custom_script, room_id, persona_instructions, conversation_style,
+                             progress)
+    try:
+        method, args, kwargs = next(steps)
+        while True:
+            method, args, kwargs = steps.send(getattr(tavus_agent, method)(*args, **kwargs))
+    except StopIteration as done:
+        return done.value
+
+
+async def provision_ai_agent_async(custom_script, room_id, persona_instructions=TUTOR_PERSONA,
+                                   conversation_style=TUTOR_STYLE, progress=None):
+    """Asyncio version of ``provision_ai_agent`` using the event loop's ``AsyncTavusAgent``.
+
+    Raises AgentProvisionError if the agent cannot be created.
+    """
+    tavus_agent = get_async_tavus_agent()
+    steps = _provision_steps(tavus_agent, custom_script, room_id, persona_instructions, conversation_style,
+                             progress)
+    try:
+        method, args, kwargs = next(steps)
+        while True:
+            method, args, kwargs = steps.send(await getattr(tavus_agent, method)(*args, **kwargs))
+    except StopIteration as done:
+        return done.value
+
+
 @ai_agent_bp.route('/create', methods=['POST'])
 def create_ai_agent():
     """Create an AI agent with custom script via HTTP API."""
@@ -19,83 +187,19 @@ def create_ai_agent():
         if not data:
             return jsonify({"error": "No data provided"}), 400
             
-        custom_script = data.get('custom_script', '')
+        custom_script = data.get('custom_script') or DEFAULT_TUTOR_SCRIPT
         room_id = data.get('room_id', 'default-room')
         
-        logger.info(f"Creating Tavus AI agent for room {room_id}")
-        
-        # AI Configuration
-        persona_instructions = "You are an AI tutor who has learned an educational script. Use the script as your knowledge base to help students understand the topic. Be helpful, patient, and engaging. If students ask about unrelated topics, kindly guide them back to the subject matter."
-        conversation_style = "polite, insightful, focused, and helpful"
-        
-        logger.info(f"Using custom_script: '{custom_script[:100]}...'")
-        
-        # Initialize Tavus agent
-        tavus_agent = TavusAgent(os.getenv('TAVUS_API_KEY', ''))
-        
-        if not tavus_agent.api_key:
-            logger.error("No Tavus API key found")
-            return jsonify({"error": "Tavus API key not configured"}), 500
-        
-        # Use your specific replica ID
-        replica_id = os.getenv('TAVUS_REPLICA_ID', 'r1a4e22fa0d9')
-        logger.info(f"Using replica: {replica_id}")
-        
-        # Test the replica first
-        replica_test = tavus_agent.test_replica(replica_id)
-        if not replica_test:
-            logger.error(f"Replica {replica_id} is not available")
-            return jsonify({"error": f"Replica {replica_id} is not ready"}), 400
-        
-        logger.info(f"Replica test successful: {replica_test.get('name', 'Unknown')}")
-        
-        # Clean up any active conversations first
-        logger.info("Cleaning up active conversations...")
-        ended_count = tavus_agent.cleanup_active_conversations()
-        if ended_count > 0:
-            logger.info(f"Ended {ended_count} active conversations")
-            time.sleep(2)  # Wait for cleanup
-        
-        # Create a conversation with the script
-        conversation_response = tavus_agent.create_conversation(
-            replica_id=replica_id,
-            persona_instructions=persona_instructions,
-            custom_script=custom_script,
-            conversation_style=conversation_style
-        )
-        
-        if not conversation_response:
-            logger.error("Failed to create Tavus conversation")
-            return jsonify({"error": "Failed to create AI conversation"}), 500
-        
-        # Get conversation details
-        conversation_id = conversation_response.get('conversation_id')
-        conversation_url = tavus_agent.get_conversation_url(conversation_id)
-        
-        if not conversation_url:
-            return jsonify({"error": "Failed to get conversation URL"}), 500
-        
-        logger.info(f"Conversation created successfully: {conversation_id}")
-        
         # Return agent data
-        agent_data = {
-            'agent_id': f'tavus_agent_{room_id}',
-            'conversation_id': conversation_id,
-            'conversation_url': conversation_url,
-            'replica_id': replica_id,
-            'agent_name': replica_test.get('name', 'AI Assistant'),
-            'status': 'active',
-            'type': 'tavus_conversation',
-            'persona_instructions': persona_instructions,
-            'custom_script': custom_script,
-            'conversation_style': conversation_style
-        }
+        agent_data = provision_ai_agent(custom_script, room_id)
         
         return jsonify({
             "success": True,
             "agent_data": agent_data
         }), 200
         
+    except AgentProvisionError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         logger.error(f"Error creating AI agent: {e}")
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,98 @@
+"""ASGI route for AI agent creation, served without a thread per request."""
+
+import json
+import logging
+from routes.ai_agent import DEFAULT_TUTOR_SCRIPT, AgentProvisionError, provision_ai_agent_async
+from services.tavus_async import get_async_tavus_agent
+
+logger = logging.getLogger(__name__)
+
+AGENT_CREATE_PATH = '/api/ai-agent/create'
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, status, payload, origin=None):
+    body = json.dumps(payload).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if origin:
+        # Same policy as the Flask app's CORS setup: any origin, with credentials
+        headers += [(b'access-control-allow-origin', origin), (b'access-control-allow-credentials', b'true'),
+                    (b'vary', b'Origin')]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def create_ai_agent(scope, receive, send):
+    """Async version of the Flask ``/api/ai-agent/create`` route."""
+    origin = dict(scope['headers']).get(b'origin')
+    if scope['method'] == 'OPTIONS':
+        request_headers = dict(scope['headers']).get(b'access-control-request-headers', b'Content-Type')
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'access-control-allow-origin', origin or b'*'),
+            (b'access-control-allow-credentials', b'true'),
+            (b'access-control-allow-methods', b'POST, OPTIONS'),
+            (b'access-control-allow-headers', request_headers),
+            (b'content-length', b'0'),
+        ]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if scope['method'] != 'POST':
+        return await _send_json(send, 405, {'error': 'Method not allowed'}, origin)
+
+    try:
+        try:
+            data = json.loads(await _read_body(receive) or b'null')
+        except ValueError:
+            data = None
+
+        if not data:
+            return await _send_json(send, 400, {"error": "No data provided"}, origin)
+
+        custom_script = data.get('custom_script') or DEFAULT_TUTOR_SCRIPT
+        room_id = data.get('room_id', 'default-room')
+
+        agent_data = await provision_ai_agent_async(custom_script, room_id)
+
+        await _send_json(send, 200, {"success": True, "agent_data": agent_data}, origin)
+
+    except AgentProvisionError as e:
+        await _send_json(send, e.status_code, {"error": str(e)}, origin)
+    except Exception as e:
+        logger.error(f"Error creating AI agent: {e}")
+        await _send_json(send, 500, {"error": str(e)}, origin)
+
+
+class AgentASGIApp:
+    """Serve agent creation natively and hand every other request to ``fallback``."""
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] == AGENT_CREATE_PATH:
+            return await create_ai_agent(scope, receive, send)
+        if self.fallback is not None and scope['type'] == 'http':
+            return await self.fallback(scope, receive, send)
+        if scope['type'] == 'http':
+            return await _send_json(send, 404, {'error': 'Not found'})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Close the pooled keep-alive connections to Tavus
+                await get_async_tavus_agent().aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -1,10 +1,12 @@
 """Animation routes for the application."""
 
 import os
-import uuid
 import subprocess
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
+from services.manim_pool import get_manim_pool
+from services.animation_library import ANIMATION_SCENES, QUALITY_DIRS, get_animation, library_stats
+from services.video_delivery import resolve_media_path, send_video
 
 # Create a blueprint for animation routes
 animation_bp = Blueprint('animation', __name__, url_prefix='/api/animation')
@@ -40,139 +42,53 @@ def render_animation():
         return jsonify({'error': 'Invalid JSON data'}), 400
     animation_type = data['animation_type']
     
-    # Map animation type to scene class
-    animation_map = {
-        'circle': 'CreateCircle',
-        'square_to_circle': 'SquareToCircle',
-        'text': 'WriteText',
-        'math': 'MathExample',
-        'custom_text': 'CustomTextAnimation',
-        'custom_math': 'CustomMathAnimation'
-    }
-    
-    if animation_type not in animation_map:
+    if animation_type not in ANIMATION_SCENES:
         return jsonify({'error': 'Invalid animation type'}), 400
     
-    scene_class = animation_map[animation_type]
+    quality = data.get('quality', 'l')  # Low quality by default for faster rendering
+    if quality not in QUALITY_DIRS:
+        return jsonify({'error': f"Invalid quality, expected one of {', '.join(QUALITY_DIRS)}"}), 400
     
     # Get custom text or formula if provided
     custom_text = data.get('custom_text', '')
     custom_formula = data.get('custom_formula', '')
     
-    print(f"Animation type: {animation_type}, Scene: {scene_class}")
+    print(f"Animation type: {animation_type}, Scene: {ANIMATION_SCENES[animation_type]}, Quality: {quality}")
     print(f"Custom text: {custom_text}")
     print(f"Custom formula: {custom_formula}")
     
-    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static', 'animations')
-    os.makedirs(output_dir, exist_ok=True)
-    
-    unique_id = str(uuid.uuid4())
-    
     try:
-        # Create a unique output filename
-        unique_filename = f"{animation_type}_{unique_id}.mp4"
-        
-        # Run manim command to generate animation
-        manim_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'manim_examples.py')
-        
-        print(f"Running manim command for {scene_class}")
-        print(f"Manim file path: {manim_file_path}")
-        print(f"Output directory: {output_dir}")
-        
-        # Prepare environment variables for custom content
-        env = os.environ.copy()
-        if custom_text:
-            env['MANIM_CUSTOM_TEXT'] = custom_text
-        if custom_formula:
-            env['MANIM_CUSTOM_FORMULA'] = custom_formula
-        
-        # Use manim community version syntax
-        result = subprocess.run([
-            'manim', 
-            '-ql',  # Low quality for faster rendering
-            '--output_file', unique_filename,  # Specify output filename
-            '--media_dir', output_dir,  # Specify output directory
-            manim_file_path,
-            scene_class
-        ], check=True, capture_output=True, text=True, timeout=60, env=env)
-        
-        print(f"Manim command completed successfully")
-        print(f"Stdout: {result.stdout}")
+        # Serve from the pre-rendered library, rendering and storing the animation on a miss
+        filename, cached = get_animation(animation_type, quality, custom_text, custom_formula)
+        print(f"Animation {'served from library' if cached else 'rendered'}: {filename}")
         
-        # The file should be created in output_dir/videos/manim_examples/480p15/
-        video_subdir = os.path.join(output_dir, 'videos', 'manim_examples', '480p15')
-        expected_file_path = os.path.join(video_subdir, unique_filename)
-        
-        print(f"Looking for file at: {expected_file_path}")
+        # Use animation_bp.url_prefix to ensure consistency with blueprint registration
+        url_prefix = animation_bp.url_prefix or '/api/animation'
         
-        if os.path.exists(expected_file_path):
-            # Move file to the main animations directory
-            final_file_path = os.path.join(output_dir, unique_filename)
-            os.makedirs(os.path.dirname(final_file_path), exist_ok=True)
-            
-            import shutil
-            shutil.move(expected_file_path, final_file_path)
-            print(f"Moved file to: {final_file_path}")
-            
-            # Use animation_bp.url_prefix to ensure consistency with blueprint registration
-            url_prefix = animation_bp.url_prefix or '/api/animation'
-            
-            # Remove any trailing slash from url_prefix
-            if url_prefix.endswith('/'):
-                url_prefix = url_prefix[:-1]
-                
-            # Construct the animation URL without duplicating the /api part
-            if url_prefix.startswith('/api'):
-                animation_url = f"{url_prefix}/file/{unique_filename}"
-            else:
-                animation_url = f"/api{url_prefix}/file/{unique_filename}"
-            
-            print(f"Animation URL: {animation_url}")
+        # Remove any trailing slash from url_prefix
+        if url_prefix.endswith('/'):
+            url_prefix = url_prefix[:-1]
             
-            return jsonify({
-                'animation_url': animation_url,
-                'message': 'Animation rendered successfully',
-                'filename': unique_filename
-            }), 200
+        # Construct the animation URL without duplicating the /api part
+        if url_prefix.startswith('/api'):
+            animation_url = f"{url_prefix}/file/{filename}"
         else:
-            print(f"Expected file not found at: {expected_file_path}")
-            # List what files were actually created
-            if os.path.exists(video_subdir):
-                files_created = os.listdir(video_subdir)
-                print(f"Files in video directory: {files_created}")
-                
-                # Try to find any MP4 file
-                for file in files_created:
-                    if file.endswith('.mp4'):
-                        source_path = os.path.join(video_subdir, file)
-                        final_file_path = os.path.join(output_dir, f"{animation_type}_{unique_id}.mp4")
-                        
-                        import shutil
-                        shutil.move(source_path, final_file_path)
-                        print(f"Found and moved file: {file} to {final_file_path}")
-                        
-                        # Use animation_bp.url_prefix to ensure consistency
-                        url_prefix = animation_bp.url_prefix or '/api/animation'
-                        if url_prefix.endswith('/'):
-                            url_prefix = url_prefix[:-1]
-                            
-                        if url_prefix.startswith('/api'):
-                            animation_url = f"{url_prefix}/file/{animation_type}_{unique_id}.mp4"
-                        else:
-                            animation_url = f"/api{url_prefix}/file/{animation_type}_{unique_id}.mp4"
-                        
-                        return jsonify({
-                            'animation_url': animation_url,
-                            'message': 'Animation rendered successfully',
-                            'filename': f"{animation_type}_{unique_id}.mp4"
-                        }), 200
-            
-            return jsonify({
-                'error': 'Failed to locate generated animation file',
-                'expected_path': expected_file_path,
-                'logs': result.stdout
-            }), 500
+            animation_url = f"/api{url_prefix}/file/{filename}"
+        
+        print(f"Animation URL: {animation_url}")
+        
+        return jsonify({
+            'animation_url': animation_url,
+            'message': 'Animation rendered successfully',
+            'filename': filename,
+            'cached': cached
+        }), 200
         
+    except FileNotFoundError as e:
+        return jsonify({
+            'error': 'Failed to locate generated animation file',
+            'message': str(e)
+        }), 500
     except subprocess.CalledProcessError as e:
         return jsonify({
             'error': 'Animation rendering failed',
@@ -190,7 +106,9 @@ def render_animation():
 def serve_animation(filename):
     """Serve a generated animation file."""
     animations_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static', 'animations')
-    file_path = os.path.join(animations_dir, filename)
+    file_path = resolve_media_path(animations_dir, filename)
+    if file_path is None:
+        return jsonify({'error': f'File not found: {filename}'}), 404
     
     print(f"Attempting to serve file: {file_path}")
     if not os.path.exists(file_path):
@@ -216,7 +134,21 @@ def serve_animation(filename):
         else:
             return jsonify({'error': f'File not found: {filename}'}), 404
     
-    return send_file(file_path)
+    # Library file names carry a hash of the scene and its inputs, so their content never changes
+    return send_video(file_path, immutable=filename.startswith('library/'), mimetype=None)
+
+@animation_bp.route('/workers', methods=['GET'])
+def render_worker_stats():
+    """Report queue depth and busy state of the warm manim worker pool."""
+    pool = get_manim_pool()
+    if not pool:
+        return jsonify({'enabled': False, 'message': 'Set MANIM_WORKER_POOL to enable the worker pool'}), 200
+    return jsonify({'enabled': True, **pool.stats()}), 200
+
+@animation_bp.route('/library', methods=['GET'])
+def animation_library_stats():
+    """Report hit/miss counts and size of the pre-rendered animation library."""
+    return jsonify(library_stats()), 200
 
 @animation_bp.route('/debug', methods=['GET'])
 def debug_animation_route():
@@ -248,8 +180,8 @@ def debug_animation_route():
     
     # List installed packages
     try:
-        import pkg_resources
-        installed_packages = [f"{d.project_name}=={d.version}" for d in pkg_resources.working_set]
+        from importlib.metadata import distributions
+        installed_packages = sorted(f"{d.metadata['Name']}=={d.version}" for d in distributions())
     except:
         installed_packages = ["Unable to list installed packages"]
     
@@ -286,17 +218,7 @@ def render_animation_debug():
         animation_type = data['animation_type']
         print(f"Animation type: {animation_type}")
         
-        # Map animation type to scene class
-        animation_map = {
-            'circle': 'CreateCircle',
-            'square_to_circle': 'SquareToCircle',
-            'text': 'WriteText',
-            'math': 'MathExample',
-            'custom_text': 'CustomTextAnimation',
-            'custom_math': 'CustomMathAnimation'
-        }
-        
-        if animation_type not in animation_map:
+        if animation_type not in ANIMATION_SCENES:
             print(f"Invalid animation type: {animation_type}")
             return jsonify({'error': 'Invalid animation type'}), 400
         
@@ -1,16 +1,27 @@
 """Authentication routes for the application."""
 
 from flask import Blueprint, request, jsonify
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from models.account import User, db
+from services.password_hashing import HashingBusyError, password_hasher
+from services.token_blocklist import token_blocklist
+from services.user_cache import current_user_profile, profile_claims, user_cache_metrics
 
 # Create a blueprint for authentication routes
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
-bcrypt = Bcrypt()
 
-# JWT token blacklist (in-memory for simplicity - use Redis in production)
-token_blocklist = set()
+
+def _signup_conflict(username, email):
+    """Return the error for an existing username or email, found with one query, or None."""
+    existing = (User.query.with_entities(User.username, User.email)
+                .filter(or_(User.username == username, User.email == email))
+                .first())
+    if existing is None:
+        return None
+    return 'Username already exists' if existing.username == username else 'Email already exists'
+
 
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
@@ -21,24 +32,29 @@ def signup():
     if not data or not data.get('username') or not data.get('email') or not data.get('password'):
         return jsonify({'error': 'Missing required fields'}), 400
     
-    # Check if user already exists
-    if User.query.filter_by(username=data['username']).first():
-        return jsonify({'error': 'Username already exists'}), 409
-    
-    if User.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'Email already exists'}), 409
+    # Check if user already exists before paying for the password hash
+    conflict = _signup_conflict(data['username'], data['email'])
+    if conflict:
+        return jsonify({'error': conflict}), 409
     
     # Create new user
-    hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+    try:
+        hashed_password = password_hasher.hash(data['password'])
+    except HashingBusyError:
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503
     new_user = User(
         username=data['username'],
         email=data['email'],
         password=hashed_password
     )
     
-    # Save user to database
+    # Save user to database; the unique constraints catch a concurrent signup for the same name
     db.session.add(new_user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': _signup_conflict(data['username'], data['email']) or 'User already exists'}), 409
     
     return jsonify({
         'message': 'User created successfully',
@@ -72,13 +88,28 @@ def login():
             print(f"User not found: {username}")
             return jsonify({'error': 'Invalid username or password'}), 401
             
-        if not bcrypt.check_password_hash(user.password, data['password']):
+        try:
+            password_ok = password_hasher.verify(user.password, data['password'])
+        except HashingBusyError:
+            print(f"Password check queue full for user: {username}")
+            return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+        
+        if not password_ok:
             print(f"Invalid password for user: {username}")
             return jsonify({'error': 'Invalid username or password'}), 401
         
+        # Upgrade hashes made at a lower cost now that the password is known
+        if password_hasher.needs_rehash(user.password):
+            try:
+                user.password = password_hasher.rehash(data['password'])
+                db.session.commit()
+                print(f"Rehashed password for user: {username}")
+            except HashingBusyError:
+                pass
+        
         # Create access token
         print(f"Creating token for user ID: {user.id}")
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=profile_claims(user))
         
         print(f"Login successful for user: {username}")
         return jsonify({
@@ -95,8 +126,9 @@ def login():
 @jwt_required()
 def logout():
     """Log out a user by blacklisting their JWT token."""
-    jti = get_jwt()['jti']
-    token_blocklist.add(jti)
+    claims = get_jwt()
+    # Kept until the token would have expired anyway
+    token_blocklist.revoke(claims['jti'], claims.get('exp'))
     
     return jsonify({'message': 'Logout successful'}), 200
 
@@ -104,21 +136,37 @@ def logout():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    """Get the current authenticated user's information."""
+    """Get the current authenticated user's information.
+
+    ``?fields=id,username`` returns only those fields; a request for the
+    token's claim fields alone can be answered without a lookup.
+    """
     try:
         # Get the JWT identity
         user_id = get_jwt_identity()
         print(f"JWT identity (user_id): {user_id}")
         
-        # Get the user from the database
-        user = User.query.get(user_id)
+        # From the token's profile claim, the cache, or the database
+        fields = request.args.get('fields')
+        user = current_user_profile(user_id, get_jwt(),
+                                    fields=fields.split(',') if fields else None)
         
         if not user:
             print(f"User with ID {user_id} not found in database")
             return jsonify({'error': 'User not found'}), 404
         
-        print(f"User found: {user.username}")
-        return jsonify({'user': user.to_dict()}), 200
+        print(f"User found: {user.get('username', user_id)}")
+        return jsonify({'user': user}), 200
     except Exception as e:
         print(f"Error in get_current_user: {str(e)}")
         return jsonify({'error': 'An error occurred while retrieving user information'}), 500
+
+
+@auth_bp.route('/metrics', methods=['GET'])
+def get_auth_metrics():
+    """Report user profile cache hit rates, the token blocklist and the password hasher."""
+    return jsonify({
+        'user_cache': user_cache_metrics(),
+        'token_blocklist': token_blocklist.stats(),
+        'password_hasher': password_hasher.stats(),
+    }), 200
@@ -1,4 +1,3 @@
-import google.generativeai as genai
 import os
 import re
 import subprocess
@@ -6,30 +5,56 @@ import time
 import hashlib
 import glob
 import json
-from flask import Blueprint, request, jsonify, send_file
-from anthropic import Anthropic
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from dotenv import load_dotenv
+from services.render_jobs import render_jobs, JobFailed, QueueFullError
+from services.render_cache import render_cache
+from services.video_delivery import resolve_media_path, send_video
+from services.manim_render import render_scene, count_animations
+from services.llm_cache import llm_cache, cached_call
+from services.llm_gateway import LLMBusyError, LLMTimeoutError, llm_gateway
+from services.llm_providers import CLAUDE_MODEL, GEMINI_MODEL, LLMProviderUnavailable, llm_providers
+from services.tavus_pool import get_conversation_pool
+from routes.ai_agent import provision_ai_agent
 
 load_dotenv()
 
 # Create blueprint
 gemini_bp = Blueprint('gemini', __name__, url_prefix='/api/gemini')
 
-# Configure Gemini API
-GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable is required")
+# Presentation videos play back this many times faster than the scene's own timing.
+# 'render' scales animation and wait durations while rendering; 'ffmpeg' re-encodes afterwards.
+PRESENTATION_SPEED = 2.0
+SPEEDUP_MODES = ('render', 'ffmpeg')
+DEFAULT_SPEEDUP_MODE = os.environ.get('PRESENTATION_SPEEDUP_MODE', 'render')
 
-# Configure Anthropic API for Claude
-CLAUDE_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
-if not CLAUDE_API_KEY:
-    raise ValueError("ANTHROPIC_API_KEY environment variable is required")
 
-genai.configure(api_key=GEMINI_API_KEY)
-anthropic_client = Anthropic(api_key=CLAUDE_API_KEY)
+def gemini_generate(instructions, user_input, use_cache=True, route='generate'):
+    """Generate text with Gemini through the LLM gateway, answering repeat prompts from the LLM cache."""
+    full_prompt = f"{instructions}\n\n{user_input}" if instructions else user_input
+    key = llm_cache.make_key(GEMINI_MODEL, None, instructions, user_input)
+    return cached_call(key, GEMINI_MODEL, use_cache,
+                       lambda: llm_gateway.generate('gemini', full_prompt, route=route, key=key))
+
+
+def claude_generate(system, instructions, user_input, max_tokens=4000, use_cache=True, route='generate-manim'):
+    """Generate text with Claude through the LLM gateway, answering repeat prompts from the LLM cache."""
+    full_prompt = f"{instructions}\n\n{user_input}" if instructions else user_input
+    key = llm_cache.make_key(f"{CLAUDE_MODEL}:{max_tokens}", system, instructions, user_input)
+    return cached_call(key, CLAUDE_MODEL, use_cache,
+                       lambda: llm_gateway.generate('anthropic', full_prompt, system=system,
+                                                    max_tokens=max_tokens, route=route, key=key))
+
+
+def llm_error_status(error):
+    """Return the HTTP status for an error raised while generating: 503/504 for provider trouble, else 500."""
+    if isinstance(error, (LLMBusyError, LLMProviderUnavailable)):
+        return 503
+    if isinstance(error, LLMTimeoutError):
+        return 504
+    return 500
 
-# Initialize the model
-model = genai.GenerativeModel('gemini-1.5-flash')
 
 def extract_code_from_claude_response(response_text):
     """Extract Python code from Claude's response, which might contain markdown code blocks."""
@@ -67,14 +92,14 @@ def serve_video(video_path):
     try:
         # Get the full path to the video file
         manim_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'manim_gens')
-        full_video_path = os.path.join(manim_dir, video_path)
+        full_video_path = resolve_media_path(manim_dir, video_path)
 
         # Check if file exists
-        if not os.path.exists(full_video_path):
+        if not full_video_path or not os.path.isfile(full_video_path):
             return jsonify({"error": "Video file not found"}), 404
 
-        # Serve the video file
-        return send_file(full_video_path, mimetype='video/mp4')
+        # Each render writes to its own directory, so the file behind a URL never changes
+        return send_video(full_video_path, immutable=True)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -111,15 +136,12 @@ The result should feel like the voiceover from a 3Blue1Brown video: elegant, tho
         if not prompt:
             return jsonify({"error": "Prompt is required"}), 400
 
-        # Combine instructions and prompt
-        full_prompt = f"{instructions}\n\n{prompt}" if instructions else prompt
-
-        # Generate response
-        response = model.generate_content(full_prompt)
+        # Generate response from the combined instructions and prompt
+        response_text = gemini_generate(instructions, prompt, use_cache=data.get('cache', True))
 
         return jsonify({
             "success": True,
-            "response": response.text,
+            "response": response_text,
             "prompt": prompt,
             "instructions": instructions
         }), 200
@@ -128,7 +150,7 @@ The result should feel like the voiceover from a 3Blue1Brown video: elegant, tho
         return jsonify({
             "success": False,
             "error": str(e)
-        }), 500
+        }), llm_error_status(e)
 
 
 @gemini_bp.route('/generate-manim', methods=['POST'])
@@ -181,22 +203,14 @@ curve = plane.plot(
 IMPORTANT: Provide ONLY the complete Python code with no explanations, comments outside the code, or markdown formatting. Just the raw Python code that can be directly saved to a file and executed.
 """
 
-        # Combine instructions and script for Claude
-        full_prompt = f"{instructions}\n\nScript:\n{script}"
-
         # Generate Manim code using Claude 4 Sonnet
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            system="You are an expert in creating Manim animations from scripts. Provide only clean, executable Python code with no surrounding explanations or markdown.",
-            messages=[
-                {"role": "user", "content": full_prompt}
-            ]
+        response_text = claude_generate(
+            "You are an expert in creating Manim animations from scripts. Provide only clean, executable Python code with no surrounding explanations or markdown.",
+            instructions,
+            f"Script:\n{script}",
+            use_cache=data.get('cache', True)
         )
 
-        # Extract the text from Claude's response
-        response_text = response.content[0].text
-
         # Extract code from Claude's response
         manim_code = extract_code_from_claude_response(response_text)
 
@@ -239,46 +253,20 @@ IMPORTANT: Provide ONLY the complete Python code with no explanations, comments
         return jsonify({
             "success": False,
             "error": str(e)
-        }), 500
+        }), llm_error_status(e)
 
 
-@gemini_bp.route('/generate-presentation', methods=['POST'])
-def generate_presentation():
-    """Generate a complete presentation: script, Manim video, and Tavus AI data."""
-    try:
-        print("=== generate_presentation endpoint called ===")
-        print(f"Request method: {request.method}")
-        print(f"Request headers: {dict(request.headers)}")
-        print(f"Request content type: {request.content_type}")
-
-        data = request.get_json()
-        print(f"Request data: {data}")
+class PresentationError(JobFailed):
+    """A presentation pipeline failure with the HTTP status it maps to."""
 
-        if not data:
-            print("ERROR: No data provided")
-            return jsonify({"error": "No data provided"}), 400
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message, details)
+        self.status_code = status_code
 
-        prompt = data.get('prompt')
-        print(f"Extracted prompt: '{prompt}'")
-        if not prompt:
-            print("ERROR: Prompt is required")
-            return jsonify({"error": "Prompt is required"}), 400
 
-        print(f"Starting processing for prompt: '{prompt}'")
-    except Exception as e:
-        print(f"EARLY ERROR in generate_presentation: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            "success": False,
-            "error": f"Early processing error: {str(e)}"
-        }), 500
-
-    try:
-
-        # Step 1: Generate educational script using Gemini
-        script_instructions = """
+def generate_presentation_script(prompt, use_cache=True):
+    """Step 1: Generate an educational narration script for a topic using Gemini."""
+    script_instructions = """
 You will be given a topic.
 
 Your task is to write a high-quality educational narration script in the style of a 3Blue1Brown video, based on that topic.
@@ -295,12 +283,12 @@ Instructions:
 The result should feel like the voiceover from a 3Blue1Brown video: elegant, thoughtful, and tightly focused on the concept.
 """
 
-        script_prompt = f"{script_instructions}\n\n{prompt}"
-        script_response = model.generate_content(script_prompt)
-        generated_script = script_response.text
+    return gemini_generate(script_instructions, prompt, use_cache=use_cache, route='presentation-script')
+
 
-        # Step 2: Generate Manim code using Claude
-        manim_instructions = """
+def generate_presentation_manim(generated_script, use_cache=True):
+    """Step 2: Generate Manim code for a narration script using Claude."""
+    manim_instructions = """
 IMPORTANT: Do NOT use MathTex or any LaTeX-based objects; use only Text() for all on-screen content to avoid LaTeX compilation issues.
 You'll receive a complete script. Your job is to generate fully functional Manim (Python) code that mirrors every line of that script—verbatim—using on-screen text and visuals. Follow these rules exactly:
 
@@ -338,43 +326,72 @@ curve = plane.plot(
 IMPORTANT: Provide ONLY the complete Python code with no explanations, comments outside the code, or markdown formatting. Just the raw Python code that can be directly saved to a file and executed.
 """
 
-        manim_prompt = f"{manim_instructions}\n\nScript:\n{generated_script}"
+    # Generate Manim code using Claude
+    response_text = claude_generate(
+        "You are an expert in creating Manim animations from scripts. Provide only clean, executable Python code with no surrounding explanations or markdown.",
+        manim_instructions,
+        f"Script:\n{generated_script}",
+        use_cache=use_cache,
+        route='presentation-manim'
+    )
 
-        # Generate Manim code using Claude
-        claude_response = anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            system="You are an expert in creating Manim animations from scripts. Provide only clean, executable Python code with no surrounding explanations or markdown.",
-            messages=[
-                {"role": "user", "content": manim_prompt}
-            ]
-        )
+    # Extract code from Claude's response
+    return extract_code_from_claude_response(response_text)
 
-        # Extract the text from Claude's response
-        response_text = claude_response.content[0].text
 
-        # Extract code from Claude's response
-        manim_code = extract_code_from_claude_response(response_text)
+# Appended to generated scenes in 'render' speed-up mode. Only the generated
+# class is patched, so warm manim workers do not carry the change into later jobs.
+SPEEDUP_SCENE_CODE = """
 
-        # Step 3: Create and save the Manim file
-        import hashlib
-        import time
-        import subprocess
-        import glob
+def _speed_up_scene(scene_cls, speed):
+    \"\"\"Divide every animation duration of scene_cls by speed.
 
-        # Create manim_gens directory if it doesn't exist
-        manim_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'manim_gens')
-        if not os.path.exists(manim_dir):
-            os.makedirs(manim_dir)
+    Scene.wait plays a Wait animation, so waits are scaled here as well.
+    \"\"\"
+    play = scene_cls.play
 
-        # Create a unique filename
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        script_hash = hashlib.md5(generated_script.encode()).hexdigest()[:8]
-        filename = f"presentation_{timestamp}_{script_hash}.py"
-        filepath = os.path.join(manim_dir, filename)
+    def fast_play(self, *args, subcaption=None, subcaption_duration=None, subcaption_offset=0, **kwargs):
+        animations = self.compile_animations(*args, **kwargs)
+        for animation in animations:
+            animation.run_time = animation.run_time / speed
+        if subcaption_duration is not None:
+            subcaption_duration = subcaption_duration / speed
+        return play(self, *animations, subcaption=subcaption,
+                    subcaption_duration=subcaption_duration,
+                    subcaption_offset=subcaption_offset / speed)
 
-        # Write code to file with LaTeX configuration
-        manim_code_with_config = f"""# Manim configuration for LaTeX
+    scene_cls.play = fast_play
+
+
+_speed_up_scene({scene_class}, {speed})
+"""
+
+
+def render_presentation(manim_code, generated_script, progress=None, speedup_mode=None):
+    """Steps 3-4: Save the Manim file, render it and speed the video up.
+
+    ``speedup_mode`` is 'render' to render the scene already sped up in a
+    single encode, or 'ffmpeg' to re-encode the rendered video with setpts;
+    it defaults to ``PRESENTATION_SPEEDUP_MODE``. Raises PresentationError if
+    the scene cannot be rendered.
+    """
+    speedup_mode = speedup_mode or DEFAULT_SPEEDUP_MODE
+    if speedup_mode not in SPEEDUP_MODES:
+        raise PresentationError(f"Invalid speedup mode '{speedup_mode}', expected one of {', '.join(SPEEDUP_MODES)}")
+
+    # Create manim_gens directory if it doesn't exist
+    manim_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'manim_gens')
+    if not os.path.exists(manim_dir):
+        os.makedirs(manim_dir)
+
+    # Create a unique filename
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    script_hash = hashlib.md5(generated_script.encode()).hexdigest()[:8]
+    filename = f"presentation_{timestamp}_{script_hash}.py"
+    filepath = os.path.join(manim_dir, filename)
+
+    # Write code to file with LaTeX configuration
+    manim_code_with_config = f"""# Manim configuration for LaTeX
 import os
 import sys
 
@@ -396,58 +413,86 @@ config.tex_template.add_to_preamble(r"\\usepackage{{physics}}")
 {manim_code}
 """
 
-        with open(filepath, 'w') as f:
-            f.write(manim_code_with_config)
+    # Get the scene class name from the code
+    scene_class = None
+    for line in manim_code.split('\n'):
+        if line.startswith('class ') and '(Scene)' in line:
+            scene_class = line.split('class ')[1].split('(')[0].strip()
+            break
+
+    if not scene_class:
+        raise PresentationError("Could not find scene class in generated Manim code")
+
+    if speedup_mode == 'render':
+        manim_code_with_config += SPEEDUP_SCENE_CODE.format(scene_class=scene_class, speed=PRESENTATION_SPEED)
+
+    # Reuse an earlier render of identical source and flags
+    speed_factor = PRESENTATION_SPEED
+    manim_flags = "-pql"
+    cache_key = render_cache.key_for(manim_code_with_config,
+                                     f"{manim_flags} {scene_class} speed={speed_factor} mode={speedup_mode}")
+    cached = render_cache.lookup(cache_key)
+    if cached:
+        print(f"Render cache hit for {cached['file_path']}")
+        video_relative_path = f"media/{cached['video_path']}"
+        return {
+            "video_path": video_relative_path,
+            "video_url": f"/api/gemini/video/{video_relative_path}",
+            "file_path": cached['file_path'],
+            "scene_class": scene_class,
+            "cached": True,
+            "speedup_mode": speedup_mode,
+            "timings": {},
+        }
 
-        # Get the scene class name from the code
-        scene_class = None
-        for line in manim_code.split('\n'):
-            if line.startswith('class ') and '(Scene)' in line:
-                scene_class = line.split('class ')[1].split('(')[0].strip()
-                break
+    with open(filepath, 'w') as f:
+        f.write(manim_code_with_config)
 
-        if not scene_class:
-            return jsonify({
-                "success": False,
-                "error": "Could not find scene class in generated Manim code"
-            }), 400
+    # Step 4: Run Manim to generate the video
+    timings = {}
+    try:
+        if progress:
+            progress('rendering', 40, render_percent=0)
+
+        def report_frames(percent):
+            if progress:
+                progress('rendering', 40 + percent * 0.5, render_percent=round(percent, 1))
+
+        # Run manim command to generate video
+        render_started = time.perf_counter()
+        result = render_scene(
+            filepath,
+            scene_class,
+            quality="l",
+            preview=True,
+            cwd=manim_dir,
+            timeout=120,  # 2 minute timeout
+            total_animations=count_animations(manim_code),
+            on_progress=report_frames
+        )
+        timings['render'] = round(time.perf_counter() - render_started, 3)
 
-        # Step 4: Run Manim to generate the video
-        try:
-            # Run manim command to generate video
-            manim_command = f"manim -pql {filepath} {scene_class}"
-            result = subprocess.run(
-                manim_command,
-                shell=True,
-                cwd=manim_dir,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minute timeout
-            )
-
-            if result.returncode != 0:
-                return jsonify({
-                    "success": False,
-                    "error": f"Manim execution failed: {result.stderr}",
-                    "stdout": result.stdout
-                }), 400
+        if result.returncode != 0:
+            raise PresentationError(f"Manim execution failed: {result.stderr}",
+                                    details={"stdout": result.stdout})
 
-            # Find the generated video file
-            video_pattern = os.path.join(manim_dir, "media", "videos", os.path.splitext(filename)[0], "480p15", "*.mp4")
-            video_files = glob.glob(video_pattern)
+        # Find the generated video file
+        video_pattern = os.path.join(manim_dir, "media", "videos", os.path.splitext(filename)[0], "480p15", "*.mp4")
+        video_files = glob.glob(video_pattern)
 
-            if not video_files:
-                return jsonify({
-                    "success": False,
-                    "error": "Video file not found after Manim execution"
-                }), 400
+        if not video_files:
+            raise PresentationError("Video file not found after Manim execution")
 
-            video_path = video_files[0]
-            # Get relative path for serving
-            video_filename = os.path.basename(video_path)
-            video_relative_path = f"media/videos/{os.path.splitext(filename)[0]}/480p15/{video_filename}"
+        if progress:
+            progress('encoding', 90)
+
+        video_path = video_files[0]
+        # Get relative path for serving
+        video_filename = os.path.basename(video_path)
+        video_relative_path = f"media/videos/{os.path.splitext(filename)[0]}/480p15/{video_filename}"
+        if speedup_mode == 'ffmpeg':
             # Speed up video playback by 2x
-            speed_factor = 2.0
+            speedup_started = time.perf_counter()
             pts_factor = 1 / speed_factor
             fast_basename = os.path.splitext(video_filename)[0] + "_fast.mp4"
             fast_path = os.path.join(os.path.dirname(video_path), fast_basename)
@@ -457,35 +502,150 @@ config.tex_template.add_to_preamble(r"\\usepackage{{physics}}")
                 "-an",
                 fast_path
             ], check=True)
+            timings['speedup'] = round(time.perf_counter() - speedup_started, 3)
             # Update to use sped-up video
             video_filename = fast_basename
             video_relative_path = f"media/videos/{os.path.splitext(filename)[0]}/480p15/{video_filename}"
+        else:
+            # The scene was rendered at the target speed, so there is nothing to re-encode
+            timings['speedup'] = 0.0
+        print(f"Presentation render timings ({speedup_mode} speed-up): {timings}")
+        if progress:
+            progress('encode_done', 95)
+
+        render_cache.store(cache_key, f"videos/{os.path.splitext(filename)[0]}", {
+            "video_path": video_relative_path[len("media/"):],
+            "source_video_path": os.path.relpath(video_path, os.path.join(manim_dir, "media")),
+            "file_path": filepath,
+            "scene_class": scene_class,
+        })
+
+        # Step 4b: Murf TTS integration temporarily disabled
+        # TODO: re-enable Murf TTS once API calls and syntax are verified
+    except PresentationError:
+        raise
+    except subprocess.TimeoutExpired:
+        raise PresentationError("Manim execution timed out")
+    except Exception as e:
+        raise PresentationError(f"Error running Manim: {str(e)}")
+
+    return {
+        "video_path": video_relative_path,
+        "video_url": f"/api/gemini/video/{video_relative_path}",
+        "file_path": filepath,
+        "scene_class": scene_class,
+        "cached": False,
+        "speedup_mode": speedup_mode,
+        "timings": timings,
+    }
+
+
+def build_presentation(prompt, progress=None, use_cache=True, speedup_mode=None):
+    """Run the full presentation pipeline for a prompt.
+
+    ``progress(stage, percent=None, **data)`` is called as each stage
+    completes. ``use_cache=False`` bypasses the LLM response cache and
+    ``speedup_mode`` is passed to ``render_presentation``. Returns the
+    presentation payload or raises PresentationError.
+    """
+    generated_script = generate_presentation_script(prompt, use_cache=use_cache)
+    if progress:
+        progress('script_generated', 25, script=generated_script)
+
+    # The tutor agent for this script is usually requested once the video is
+    # ready; let the warm pool create its conversation while we render
+    conversation_pool = get_conversation_pool()
+    if conversation_pool:
+        conversation_pool.prepare(generated_script)
+
+    manim_code = generate_presentation_manim(generated_script, use_cache=use_cache)
+    if progress:
+        progress('manim_code_generated', 40)
+
+    rendered = render_presentation(manim_code, generated_script, progress=progress, speedup_mode=speedup_mode)
+    if progress:
+        progress('video_ready', 100, video_url=rendered['video_url'])
+
+    # Step 5: Return everything needed for the presentation
+    return {
+        "success": True,
+        "script": generated_script,
+        "manim_code": manim_code,
+        "video_path": rendered['video_path'],
+        "video_url": rendered['video_url'],
+        "file_path": rendered['file_path'],
+        "scene_class": rendered['scene_class'],
+        "render_cached": rendered['cached'],
+        "speedup_mode": rendered['speedup_mode'],
+        "render_timings": rendered['timings'],
+        "prompt": prompt
+    }
 
-            # Step 4b: Murf TTS integration temporarily disabled
-            # TODO: re-enable Murf TTS once API calls and syntax are verified
-        except subprocess.TimeoutExpired:
-            return jsonify({
-                "success": False,
-                "error": "Manim execution timed out"
-            }), 400
-        except Exception as e:
+
+@gemini_bp.route('/generate-presentation', methods=['POST'])
+def generate_presentation():
+    """Generate a complete presentation: script, Manim video, and Tavus AI data.
+
+    Pass ``"async": true`` to queue the work instead; the response then
+    carries a job id to poll at ``/api/gemini/jobs/<job_id>``.
+    """
+    try:
+        print("=== generate_presentation endpoint called ===")
+        print(f"Request method: {request.method}")
+        print(f"Request headers: {dict(request.headers)}")
+        print(f"Request content type: {request.content_type}")
+
+        data = request.get_json()
+        print(f"Request data: {data}")
+
+        if not data:
+            print("ERROR: No data provided")
+            return jsonify({"error": "No data provided"}), 400
+
+        prompt = data.get('prompt')
+        print(f"Extracted prompt: '{prompt}'")
+        if not prompt:
+            print("ERROR: Prompt is required")
+            return jsonify({"error": "Prompt is required"}), 400
+
+        print(f"Starting processing for prompt: '{prompt}'")
+    except Exception as e:
+        print(f"EARLY ERROR in generate_presentation: {str(e)}")
+        print(f"Error type: {type(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "error": f"Early processing error: {str(e)}"
+        }), 500
+
+    if data.get('async'):
+        try:
+            job_id = render_jobs.submit(build_presentation, prompt, use_cache=data.get('cache', True),
+                                        speedup_mode=data.get('speedup_mode'))
+        except QueueFullError as e:
             return jsonify({
                 "success": False,
-                "error": f"Error running Manim: {str(e)}"
-            }), 400
+                "error": str(e)
+            }), 503
 
-        # Step 5: Return everything needed for the presentation
         return jsonify({
             "success": True,
-            "script": generated_script,
-            "manim_code": manim_code,
-            "video_path": video_relative_path,
-            "video_url": f"/api/gemini/video/{video_relative_path}",
-            "file_path": filepath,
-            "scene_class": scene_class,
-            "prompt": prompt
-        }), 200
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/gemini/jobs/{job_id}"
+        }), 202
+
+    try:
+        return jsonify(build_presentation(prompt, use_cache=data.get('cache', True),
+                                          speedup_mode=data.get('speedup_mode'))), 200
 
+    except PresentationError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            **e.details
+        }), e.status_code
     except Exception as e:
         print(f"Error in generate_presentation: {str(e)}")
         print(f"Error type: {type(e)}")
@@ -494,25 +654,132 @@ config.tex_template.add_to_preamble(r"\\usepackage{{physics}}")
         return jsonify({
             "success": False,
             "error": str(e)
-        }), 500
+        }), llm_error_status(e)
+
+
+@gemini_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_presentation_job(job_id):
+    """Get the status, progress and result of a queued presentation job."""
+    job = render_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
 
+    response = {"success": True, "job": job}
+    if job['status'] == 'succeeded':
+        response["video_url"] = job['result'].get('video_url')
+    return jsonify(response), 200
 
-@gemini_bp.route('/generate-quiz', methods=['POST'])
-def generate_quiz():
-    """Generate multiple choice quiz questions based on educational script."""
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
 
-        script = data.get('script')
-        num_questions = data.get('num_questions', 5)  # Default to 5 questions
+@gemini_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_presentation_job(job_id):
+    """Stream progress of a presentation job as server-sent events.
 
-        if not script:
-            return jsonify({"error": "Script is required"}), 400
+    Each event carries the stage (``script_generated``, ``manim_code_generated``,
+    ``rendering``, ``encode_done``, ``video_ready``, ``done`` or ``failed``) and
+    overall progress. The stream ends once the job has finished.
+    """
+    if not render_jobs.get(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('after', '0'))
+    after = int(last_event_id) if str(last_event_id).isdigit() else 0
+
+    def events():
+        nonlocal after
+        finished = False
+        while not finished:
+            batch, finished = render_jobs.wait_for_events(job_id, after)
+            if not batch and not finished:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            for event in batch:
+                after = event['id']
+                yield f"id: {event['id']}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@gemini_bp.route('/jobs', methods=['GET'])
+def get_presentation_queue_stats():
+    """Get the depth and worker count of the presentation job queue."""
+    return jsonify({"success": True, "queue": render_jobs.stats()}), 200
+
+
+@gemini_bp.route('/render-cache', methods=['GET'])
+def get_render_cache_stats():
+    """Get hit/miss counts and size of the rendered video cache."""
+    return jsonify({"success": True, "render_cache": render_cache.stats()}), 200
+
+
+@gemini_bp.route('/llm-cache', methods=['GET'])
+def get_llm_cache_stats():
+    """Get hit/miss counts and size of the LLM response cache."""
+    return jsonify({"success": True, "llm_cache": llm_cache.stats()}), 200
+
+
+@gemini_bp.route('/llm-gateway', methods=['GET'])
+def get_llm_gateway_stats():
+    """Get LLM gateway limits and load per provider, and calls, tokens and latency per route."""
+    return jsonify({"success": True, "llm_gateway": llm_gateway.stats()}), 200
+
+
+@gemini_bp.route('/providers', methods=['GET'])
+def get_llm_provider_stats():
+    """Get which LLM clients are loaded, how long each took, and why any failed."""
+    return jsonify({"success": True, **llm_providers.stats()}), 200
+
+
+def init_presentation_job_events(socketio):
+    """Push presentation job progress to SocketIO clients on the /meet namespace.
+
+    Clients emit ``watch-job`` with ``{"jobId": ...}`` and then receive
+    ``presentation-progress`` events for that job.
+    """
+    from flask_socketio import emit, join_room
+
+    @socketio.on('watch-job', namespace='/meet')
+    def handle_watch_job(data):
+        """Subscribe the client to progress events for a presentation job."""
+        job_id = (data or {}).get('jobId')
+        job = render_jobs.get(job_id) if job_id else None
+        if not job:
+            emit('error', {'message': 'Unknown presentation job'})
+            return
+
+        join_room(f"job:{job_id}")
+        emit('presentation-progress', {
+            'job_id': job_id,
+            'status': job['status'],
+            'stage': job['stage'],
+            'progress': job['progress'],
+        })
+
+    def push_progress(job_id, event):
+        socketio.emit('presentation-progress', {'job_id': job_id, **event},
+                      namespace='/meet', room=f"job:{job_id}")
+
+    render_jobs.add_listener(push_progress)
 
-        # Create a prompt for generating quiz questions
-        quiz_prompt = f"""
+
+class QuizError(Exception):
+    """Raised when Gemini's quiz response cannot be parsed or validated."""
+
+    def __init__(self, message, raw_response):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+def build_quiz(script, num_questions=5, use_cache=True):
+    """Generate and validate multiple choice questions for a script.
+
+    Raises QuizError if the response is not a valid quiz.
+    """
+    # Create a prompt for generating quiz questions
+    quiz_prompt = f"""
 Based on the following educational script, generate {num_questions} multiple choice questions that test understanding of the key concepts.
 
 Script:
@@ -547,70 +814,211 @@ Return your response in the following JSON format:
 Make sure the JSON is valid and properly formatted.
 """
 
-        # Generate quiz using Gemini
-        response = model.generate_content(quiz_prompt)
-        response_text = response.text
+    # Generate quiz using Gemini
+    response_text = gemini_generate(None, quiz_prompt, use_cache=use_cache, route='quiz')
 
-        # Try to extract JSON from the response
+    # Try to extract JSON from the response
 
-        # Clean up the response text - remove markdown code blocks if present
-        if '```json' in response_text:
-            json_start = response_text.find('```json') + 7
-            json_end = response_text.find('```', json_start)
-            response_text = response_text[json_start:json_end].strip()
-        elif '```' in response_text:
-            json_start = response_text.find('```') + 3
-            json_end = response_text.find('```', json_start)
-            response_text = response_text[json_start:json_end].strip()
+    # Clean up the response text - remove markdown code blocks if present
+    if '```json' in response_text:
+        json_start = response_text.find('```json') + 7
+        json_end = response_text.find('```', json_start)
+        response_text = response_text[json_start:json_end].strip()
+    elif '```' in response_text:
+        json_start = response_text.find('```') + 3
+        json_end = response_text.find('```', json_start)
+        response_text = response_text[json_start:json_end].strip()
 
-        try:
-            quiz_data = json.loads(response_text)
+    try:
+        quiz_data = json.loads(response_text)
 
-            # Validate the structure
-            if 'questions' not in quiz_data:
-                raise ValueError("Invalid quiz format: missing 'questions' key")
+        # Validate the structure
+        if 'questions' not in quiz_data:
+            raise ValueError("Invalid quiz format: missing 'questions' key")
 
-            for i, question in enumerate(quiz_data['questions']):
-                required_keys = ['id', 'question', 'options', 'correct_answer', 'explanation']
-                for key in required_keys:
-                    if key not in question:
-                        raise ValueError(f"Question {i+1} missing required key: {key}")
+        for i, question in enumerate(quiz_data['questions']):
+            required_keys = ['id', 'question', 'options', 'correct_answer', 'explanation']
+            for key in required_keys:
+                if key not in question:
+                    raise ValueError(f"Question {i+1} missing required key: {key}")
 
-                # Validate options
-                if not isinstance(question['options'], dict):
-                    raise ValueError(f"Question {i+1} options must be a dictionary")
+            # Validate options
+            if not isinstance(question['options'], dict):
+                raise ValueError(f"Question {i+1} options must be a dictionary")
 
-                required_options = ['A', 'B', 'C', 'D']
-                for option in required_options:
-                    if option not in question['options']:
-                        raise ValueError(f"Question {i+1} missing option {option}")
+            required_options = ['A', 'B', 'C', 'D']
+            for option in required_options:
+                if option not in question['options']:
+                    raise ValueError(f"Question {i+1} missing option {option}")
 
-                # Validate correct answer
-                if question['correct_answer'] not in required_options:
-                    raise ValueError(f"Question {i+1} has invalid correct answer")
+            # Validate correct answer
+            if question['correct_answer'] not in required_options:
+                raise ValueError(f"Question {i+1} has invalid correct answer")
+
+    except json.JSONDecodeError as e:
+        raise QuizError(f"Failed to parse quiz JSON: {str(e)}", response_text)
+    except ValueError as e:
+        raise QuizError(f"Invalid quiz structure: {str(e)}", response_text)
+
+    return quiz_data
+
+
+@gemini_bp.route('/generate-quiz', methods=['POST'])
+def generate_quiz():
+    """Generate multiple choice quiz questions based on educational script."""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        script = data.get('script')
+        num_questions = data.get('num_questions', 5)  # Default to 5 questions
+
+        if not script:
+            return jsonify({"error": "Script is required"}), 400
+
+        try:
+            quiz_data = build_quiz(script, num_questions, use_cache=data.get('cache', True))
 
             return jsonify({
                 "success": True,
                 "quiz": quiz_data
             }), 200
 
-        except json.JSONDecodeError as e:
-            return jsonify({
-                "success": False,
-                "error": f"Failed to parse quiz JSON: {str(e)}",
-                "raw_response": response_text
-            }), 500
-        except ValueError as e:
+        except QuizError as e:
             return jsonify({
                 "success": False,
-                "error": f"Invalid quiz structure: {str(e)}",
-                "raw_response": response_text
+                "error": str(e),
+                "raw_response": e.raw_response
             }), 500
 
     except Exception as e:
         print(f"Error in generate_quiz: {str(e)}")
         import traceback
         traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), llm_error_status(e)
+
+
+def _timed(timings, name, fn, *args, **kwargs):
+    """Call ``fn`` and record its wall-clock duration in ``timings[name]``."""
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[name] = round(time.perf_counter() - start, 3)
+
+
+def build_lesson(prompt, num_questions=5, room_id='presentation-room', include_agent=True,
+                 progress=None, use_cache=True):
+    """Generate a script, then render its video, quiz and tutor agent concurrently.
+
+    The three script-dependent branches run on their own threads; a failing
+    branch is reported under ``errors`` without cancelling the others.
+    """
+    timings = {}
+    lesson_start = time.perf_counter()
+
+    generated_script = _timed(timings, 'script', generate_presentation_script, prompt, use_cache=use_cache)
+    if progress:
+        progress('script_generated', 25, script=generated_script)
+
+    def presentation_branch():
+        manim_code = _timed(timings, 'manim_code', generate_presentation_manim, generated_script,
+                            use_cache=use_cache)
+        rendered = _timed(timings, 'render', render_presentation, manim_code, generated_script,
+                          progress=progress)
+        return {**rendered, "manim_code": manim_code}
+
+    def quiz_branch():
+        return _timed(timings, 'quiz', build_quiz, generated_script, num_questions, use_cache=use_cache)
+
+    def agent_branch():
+        return _timed(timings, 'agent', provision_ai_agent, generated_script, room_id)
+
+    branches = {'presentation': presentation_branch, 'quiz': quiz_branch}
+    if include_agent:
+        branches['agent'] = agent_branch
+
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix='lesson') as executor:
+        futures = {executor.submit(fn): name for name, fn in branches.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                if progress:
+                    progress(f'{name}_ready')
+            except Exception as e:
+                print(f"Lesson branch '{name}' failed: {str(e)}")
+                errors[name] = str(e)
+                if progress:
+                    progress(f'{name}_failed', error=str(e))
+
+    timings['total'] = round(time.perf_counter() - lesson_start, 3)
+
+    presentation = results.get('presentation')
+    return {
+        "success": not errors,
+        "prompt": prompt,
+        "script": generated_script,
+        "presentation": presentation,
+        "video_url": presentation['video_url'] if presentation else None,
+        "quiz": results.get('quiz'),
+        "agent_data": results.get('agent'),
+        "errors": errors,
+        "timings": timings
+    }
+
+
+@gemini_bp.route('/generate-lesson', methods=['POST'])
+def generate_lesson():
+    """Generate a full lesson: script, then video, quiz and AI tutor in parallel.
+
+    Pass ``"async": true`` to queue the lesson as a job like
+    ``/generate-presentation``.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        prompt = data.get('prompt')
+        if not prompt:
+            return jsonify({"error": "Prompt is required"}), 400
+
+        options = {
+            "num_questions": data.get('num_questions', 5),
+            "room_id": data.get('room_id', 'presentation-room'),
+            "include_agent": data.get('include_agent', True),
+            "use_cache": data.get('cache', True),
+        }
+
+        if data.get('async'):
+            try:
+                job_id = render_jobs.submit(build_lesson, prompt, **options)
+            except QueueFullError as e:
+                return jsonify({
+                    "success": False,
+                    "error": str(e)
+                }), 503
+
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/api/gemini/jobs/{job_id}"
+            }), 202
+
+        return jsonify(build_lesson(prompt, **options)), 200
+
+    except Exception as e:
+        print(f"Error in generate_lesson: {str(e)}")
+        import traceback
+        traceback.print_exc()
         return jsonify({
             "success": False,
             "error": str(e)
@@ -1,17 +1,15 @@
 """Tavus AI agent API routes."""
 
-import os
 import logging
 from flask import Blueprint, request, jsonify
-from services.tavus_agent import TavusAgent
+from services.tavus_agent import get_tavus_agent, handle_tavus_callback, tavus_metrics
+from services.tavus_pool import get_conversation_pool
+from services.tavus_reaper import get_conversation_reaper
 
 logger = logging.getLogger(__name__)
 
 tavus_bp = Blueprint('tavus', __name__, url_prefix='/api/tavus')
 
-# Initialize Tavus agent
-tavus_agent = TavusAgent(os.getenv('TAVUS_API_KEY', ''))
-
 # Store active conversations (in production, use Redis or database)
 active_conversations = {}
 
@@ -19,6 +17,8 @@ active_conversations = {}
 def test_tavus_connection():
     """Test Tavus API connection."""
     try:
+        tavus_agent = get_tavus_agent()
+        
         if not tavus_agent.api_key:
             return jsonify({
                 'error': 'Tavus API key not configured',
@@ -44,6 +44,8 @@ def test_tavus_connection():
 def create_ai_agent():
     """Create an AI agent for a room."""
     try:
+        tavus_agent = get_tavus_agent()
+        
         data = request.get_json()
         room_id = data.get('room_id')
         
@@ -97,6 +99,8 @@ def create_ai_agent():
 def send_message_to_agent():
     """Send a message to the AI agent."""
     try:
+        tavus_agent = get_tavus_agent()
+        
         data = request.get_json()
         room_id = data.get('room_id')
         message = data.get('message')
@@ -128,6 +132,8 @@ def send_message_to_agent():
 def end_ai_agent():
     """End the AI agent session."""
     try:
+        tavus_agent = get_tavus_agent()
+        
         data = request.get_json()
         room_id = data.get('room_id')
         
@@ -153,13 +159,27 @@ def end_ai_agent():
         logger.error(f"Error ending AI agent: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@tavus_bp.route('/metrics', methods=['GET'])
+def get_tavus_metrics():
+    """Report connection pool settings, caches, reaper and warm pool state and Tavus API latency histograms."""
+    reaper = get_conversation_reaper()
+    pool = get_conversation_pool()
+    return jsonify({
+        **tavus_metrics(),
+        'reaper': reaper.stats() if reaper else {'running': False},
+        'warm_pool': pool.stats() if pool else {'enabled': False},
+    }), 200
+
 @tavus_bp.route('/callback', methods=['POST'])
 def tavus_callback():
     """Handle callbacks from Tavus."""
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         logger.info(f"Tavus callback: {data}")
         
+        # Drop cached replica and conversation state the event makes stale
+        handle_tavus_callback(data)
+        
         # Handle different callback types
         event_type = data.get('event_type')
         conversation_id = data.get('conversation_id')
@@ -181,6 +201,8 @@ def tavus_callback():
 def get_agent_status(room_id):
     """Get the status of the AI agent in a room."""
     try:
+        tavus_agent = get_tavus_agent()
+        
         conversation_info = active_conversations.get(room_id)
         if not conversation_info:
             return jsonify({'active': False})
@@ -4,20 +4,83 @@ import json
 import logging
 import time
 import os
-from flask import request
+from flask import Blueprint, jsonify, request
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
-from collections import defaultdict
 import requests
+from routes.ai_agent import (
+    DEFAULT_TUTOR_SCRIPT, TUTOR_PERSONA, TUTOR_STYLE, agent_jobs, provision_ai_agent, provision_ai_agent_async,
+)
+from services.async_mode import is_green
+from services.render_jobs import QueueFullError
+from services.room_store import get_room_store
+from services.signaling_relay import CandidateBatcher, ice_batch_window, signaling_counters
+from services.tavus_agent import get_tavus_agent
+from services.tavus_async import run_tavus_coroutine
 
 logger = logging.getLogger(__name__)
 
-# Store active rooms and their participants
-active_rooms = defaultdict(set)
-user_rooms = {}
-room_ai_agents = {}  # Track AI agents in rooms
+webrtc_bp = Blueprint('webrtc', __name__, url_prefix='/api/meet')
 
 def init_webrtc_routes(socketio: SocketIO):
     """Initialize WebRTC signaling routes."""
+    from services.tavus_pool import ConversationProfile, start_conversation_pool
+    
+    # Keep tutor conversations pre-created when TAVUS_WARM_POOL is enabled
+    start_conversation_pool(ConversationProfile(TUTOR_PERSONA, DEFAULT_TUTOR_SCRIPT, TUTOR_STYLE))
+    
+    # Rooms, participants and room AI agents, in memory or shared between workers (ROOM_STORE)
+    room_store = get_room_store()
+    
+    # Under eventlet/gevent a blocking Tavus call only holds a green thread, and the
+    # asyncio loop thread would not run alongside the patched standard library
+    async_agents = (os.environ.get('TAVUS_ASYNC_AGENTS', '0').lower() in ('1', 'true', 'yes')
+                    and not is_green(socketio.async_mode))
+    
+    def local_peers(room_id):
+        """Number of other connections in ``room_id`` on this worker."""
+        return max(0, len(socketio.server.manager.rooms.get('/meet', {}).get(room_id, ())) - 1)
+    
+    def relay(event, payload, room_id, sender, target=None):
+        """Send ``payload`` from ``sender`` to ``target``, or to everyone else in the room."""
+        if target:
+            socketio.emit(event, payload, to=target, namespace='/meet')
+            signaling_counters.add(room_id, emits=1, deliveries=1, targeted=1)
+        else:
+            socketio.emit(event, payload, to=room_id, skip_sid=sender, namespace='/meet')
+            signaling_counters.add(room_id, emits=1, deliveries=local_peers(room_id), broadcast=1)
+    
+    def relay_target(data, room_id):
+        """Return the ``target`` sid of a signaling message, or None to address the whole room.
+        
+        Raises ValueError when the target is not in the sender's room.
+        """
+        target = data.get('target')
+        if target and room_store.room_of(target) != room_id:
+            raise ValueError('Target is not in this room')
+        return target or None
+    
+    def send_candidate_batch(sender, room_id, target, candidates):
+        relay('ice-candidates', {'candidates': candidates, 'from': sender}, room_id, sender, target)
+        signaling_counters.add(room_id, batches=1)
+    
+    # Coalesce ICE candidates into ice-candidates events when ICE_BATCH_WINDOW_MS is set
+    batch_window = ice_batch_window()
+    batcher = CandidateBatcher(socketio, batch_window, send_candidate_batch) if batch_window else None
+    
+    def leave_current_room():
+        """Remove the current user from their room and notify the others; return the room."""
+        room_id = room_store.leave(request.sid)
+        if batcher:
+            batcher.discard(request.sid)
+        if room_id is None:
+            return None
+        leave_room(room_id)
+        
+        # Notify other participants
+        emit('user-left', {
+            'userId': request.sid
+        }, room=room_id)
+        return room_id
     
     @socketio.on('connect', namespace='/meet')
     def handle_connect():
@@ -31,21 +94,7 @@ def init_webrtc_routes(socketio: SocketIO):
         logger.info(f"Client disconnected: {request.sid}")
         
         # Remove user from their room
-        if request.sid in user_rooms:
-            room_id = user_rooms[request.sid]
-            leave_room(room_id)
-            active_rooms[room_id].discard(request.sid)
-            
-            # Notify other participants
-            emit('user-left', {
-                'userId': request.sid
-            }, room=room_id)
-            
-            # Clean up empty rooms
-            if not active_rooms[room_id]:
-                del active_rooms[room_id]
-            
-            del user_rooms[request.sid]
+        leave_current_room()
     
     @socketio.on('join-room', namespace='/meet')
     def handle_join_room(data):
@@ -55,10 +104,12 @@ def init_webrtc_routes(socketio: SocketIO):
             emit('error', {'message': 'Room ID is required'})
             return
         
-        # Join the room
+        # Join the room, leaving any room the user was in before
+        previous_room = room_store.room_of(request.sid)
+        if previous_room and previous_room != room_id:
+            leave_current_room()
         join_room(room_id)
-        active_rooms[room_id].add(request.sid)
-        user_rooms[request.sid] = room_id
+        members = room_store.join(room_id, request.sid)
         
         logger.info(f"User {request.sid} joined room {room_id}")
         
@@ -69,14 +120,14 @@ def init_webrtc_routes(socketio: SocketIO):
         }, room=room_id, include_self=False)
         
         # Send current participants to new user
-        participants = list(active_rooms[room_id] - {request.sid})
+        participants = [sid for sid in members if sid != request.sid]
         emit('room-joined', {
             'roomId': room_id,
             'participants': participants
         })
         
         # If there's already someone in the room, start the call
-        if len(active_rooms[room_id]) > 1:
+        if len(members) > 1:
             # The new user should create an offer
             emit('initiate-call', {
                 'shouldCreateOffer': True
@@ -85,174 +136,165 @@ def init_webrtc_routes(socketio: SocketIO):
     @socketio.on('offer', namespace='/meet')
     def handle_offer(data):
         """Handle WebRTC offer."""
-        room_id = user_rooms.get(request.sid)
+        room_id = room_store.room_of(request.sid)
         if not room_id:
             emit('error', {'message': 'Not in a room'})
             return
         
         logger.info(f"Received offer from {request.sid} in room {room_id}")
         
-        # Forward offer to other participants in the room
-        emit('offer', {
+        try:
+            target = relay_target(data, room_id)
+        except ValueError as e:
+            emit('error', {'message': str(e)})
+            return
+        signaling_counters.add(room_id, received=1)
+        
+        # Forward offer to the target peer, or to other participants in the room
+        relay('offer', {
             'offer': data.get('offer'),
             'from': request.sid
-        }, room=room_id, include_self=False)
+        }, room_id, request.sid, target)
     
     @socketio.on('answer', namespace='/meet')
     def handle_answer(data):
         """Handle WebRTC answer."""
-        room_id = user_rooms.get(request.sid)
+        room_id = room_store.room_of(request.sid)
         if not room_id:
             emit('error', {'message': 'Not in a room'})
             return
         
         logger.info(f"Received answer from {request.sid} in room {room_id}")
         
-        # Forward answer to other participants in the room
-        emit('answer', {
+        try:
+            target = relay_target(data, room_id)
+        except ValueError as e:
+            emit('error', {'message': str(e)})
+            return
+        signaling_counters.add(room_id, received=1)
+        
+        # Forward answer to the target peer, or to other participants in the room
+        relay('answer', {
             'answer': data.get('answer'),
             'from': request.sid
-        }, room=room_id, include_self=False)
+        }, room_id, request.sid, target)
     
     @socketio.on('ice-candidate', namespace='/meet')
     def handle_ice_candidate(data):
-        """Handle ICE candidate."""
-        room_id = user_rooms.get(request.sid)
+        """Handle ICE candidate, addressed to one peer (``target``) or the whole room."""
+        room_id = room_store.room_of(request.sid)
         if not room_id:
             emit('error', {'message': 'Not in a room'})
             return
         
-        # Forward ICE candidate to other participants in the room
-        emit('ice-candidate', {
+        try:
+            target = relay_target(data, room_id)
+        except ValueError as e:
+            emit('error', {'message': str(e)})
+            return
+        signaling_counters.add(room_id, received=1, candidates=1)
+        
+        if batcher:
+            batcher.add(request.sid, room_id, target, data.get('candidate'))
+            return
+        
+        # Forward ICE candidate to the target peer, or to other participants in the room
+        relay('ice-candidate', {
             'candidate': data.get('candidate'),
             'from': request.sid
-        }, room=room_id, include_self=False)
+        }, room_id, request.sid, target)
     
     @socketio.on('leave-room', namespace='/meet')
     def handle_leave_room():
         """Handle user leaving a room."""
-        if request.sid in user_rooms:
-            room_id = user_rooms[request.sid]
-            leave_room(room_id)
-            active_rooms[room_id].discard(request.sid)
-            
-            # Notify other participants
-            emit('user-left', {
-                'userId': request.sid
-            }, room=room_id)
-            
-            # Clean up empty rooms
-            if not active_rooms[room_id]:
-                del active_rooms[room_id]
-            
-            del user_rooms[request.sid]
-            
+        room_id = leave_current_room()
+        if room_id:
             logger.info(f"User {request.sid} left room {room_id}")
             
             emit('left-room', {'status': 'success'})
     
+    def agent_joined(room_id, agent_data):
+        """Record the room's AI agent and tell everyone in the room."""
+        agent_data['knowledge_base'] = "General knowledge and helpful information"
+        room_store.set_agent(room_id, agent_data)
+        
+        logger.info(f"Tavus AI agent created successfully: {agent_data}")
+        
+        # Notify all participants that AI agent joined
+        socketio.emit('ai-agent-joined', {
+            'agent_data': agent_data,
+            'room_id': room_id
+        }, room=room_id, namespace='/meet')
+    
+    def agent_progress(job_id, room_id, event):
+        return {
+            'job_id': job_id,
+            'room_id': room_id,
+            'status': event['status'],
+            'stage': event['stage'],
+            'progress': event['progress'],
+        }
+    
+    def push_agent_progress(job_id, event):
+        """Relay agent job updates to the room that asked for the agent."""
+        job = agent_jobs.get(job_id)
+        room_id = job['key'] if job else None
+        if not room_id:
+            return
+        socketio.emit('ai-agent-progress', agent_progress(job_id, room_id, event), room=room_id, namespace='/meet')
+        if event['status'] == 'succeeded':
+            agent_joined(room_id, event['result'])
+        elif event['status'] == 'failed':
+            socketio.emit('error', {'message': f"Error creating AI agent: {event['error']}"},
+                          room=room_id, namespace='/meet')
+    
+    agent_jobs.add_listener(push_agent_progress)
+    
     @socketio.on('request-ai-agent', namespace='/meet')
     def handle_request_ai_agent(data):
-        """Handle request to add AI agent to room."""
+        """Handle request to add AI agent to room.
+        
+        The agent is created on a background job and the request is acknowledged
+        at once. The room receives ``ai-agent-progress`` updates, then
+        ``ai-agent-joined`` or ``error``. A room that asks again while its agent
+        is being created is attached to the same job.
+        """
         room_id = data.get('roomId', 'main-room')
-        custom_script_from_request = data.get('custom_script', '')
+        # Use the script from the presentation or default instructions
+        custom_script = data.get('custom_script') or DEFAULT_TUTOR_SCRIPT
         
         try:
             logger.info(f"Creating Tavus AI agent for room {room_id}")
-            
-            # Use the script from the presentation or default instructions
-            persona_instructions = "The first thing you will do is read the script and time your self according to the time stamps but don't say the time stamps out loud. Then you will respond to the user in a helpful and insightful way. If they ask questions that are irrelavent, respond in a kind way that veers them back to the subject. If they ask about a related topic that is very vast in nature (i.e. explaining something that can't be learnt quickly, recommend them to asking the program a new prompt. Ignore things like asterisks and quotation marks when you read a script)"
-            custom_script = custom_script_from_request if custom_script_from_request else "You are a helpful AI tutor ready to discuss educational topics."
-            conversation_style = "polite, insighful, focused, and helpful, super super slow paced"
-            knowledge_base = "General knowledge and helpful information"
-            
-            logger.info(f"Using persona_instructions: '{persona_instructions}'")
             logger.info(f"Using custom_script: '{custom_script[:100]}...'")  # Log first 100 chars
-            logger.info(f"Using conversation_style: '{conversation_style}'")
-            
-            # Import Tavus agent service
-            from services.tavus_agent import TavusAgent
-            
-            tavus_agent = TavusAgent(os.getenv('TAVUS_API_KEY', ''))
-            
-            if not tavus_agent.api_key:
-                logger.error("No Tavus API key found")
-                emit('error', {'message': 'Tavus API key not configured'})
-                return
-            
-            # Use your specific replica ID
-            replica_id = os.getenv('TAVUS_REPLICA_ID', 'r1a4e22fa0d9')
-            logger.info(f"Using your replica: {replica_id}")
-            
-            # Test the replica first
-            replica_test = tavus_agent.test_replica(replica_id)
-            if not replica_test:
-                logger.error(f"Replica {replica_id} is not available")
-                emit('error', {'message': f'Your replica {replica_id} is not ready. Please check Tavus dashboard.'})
-                return
             
-            logger.info(f"Replica test successful: {replica_test.get('name', 'Unknown')}")
-            
-            # Clean up any active conversations first to free up slots
-            logger.info("Cleaning up active conversations...")
-            ended_count = tavus_agent.cleanup_active_conversations()
-            if ended_count > 0:
-                logger.info(f"Ended {ended_count} active conversations")
-                # Wait a moment for cleanup to complete
-                import time
-                time.sleep(2)
-            
-            # Create a conversation with your specific replica
-            conversation_response = tavus_agent.create_conversation(
-                replica_id=replica_id,
-                persona_instructions=persona_instructions,
-                custom_script=custom_script,
-                conversation_style=conversation_style
-            )
-            
-            if not conversation_response:
-                logger.error("Failed to create Tavus conversation")
-                emit('error', {'message': 'Failed to create AI conversation. Please try again in a moment.'})
-                return
-            
-            # Get conversation details
-            conversation_id = conversation_response.get('conversation_id')
-            conversation_url = tavus_agent.get_conversation_url(conversation_id)
-            
-            if not conversation_url:
-                # Fallback URL construction
-                conversation_url = f"https://tavus.daily.co/{conversation_id}"
-            
-            logger.info(f"Conversation created with custom script context: {conversation_id}")
-            
-            # Create agent data with hardcoded configuration
-            agent_data = {
-                'agent_id': f'tavus_agent_{room_id}',
-                'conversation_id': conversation_id,
-                'conversation_url': conversation_url,
-                'replica_id': replica_id,
-                'agent_name': replica_test.get('name', 'Your AI Assistant'),
-                'status': 'active',
-                'type': 'tavus_conversation',
-                'persona_instructions': persona_instructions,
-                'custom_script': custom_script,
-                'knowledge_base': knowledge_base,
-                'conversation_style': conversation_style
-            }
-            
-            room_ai_agents[room_id] = agent_data
-            
-            logger.info(f"Tavus AI agent created successfully: {agent_data}")
-            
-            # Notify all participants that AI agent joined
-            emit('ai-agent-joined', {
-                'agent_data': agent_data,
-                'room_id': room_id
-            }, room=room_id)
-                
+            # Provisioning binds a warm pool conversation when one matches, so that job finishes at once
+            if async_agents:
+                # Provision on the shared asyncio loop so no job worker is held while Tavus responds
+                def provision(progress):
+                    return run_tavus_coroutine(provision_ai_agent_async(
+                        custom_script, room_id, persona_instructions=TUTOR_PERSONA, conversation_style=TUTOR_STYLE,
+                        progress=progress))
+            else:
+                def provision(progress):
+                    return provision_ai_agent(custom_script, room_id, persona_instructions=TUTOR_PERSONA,
+                                              conversation_style=TUTOR_STYLE, progress=progress)
+            
+            job_id, created = agent_jobs.submit_once(room_id, provision)
+            if not created:
+                logger.info(f"AI agent for room {room_id} is already being created (job {job_id})")
+                job = agent_jobs.get(job_id)
+                if job:
+                    emit('ai-agent-progress', agent_progress(job_id, room_id, job))
+            return {'status': 'accepted', 'job_id': job_id, 'duplicate': not created}
+            
+        except QueueFullError as e:
+            logger.warning(f"Cannot queue AI agent for room {room_id}: {e}")
+            emit('error', {'message': 'Too many AI agents are being created, try again shortly'})
+            return {'status': 'rejected'}
         except Exception as e:
             logger.error(f"Error requesting Tavus AI agent: {e}")
             emit('error', {'message': f'Error creating AI agent: {str(e)}'})
+            return {'status': 'failed'}
     
     @socketio.on('send-to-ai', namespace='/meet')
     def handle_send_to_ai(data):
@@ -268,17 +310,14 @@ def init_webrtc_routes(socketio: SocketIO):
             logger.info(f"User message to Tavus AI in room {room_id}: {message}")
             
             # Get the active AI agent for this room
-            agent_data = room_ai_agents.get(room_id)
+            agent_data = room_store.get_agent(room_id)
             
             if not agent_data:
                 emit('error', {'message': 'No AI agent active in this room'})
                 return
             
-            # Import Tavus agent service
-            from services.tavus_agent import TavusAgent
-            import os
-            
-            tavus_agent = TavusAgent(os.getenv('TAVUS_API_KEY', ''))
+            # Shared agent whose pooled session keeps connections to Tavus alive between calls
+            tavus_agent = get_tavus_agent()
             
             # For Tavus, we can send messages directly to the conversation
             conversation_id = agent_data.get('conversation_id')
@@ -312,3 +351,14 @@ def init_webrtc_routes(socketio: SocketIO):
         except Exception as e:
             logger.error(f"Error sending message to Tavus AI: {e}")
             emit('error', {'message': f'Error sending message to AI: {str(e)}'})
+
+
+@webrtc_bp.route('/metrics', methods=['GET'])
+def get_signaling_metrics():
+    """Report per-room signaling emit counters on this worker and room store state."""
+    return jsonify({
+        'ice_batch_window_ms': round(ice_batch_window() * 1000),
+        'room_store': get_room_store().stats(),
+        'agent_jobs': agent_jobs.stats(),
+        **signaling_counters.snapshot(),
+    }), 200
@@ -2,9 +2,11 @@
 """Production server runner without file watcher."""
 
 import os
-from main import create_app
+from main import SOCKETIO_ASYNC_MODE, create_app
+from services.async_mode import socketio_run_options
 
 if __name__ == "__main__":
     app, socketio = create_app()
     # Run without debug mode to avoid file watcher restarts
-    socketio.run(app, debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 5002)))
+    socketio.run(app, debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 5002)),
+                 **socketio_run_options(SOCKETIO_ASYNC_MODE))
@@ -0,0 +1,218 @@
+"""Library of pre-rendered example animations from manim_examples.py.
+
+Renders are stored once per scene, quality and custom input under
+``static/animations/library`` and served from there on later requests. The
+fixed scenes can be rendered ahead of time with ``prerender_library``.
+
+The default render of each scene and quality is kept. Renders of custom
+input, and renders from an older ``manim_examples.py``, are evicted least
+recently used first once the library exceeds ``ANIMATION_LIBRARY_MAX_MB``.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from services.manim_render import render_scene
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANIMATIONS_DIR = os.path.join(BACKEND_DIR, 'static', 'animations')
+LIBRARY_DIR = os.path.join(ANIMATIONS_DIR, 'library')
+EXAMPLES_FILE = os.path.join(BACKEND_DIR, 'manim_examples.py')
+
+# Map animation type to scene class
+ANIMATION_SCENES = {
+    'circle': 'CreateCircle',
+    'square_to_circle': 'SquareToCircle',
+    'text': 'WriteText',
+    'math': 'MathExample',
+    'custom_text': 'CustomTextAnimation',
+    'custom_math': 'CustomMathAnimation'
+}
+
+# Request parameters each scene reads (through MANIM_CUSTOM_* environment variables)
+SCENE_PARAMETERS = {
+    'text': ('custom_text',),
+    'math': ('custom_formula',),
+    'custom_text': ('custom_text',),
+    'custom_math': ('custom_formula',),
+}
+
+# Quality flag to the directory name manim renders into
+QUALITY_DIRS = {
+    'l': '480p15',
+    'm': '720p30',
+    'h': '1080p60',
+}
+
+LIBRARY_MAX_BYTES = int(os.environ.get('ANIMATION_LIBRARY_MAX_MB', 512)) * 1024 * 1024
+
+# Per-file render lock and the number of requests holding or waiting for it
+_render_locks: Dict[str, List] = {}
+_render_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+_examples_digest_cache = {'mtime': None, 'digest': ''}
+stats = {'hits': 0, 'misses': 0, 'prerendered': 0, 'evictions': 0}
+
+
+def _examples_digest() -> str:
+    """Hash manim_examples.py so editing a scene invalidates its renders.
+
+    The hash is recomputed only when the file's modification time changes.
+    """
+    mtime = os.stat(EXAMPLES_FILE).st_mtime_ns
+    if _examples_digest_cache['mtime'] != mtime:
+        with open(EXAMPLES_FILE, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        _examples_digest_cache.update(mtime=mtime, digest=digest)
+    return _examples_digest_cache['digest']
+
+
+def library_filename(animation_type: str, quality: str, params: Dict[str, str]) -> str:
+    """Return the library file name for a scene rendered with the given inputs."""
+    relevant = [f"{name}={params.get(name) or ''}" for name in SCENE_PARAMETERS.get(animation_type, ())]
+    key = '\n'.join([_examples_digest(), ANIMATION_SCENES[animation_type], quality] + relevant)
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return f"{animation_type}_{quality}_{digest}.mp4"
+
+
+def get_animation(animation_type: str, quality: str = 'l', custom_text: str = '',
+                  custom_formula: str = '') -> Tuple[str, bool]:
+    """Return ``(filename, cached)`` for an animation, rendering it on a library miss.
+
+    ``filename`` is relative to ``static/animations``. Raises
+    ``subprocess.CalledProcessError`` if manim fails and ``FileNotFoundError``
+    if the rendered video cannot be located.
+    """
+    params = {'custom_text': custom_text, 'custom_formula': custom_formula}
+    filename = library_filename(animation_type, quality, params)
+    path = os.path.join(LIBRARY_DIR, filename)
+
+    with _render_locks_guard:
+        entry = _render_locks.setdefault(filename, [threading.Lock(), 0])
+        entry[1] += 1
+
+    # Concurrent requests for the same animation wait for a single render
+    try:
+        with entry[0]:
+            if os.path.exists(path):
+                stats['hits'] += 1
+                _touch(path)
+                return f"library/{filename}", True
+
+            stats['misses'] += 1
+            _render_to(animation_type, quality, params, path)
+    finally:
+        with _render_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _render_locks[filename]
+
+    _evict_custom_renders(keep=filename)
+    return f"library/{filename}", False
+
+
+def _touch(path: str) -> None:
+    """Mark a library file as recently used for eviction."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _evict_custom_renders(keep: str) -> None:
+    """Remove the least recently used non-default renders until the library fits ``LIBRARY_MAX_BYTES``."""
+    defaults = {library_filename(animation_type, quality, {})
+                for animation_type in ANIMATION_SCENES for quality in QUALITY_DIRS}
+    with _evict_lock:
+        total = 0
+        candidates = []
+        for entry in os.scandir(LIBRARY_DIR):
+            if not entry.name.endswith('.mp4'):
+                continue
+            info = entry.stat()
+            total += info.st_size
+            if entry.name not in defaults and entry.name != keep:
+                candidates.append((info.st_mtime, entry.name, info.st_size))
+
+        for _, name, size in sorted(candidates):
+            if total <= LIBRARY_MAX_BYTES:
+                break
+            try:
+                os.remove(os.path.join(LIBRARY_DIR, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            stats['evictions'] += 1
+            logger.info(f"Evicted {name} from the animation library")
+
+
+def _render_to(animation_type: str, quality: str, params: Dict[str, str], path: str) -> None:
+    """Render a scene and move the resulting video to ``path``."""
+    env = {}
+    if params.get('custom_text') and 'custom_text' in SCENE_PARAMETERS.get(animation_type, ()):
+        env['MANIM_CUSTOM_TEXT'] = params['custom_text']
+    if params.get('custom_formula') and 'custom_formula' in SCENE_PARAMETERS.get(animation_type, ()):
+        env['MANIM_CUSTOM_FORMULA'] = params['custom_formula']
+
+    output_name = f"{animation_type}_{uuid.uuid4()}.mp4"
+    result = render_scene(
+        EXAMPLES_FILE,
+        ANIMATION_SCENES[animation_type],
+        quality=quality,
+        output_file=output_name,
+        media_dir=ANIMATIONS_DIR,
+        env_overrides=env,
+        timeout=60
+    )
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+
+    rendered = os.path.join(ANIMATIONS_DIR, 'videos', 'manim_examples', QUALITY_DIRS[quality], output_name)
+    if not os.path.exists(rendered):
+        raise FileNotFoundError(f"Rendered animation not found at {rendered}")
+
+    os.makedirs(LIBRARY_DIR, exist_ok=True)
+    # Move via a temporary name so readers never see a partially written file
+    tmp_path = f"{path}.tmp"
+    shutil.move(rendered, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"Added {os.path.basename(path)} to the animation library")
+
+
+def prerender_library(qualities: Iterable[str] = ('l',)) -> int:
+    """Render every scene with its default inputs at each quality; return how many were rendered."""
+    rendered = 0
+    for quality in qualities:
+        for animation_type in ANIMATION_SCENES:
+            try:
+                _, cached = get_animation(animation_type, quality)
+                if not cached:
+                    rendered += 1
+            except Exception as e:
+                logger.error(f"Pre-rendering {animation_type} at quality {quality} failed: {e}")
+    stats['prerendered'] += rendered
+    return rendered
+
+
+def start_prerender(qualities: Optional[Iterable[str]] = None) -> threading.Thread:
+    """Pre-render the library on a background thread."""
+    if qualities is None:
+        qualities = os.environ.get('ANIMATION_PRERENDER_QUALITIES', 'l').split(',')
+    qualities = [q.strip() for q in qualities if q.strip() in QUALITY_DIRS]
+    thread = threading.Thread(target=prerender_library, args=(qualities,),
+                              name='animation-prerender', daemon=True)
+    thread.start()
+    return thread
+
+
+def library_stats() -> Dict[str, int]:
+    """Return hit/miss counters and the number of videos in the library."""
+    files = os.listdir(LIBRARY_DIR) if os.path.isdir(LIBRARY_DIR) else []
+    return {**stats, 'videos': sum(1 for name in files if name.endswith('.mp4'))}
@@ -0,0 +1,59 @@
+"""Concurrency model of the Socket.IO server, chosen by ``SOCKETIO_ASYNC_MODE``.
+
+- ``threading`` (default): the Werkzeug server with one OS thread per
+  connection. Every open ``/meet`` WebSocket holds a thread.
+- ``eventlet`` or ``gevent``: green threads on one event loop, served by the
+  package's own WSGI server. An idle WebSocket costs a few kilobytes instead
+  of a thread, and blocking socket calls (Tavus, Gemini, the message queue)
+  yield to other connections. The package must be installed, and the standard
+  library must be patched before anything else imports it, which
+  ``patch_for_async_mode`` does when called at the top of the entry point.
+
+The eventlet server accepts at most ``SOCKETIO_MAX_CONNECTIONS`` (default
+10000) connections at once; connections beyond that wait to be accepted.
+
+In the green-thread modes CPU-bound work on a request (password hashing,
+inline manim renders) holds the whole loop while it runs.
+"""
+
+import os
+from typing import Any, Dict
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+
+def socketio_async_mode() -> str:
+    """Return the configured async mode, validated against ``ASYNC_MODES``."""
+    mode = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading').strip().lower() or 'threading'
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"Unknown SOCKETIO_ASYNC_MODE {mode!r}; expected one of {', '.join(ASYNC_MODES)}")
+    return mode
+
+
+def patch_for_async_mode() -> str:
+    """Monkey patch the standard library for a green-thread mode and return the mode.
+
+    Must run before modules that use sockets, threads or ``time.sleep`` are
+    imported. It does nothing in ``threading`` mode.
+    """
+    mode = socketio_async_mode()
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    return mode
+
+
+def socketio_run_options(mode: str) -> Dict[str, Any]:
+    """Return the extra ``socketio.run`` keyword arguments for the server of ``mode``."""
+    if mode == 'eventlet':
+        # eventlet.wsgi otherwise stops accepting at 1024 simultaneous connections
+        return {'max_size': int(os.environ.get('SOCKETIO_MAX_CONNECTIONS', 10000))}
+    return {}
+
+
+def is_green(mode: str) -> bool:
+    """Whether ``mode`` runs handlers on green threads rather than OS threads."""
+    return mode in ('eventlet', 'gevent')
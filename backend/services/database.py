@@ -0,0 +1,83 @@
+"""Database URL, connection pool and SQLite tuning for the SQLAlchemy models.
+
+``DATABASE_URL`` selects the database (default ``sqlite:///app.db``, which
+Flask-SQLAlchemy places in ``instance/``). ``postgres://`` URLs are accepted
+as ``postgresql://``, and the driver for a server database must be installed.
+
+The connection pool is sized by:
+- ``DATABASE_POOL_SIZE`` (default 10);
+- ``DATABASE_MAX_OVERFLOW`` (default 20);
+- ``DATABASE_POOL_TIMEOUT`` (seconds, default 30);
+- ``DATABASE_POOL_RECYCLE`` (seconds, default 1800).
+For server databases, connections are also recycled after that time and
+pinged before use.
+
+SQLite files are opened in WAL mode with ``synchronous=NORMAL``, a busy
+timeout, and a larger page cache, unless ``SQLITE_WAL=0``. WAL lets readers
+proceed while a signup writes, and the busy timeout makes concurrent writers
+wait for the lock instead of failing with "database is locked".
+"""
+
+import logging
+import os
+from typing import Any, Dict
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = 'sqlite:///app.db'
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', '15000'),
+    ('cache_size', '-20000'),
+    ('temp_store', 'MEMORY'),
+    ('foreign_keys', 'ON'),
+)
+
+
+def database_url() -> str:
+    url = os.environ.get('DATABASE_URL') or DEFAULT_DATABASE_URL
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Return ``SQLALCHEMY_ENGINE_OPTIONS`` for ``url``."""
+    if url.startswith('sqlite') and (':memory:' in url or url.rstrip('/') == 'sqlite:'):
+        # In-memory databases live in one connection; pool sizing does not apply
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+    }
+    if not url.startswith('sqlite'):
+        # Server connections can be dropped while idle; local files cannot
+        options['pool_recycle'] = int(os.environ.get('DATABASE_POOL_RECYCLE', 1800))
+        options['pool_pre_ping'] = True
+    return options
+
+
+def configure_database(app) -> None:
+    """Set the database URL and engine options on ``app`` from the environment."""
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+
+
+def tune_sqlite(engine) -> None:
+    """Apply ``SQLITE_PRAGMAS`` to every new connection of a SQLite engine."""
+    if engine.dialect.name != 'sqlite' or os.environ.get('SQLITE_WAL', '1').lower() in ('0', 'false', 'no'):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    logger.info(f"SQLite tuned for concurrent access: {engine.url.database}")
@@ -0,0 +1,144 @@
+"""Persistent cache of LLM responses keyed on model and prompt."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """SQLite-backed response cache with TTL expiry and an entry bound.
+
+    Entries are evicted least recently used first once ``max_entries`` is
+    exceeded; entries older than ``ttl`` seconds are treated as misses.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 1000, enabled: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(model: str, system: Optional[str], instructions: Optional[str], user_input: str) -> str:
+        """Return the cache key for a model call."""
+        payload = json.dumps([model, system or '', instructions or '', user_input])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text for ``key``, or None on a miss."""
+        with self._lock:
+            conn = self._connect_locked()
+            row = conn.execute(
+                'SELECT response, created_at FROM llm_responses WHERE key = ?', (key,)
+            ).fetchone()
+            now = time.time()
+            if row and now - row[1] > self.ttl:
+                conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                conn.commit()
+                self.expired += 1
+                row = None
+
+            if not row:
+                self.misses += 1
+                return None
+
+            conn.execute('UPDATE llm_responses SET last_access = ? WHERE key = ?', (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """Store a response and evict the least recently used overflow."""
+        with self._lock:
+            conn = self._connect_locked()
+            now = time.time()
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, model, response, now, now),
+            )
+            count = conn.execute('SELECT COUNT(*) FROM llm_responses').fetchone()[0]
+            if count > self.max_entries:
+                overflow = count - self.max_entries
+                conn.execute(
+                    'DELETE FROM llm_responses WHERE key IN '
+                    '(SELECT key FROM llm_responses ORDER BY last_access LIMIT ?)',
+                    (overflow,),
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            entries = self._connect_locked().execute('SELECT COUNT(*) FROM llm_responses').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'bypassed': self.bypassed,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+        }
+
+    def _connect_locked(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_responses ('
+                'key TEXT PRIMARY KEY, model TEXT, response TEXT, '
+                'created_at REAL, last_access REAL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access '
+                'ON llm_responses (last_access)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+
+def cached_call(key: str, model: str, use_cache: bool, call) -> str:
+    """Return the cached response for ``key`` or compute and store it with ``call()``."""
+    if not llm_cache.enabled or not use_cache:
+        llm_cache.bypassed += 1
+        return call()
+
+    cached = llm_cache.get(key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {model} ({key[:12]})")
+        return cached
+
+    response = call()
+    llm_cache.set(key, model, response)
+    return response
+
+
+_instance_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance')
+llm_cache = LLMCache(
+    path=os.environ.get('LLM_CACHE_PATH', os.path.join(_instance_dir, 'llm_cache.sqlite3')),
+    ttl=float(os.environ.get('LLM_CACHE_TTL', 86400)),
+    max_entries=int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 1000)),
+    enabled=os.environ.get('LLM_CACHE_ENABLED', '1') != '0',
+)
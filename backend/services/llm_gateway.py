@@ -0,0 +1,333 @@
+"""Single path for every LLM call, with limits, retries and accounting per provider.
+
+``llm_gateway.generate(provider, prompt, ...)`` takes the provider's client from
+``services.llm_providers`` and does the following around each call:
+
+- **Coalescing.** Identical prompts already in flight share one upstream call.
+- **Concurrency.** At most ``LLM_<PROVIDER>_MAX_CONCURRENT`` calls per
+  provider run at once (default ``LLM_MAX_CONCURRENT``, 8).
+- **Rate.** A token bucket starts at most ``LLM_<PROVIDER>_RATE`` calls per
+  second (default ``LLM_RATE``, 5; 0 disables it), with bursts of up to
+  ``LLM_<PROVIDER>_BURST`` (default ``LLM_BURST``, 10).
+- **Timeout.** Each attempt is given ``LLM_TIMEOUT`` seconds (default 120),
+  passed to the SDK's own request timeout.
+- **Retries.** A timeout, a connection error, a 429 or a 5xx is retried up to
+  ``LLM_RETRIES`` times (default 2). The waits are full-jitter exponential
+  backoff from ``LLM_RETRY_BASE`` seconds (default 1), capped at
+  ``LLM_RETRY_MAX`` (default 20). A call waits at most ``LLM_QUEUE_TIMEOUT``
+  seconds (default 60) for a slot and a rate token, then fails with
+  ``LLMBusyError``.
+
+Calls, retries, errors, input/output tokens and latency are counted per
+route, the label each caller passes. Tokens come from the provider's usage
+data, or are estimated at four characters per token when it reports none.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from services.llm_providers import CLAUDE_MODEL, GEMINI_MODEL, get_llm_client
+from services.metrics import HistogramSet
+
+logger = logging.getLogger(__name__)
+
+# Exception class names the SDKs use for throttling and transient failures
+RETRYABLE_ERRORS = {
+    'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError', 'OverloadedError',
+    'ResourceExhausted', 'ServiceUnavailable', 'DeadlineExceeded', 'TooManyRequests',
+}
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when a call waited ``LLM_QUEUE_TIMEOUT`` without getting a slot or a rate token."""
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when the provider did not answer within ``LLM_TIMEOUT``."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` looks like throttling or a transient provider failure."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return status in RETRYABLE_STATUS
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return len(text or '') // 4 + 1
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second on average, and up to ``capacity`` at once."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, waiting up to ``timeout`` seconds; return whether one was taken."""
+        if self.rate <= 0:
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self) -> float:
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return round(min(self.capacity, self._tokens + elapsed * self.rate), 2)
+
+
+def _provider_setting(provider: str, name: str, default: float) -> float:
+    value = os.environ.get(f"LLM_{provider.upper()}_{name}") or os.environ.get(f"LLM_{name}")
+    return float(value) if value else default
+
+
+class ProviderGate:
+    """Concurrency slots and rate tokens of one provider."""
+
+    def __init__(self, max_concurrent: int, rate: float, burst: float):
+        self.max_concurrent = max_concurrent
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.bucket = TokenBucket(rate, burst)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_concurrent': self.max_concurrent,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'rejected': self.rejected,
+            'rate': self.bucket.rate,
+            'burst': self.bucket.capacity,
+            'rate_tokens': self.bucket.available(),
+        }
+
+
+def _call_gemini(client, prompt: str, system: Optional[str], model: str, max_tokens: Optional[int],
+                 timeout: float) -> Tuple[str, Optional[int], Optional[int]]:
+    response = client.generate_content(prompt, request_options={'timeout': timeout})
+    usage = getattr(response, 'usage_metadata', None)
+    return (response.text, getattr(usage, 'prompt_token_count', None),
+            getattr(usage, 'candidates_token_count', None))
+
+
+def _call_anthropic(client, prompt: str, system: Optional[str], model: str, max_tokens: Optional[int],
+                    timeout: float) -> Tuple[str, Optional[int], Optional[int]]:
+    response = client.messages.create(
+        model=model,
+        max_tokens=max_tokens or 4000,
+        system=system,
+        messages=[{"role": "user", "content": prompt}],
+        timeout=timeout,
+    )
+    usage = getattr(response, 'usage', None)
+    return (response.content[0].text, getattr(usage, 'input_tokens', None),
+            getattr(usage, 'output_tokens', None))
+
+
+def _call_fake(client, prompt: str, system: Optional[str], model: str, max_tokens: Optional[int],
+               timeout: float) -> Tuple[str, Optional[int], Optional[int]]:
+    completion = client.complete(prompt, system=system, max_tokens=max_tokens, timeout=timeout)
+    return completion.text, completion.input_tokens, completion.output_tokens
+
+
+# provider -> (default model, function calling its client)
+PROVIDER_CALLS: Dict[str, Tuple[str, Callable[..., Tuple[str, Optional[int], Optional[int]]]]] = {
+    'gemini': (GEMINI_MODEL, _call_gemini),
+    'anthropic': (CLAUDE_MODEL, _call_anthropic),
+    'fake': ('fake', _call_fake),
+}
+
+ROUTE_FIELDS = ('calls', 'coalesced', 'upstream', 'retries', 'errors', 'timeouts', 'busy',
+                'input_tokens', 'output_tokens')
+
+
+class LLMGateway:
+    """Run LLM calls through per-provider limits, retries, coalescing and accounting."""
+
+    def __init__(self, timeout: float = 120, retries: int = 2, retry_base: float = 1.0,
+                 retry_max: float = 20.0, queue_timeout: float = 60):
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.queue_timeout = queue_timeout
+        self.latency = HistogramSet()
+        self._gates: Dict[str, ProviderGate] = {}
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def generate(self, provider: str, prompt: str, system: Optional[str] = None, model: Optional[str] = None,
+                 max_tokens: Optional[int] = None, route: str = 'default', key: Optional[Hashable] = None) -> str:
+        """Return the provider's text for ``prompt``.
+
+        ``key`` identifies identical requests for coalescing; by default it is
+        built from every argument except ``route``.
+        """
+        if provider not in PROVIDER_CALLS:
+            raise ValueError(f"No gateway call for LLM provider {provider!r}")
+        model = model or PROVIDER_CALLS[provider][0]
+        key = (provider, key if key is not None else (model, system, prompt, max_tokens))
+        started = time.perf_counter()
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        self._count(route, calls=1, coalesced=0 if leader else 1)
+
+        if leader:
+            try:
+                future.set_result(self._call(provider, model, prompt, system, max_tokens, route))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+
+        try:
+            text = future.result()
+        except Exception:
+            self.latency.observe(route, time.perf_counter() - started, error=True)
+            raise
+        self.latency.observe(route, time.perf_counter() - started)
+        return text
+
+    def _call(self, provider: str, model: str, prompt: str, system: Optional[str],
+              max_tokens: Optional[int], route: str) -> str:
+        """Call the provider once per attempt, retrying transient failures with jittered backoff."""
+        gate = self._gate(provider)
+        call = PROVIDER_CALLS[provider][1]
+        attempt = 0
+        while True:
+            with self._lock:
+                gate.waiting += 1
+            try:
+                acquired = gate.slots.acquire(timeout=self.queue_timeout)
+                if acquired and not gate.bucket.acquire(self.queue_timeout):
+                    gate.slots.release()
+                    acquired = False
+            finally:
+                with self._lock:
+                    gate.waiting -= 1
+            if not acquired:
+                with self._lock:
+                    gate.rejected += 1
+                self._count(route, busy=1, errors=1)
+                raise LLMBusyError(f"{provider} is at its concurrency or rate limit; try again shortly")
+
+            with self._lock:
+                gate.in_flight += 1
+            try:
+                self._count(route, upstream=1)
+                text, input_tokens, output_tokens = call(get_llm_client(provider), prompt, system, model,
+                                                         max_tokens, self.timeout)
+            except Exception as e:
+                timed_out = isinstance(e, TimeoutError) or type(e).__name__ in ('APITimeoutError', 'DeadlineExceeded')
+                if timed_out:
+                    self._count(route, timeouts=1)
+                if attempt >= self.retries or not is_retryable(e):
+                    self._count(route, errors=1)
+                    if timed_out and not isinstance(e, LLMTimeoutError):
+                        raise LLMTimeoutError(f"{provider} did not answer within {self.timeout}s") from e
+                    raise
+                error = e
+            else:
+                self._count(route, input_tokens=input_tokens or estimate_tokens(f"{system or ''}{prompt}"),
+                            output_tokens=output_tokens or estimate_tokens(text))
+                return text
+            finally:
+                with self._lock:
+                    gate.in_flight -= 1
+                gate.slots.release()
+
+            # Full jitter: a random wait up to the exponential backoff, so throttled callers spread out
+            delay = random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+            attempt += 1
+            self._count(route, retries=1)
+            logger.warning(f"LLM call to {provider} failed ({type(error).__name__}: {error}); "
+                           f"retry {attempt}/{self.retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _gate(self, provider: str) -> ProviderGate:
+        with self._lock:
+            gate = self._gates.get(provider)
+            if gate is None:
+                gate = self._gates[provider] = ProviderGate(
+                    max_concurrent=int(_provider_setting(provider, 'MAX_CONCURRENT', 8)),
+                    rate=_provider_setting(provider, 'RATE', 5),
+                    burst=_provider_setting(provider, 'BURST', 10),
+                )
+            return gate
+
+    def _count(self, route: str, **counts: int) -> None:
+        with self._lock:
+            totals = self._routes.get(route)
+            if totals is None:
+                totals = self._routes[route] = dict.fromkeys(ROUTE_FIELDS, 0)
+            for field, value in counts.items():
+                totals[field] += value
+
+    def reset(self) -> None:
+        """Drop the provider gates and counters so limits are read from the environment again."""
+        with self._lock:
+            self._gates.clear()
+            self._routes.clear()
+        self.latency = HistogramSet()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-provider limits and load, and per-route counts, tokens and latency."""
+        with self._lock:
+            gates = dict(self._gates)
+            routes = {route: dict(totals) for route, totals in self._routes.items()}
+            in_flight = len(self._in_flight)
+        latency = self.latency.snapshot()
+        for route, totals in routes.items():
+            totals['latency'] = latency.get(route)
+        return {
+            'config': {
+                'timeout': self.timeout,
+                'retries': self.retries,
+                'retry_base': self.retry_base,
+                'retry_max': self.retry_max,
+                'queue_timeout': self.queue_timeout,
+            },
+            'in_flight_requests': in_flight,
+            'providers': {provider: gate.stats() for provider, gate in gates.items()},
+            'routes': routes,
+        }
+
+
+llm_gateway = LLMGateway(
+    timeout=float(os.environ.get('LLM_TIMEOUT', 120)),
+    retries=int(os.environ.get('LLM_RETRIES', 2)),
+    retry_base=float(os.environ.get('LLM_RETRY_BASE', 1.0)),
+    retry_max=float(os.environ.get('LLM_RETRY_MAX', 20)),
+    queue_timeout=float(os.environ.get('LLM_QUEUE_TIMEOUT', 60)),
+)
@@ -0,0 +1,151 @@
+"""Registry of LLM clients, built on first use.
+
+Importing this module loads no SDK and needs no API key. A client is created
+the first time ``get_llm_client`` asks for it:
+
+- ``gemini``: ``google.generativeai`` with ``GEMINI_API_KEY``;
+- ``anthropic``: ``anthropic.Anthropic`` with ``ANTHROPIC_API_KEY``;
+- ``fake``: ``services.llm_stub.FakeLLMClient``, which answers after
+  ``LLM_FAKE_LATENCY_MS`` (default 50) and fails ``LLM_FAKE_FAILURE_RATE``
+  of calls (default 0). It is meant for tests of the LLM gateway.
+
+A missing key or SDK raises ``LLMProviderUnavailable`` on that call only.
+The server still boots, and everything that does not generate text (auth,
+signaling, Tavus) keeps working. ``LLM_BACKEND=stub`` builds the offline
+clients from ``services.llm_stub`` instead.
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+CLAUDE_MODEL = 'claude-sonnet-4-20250514'
+
+
+class LLMProviderUnavailable(RuntimeError):
+    """Raised when a provider's API key or SDK is missing."""
+
+
+def _require_key(env_var: str) -> str:
+    api_key = os.environ.get(env_var)
+    if not api_key:
+        raise LLMProviderUnavailable(f"{env_var} environment variable is required")
+    return api_key
+
+
+def _import_sdk(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise LLMProviderUnavailable(f"{module} is not installed: {e}") from e
+
+
+def _gemini_client():
+    api_key = _require_key('GEMINI_API_KEY')
+    genai = _import_sdk('google.generativeai')
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+def _anthropic_client():
+    api_key = _require_key('ANTHROPIC_API_KEY')
+    return _import_sdk('anthropic').Anthropic(api_key=api_key)
+
+
+def _stub_gemini_client():
+    from services.llm_stub import StubGenerativeModel
+    return StubGenerativeModel(GEMINI_MODEL)
+
+
+def _stub_anthropic_client():
+    from services.llm_stub import StubAnthropicClient
+    return StubAnthropicClient()
+
+
+def _fake_client():
+    from services.llm_stub import FakeLLMClient
+    return FakeLLMClient(latency=float(os.environ.get('LLM_FAKE_LATENCY_MS', 50)) / 1000,
+                         failure_rate=float(os.environ.get('LLM_FAKE_FAILURE_RATE', 0)))
+
+
+class ProviderRegistry:
+    """Build each registered client once, on first use, and share it between threads."""
+
+    def __init__(self):
+        self._factories: Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]] = {}
+        self._clients: Dict[str, Any] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], stub_factory: Optional[Callable[[], Any]] = None) -> None:
+        """Register how to build a provider's client, replacing any client already built."""
+        with self._lock:
+            self._factories[name] = (factory, stub_factory or factory)
+            self._clients.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Return the client for ``name``, building it now if needed."""
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(name)
+            if client is not None:
+                return client
+            if name not in self._factories:
+                raise LLMProviderUnavailable(f"Unknown LLM provider {name!r}")
+            live, stub = self._factories[name]
+            started = time.perf_counter()
+            try:
+                client = (stub if llm_backend() == 'stub' else live)()
+            except LLMProviderUnavailable as e:
+                self._errors[name] = str(e)
+                raise
+            self._load_seconds[name] = time.perf_counter() - started
+            self._errors.pop(name, None)
+            self._clients[name] = client
+            logger.info(f"Loaded LLM provider {name} in {self._load_seconds[name] * 1000:.0f} ms")
+            return client
+
+    def reset(self) -> None:
+        """Forget built clients so the next call rebuilds them from the environment."""
+        with self._lock:
+            self._clients.clear()
+            self._load_seconds.clear()
+            self._errors.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': llm_backend(),
+                'providers': {
+                    name: {
+                        'loaded': name in self._clients,
+                        'load_ms': round(self._load_seconds[name] * 1000, 1) if name in self._load_seconds else None,
+                        'error': self._errors.get(name),
+                    }
+                    for name in self._factories
+                },
+            }
+
+
+def llm_backend() -> str:
+    return os.environ.get('LLM_BACKEND', 'live')
+
+
+llm_providers = ProviderRegistry()
+llm_providers.register('gemini', _gemini_client, _stub_gemini_client)
+llm_providers.register('anthropic', _anthropic_client, _stub_anthropic_client)
+llm_providers.register('fake', _fake_client)
+
+
+def get_llm_client(name: str) -> Any:
+    """Return the shared client of a registered provider; see ``ProviderRegistry.get``."""
+    return llm_providers.get(name)
@@ -0,0 +1,176 @@
+"""Deterministic offline stand-ins for the Gemini and Anthropic clients.
+
+Enabled with ``LLM_BACKEND=stub`` so the pipeline and the LLM response cache
+can be exercised without API keys or network access. Responses depend only on
+the prompt, so repeated calls return identical text.
+
+``FakeLLMClient`` is the ``fake`` provider of the LLM gateway. It answers
+after a set latency and fails a set fraction of calls, and it records how
+many calls ran at once. That lets the gateway's limits, retries and
+coalescing be checked without a real provider.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+
+class StubResponse:
+    """Mimic the ``.text`` attribute of a Gemini response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubContentBlock:
+    """Mimic a text content block of an Anthropic message."""
+
+    def __init__(self, text):
+        self.type = 'text'
+        self.text = text
+
+
+class StubMessage:
+    """Mimic the ``.content`` list of an Anthropic message."""
+
+    def __init__(self, text):
+        self.content = [StubContentBlock(text)]
+
+
+def _digest(prompt):
+    return hashlib.sha256(prompt.encode()).hexdigest()[:8]
+
+
+def _topic(prompt):
+    """Return the last non-empty line of a prompt, which holds the user input."""
+    lines = [line.strip() for line in prompt.strip().split('\n') if line.strip()]
+    return lines[-1] if lines else 'the topic'
+
+
+class StubGenerativeModel:
+    """Offline replacement for ``genai.GenerativeModel``."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        """Return a narration script, or quiz JSON when the prompt asks for one."""
+        self.calls += 1
+        digest = _digest(prompt)
+
+        match = re.search(r'generate (\d+) multiple choice questions', prompt)
+        if match:
+            questions = [
+                {
+                    "id": i + 1,
+                    "question": f"Stub question {i + 1} ({digest})?",
+                    "options": {"A": "First", "B": "Second", "C": "Third", "D": "Fourth"},
+                    "correct_answer": "ABCD"[i % 4],
+                    "explanation": f"Stub explanation {i + 1}."
+                }
+                for i in range(int(match.group(1)))
+            ]
+            return StubResponse(json.dumps({"questions": questions}))
+
+        topic = _topic(prompt)
+        return StubResponse(
+            f"[0:00] Let's think about {topic}. "
+            f"[0:10] Stub narration {digest} builds the intuition step by step. "
+            f"[0:20] And that is the key idea."
+        )
+
+
+class _StubMessages:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, model, max_tokens, messages, system=None, **kwargs):
+        """Return a minimal runnable Manim scene that writes the script text."""
+        self._client.calls += 1
+        prompt = messages[-1]['content']
+        digest = _digest(f"{model}\n{system}\n{prompt}")
+        script = prompt.split('Script:\n', 1)[-1].strip()
+        first_line = re.sub(r'\[\d+:\d+\]', '', script).strip().split('.')[0][:60]
+
+        code = (
+            "from manim import *\n"
+            "\n"
+            f"class StubScene{digest}(Scene):\n"
+            "    def construct(self):\n"
+            f"        text = Text({first_line!r}, font_size=32)\n"
+            "        self.play(Write(text))\n"
+            "        self.wait(1)\n"
+            "        self.play(FadeOut(text))\n"
+        )
+        return StubMessage(code)
+
+
+class StubAnthropicClient:
+    """Offline replacement for ``anthropic.Anthropic``."""
+
+    def __init__(self):
+        self.calls = 0
+        self.messages = _StubMessages(self)
+
+
+class FakeProviderError(Exception):
+    """Transient failure of the fake provider, shaped like an HTTP 503 from a real one."""
+
+    status_code = 503
+
+
+class FakeCompletion:
+    def __init__(self, text, input_tokens, output_tokens):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class FakeLLMClient:
+    """Provider for gateway tests that echoes a digest of the prompt after ``latency`` seconds."""
+
+    def __init__(self, latency=0.05, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, system=None, max_tokens=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self._random.random() < self.failure_rate
+        try:
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"Fake provider took longer than {timeout}s")
+            time.sleep(self.latency)
+            if fail:
+                with self._lock:
+                    self.failures += 1
+                raise FakeProviderError('Fake provider is temporarily unavailable')
+            digest = _digest(f"{system}\n{prompt}")
+            text = f"Fake response {digest} to: {_topic(prompt)}"
+            # Roughly four characters per token, as for English text
+            return FakeCompletion(text, len(f"{system or ''}{prompt}") // 4 + 1, len(text) // 4 + 1)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'failures': self.failures,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+            }
@@ -0,0 +1,244 @@
+"""Pool of long-lived worker processes that render Manim scenes.
+
+Each worker is a ``python -m services.manim_worker`` process that imports
+manim once at startup and then renders jobs sent over a socket pair, so a
+render no longer pays interpreter startup and the full manim import. Workers
+are recycled after a number of jobs or an age limit to bound memory growth,
+and a worker that crashes or times out is replaced.
+"""
+
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Worker:
+    """Parent-side handle for one worker process and the thread that feeds it."""
+
+    def __init__(self, pool: 'ManimWorkerPool', index: int):
+        self.pool = pool
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.busy = False
+        self.current_job: Optional[str] = None
+        self.jobs_done = 0
+        self.total_jobs = 0
+        self.recycles = 0
+        self.started_at = 0.0
+        self.thread = threading.Thread(target=self._loop, name=f'manim-worker-{index}', daemon=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'pid': self.process.pid if self.process else None,
+            'alive': self._alive(),
+            'busy': self.busy,
+            'current_job': self.current_job,
+            'jobs_since_start': self.jobs_done,
+            'total_jobs': self.total_jobs,
+            'recycles': self.recycles,
+            'uptime': round(time.time() - self.started_at, 1) if self.started_at else 0,
+        }
+
+    def _alive(self) -> bool:
+        return bool(self.process and self.process.poll() is None)
+
+    def _spawn(self) -> None:
+        # A fresh interpreter on the worker module, so the app's main module is never re-imported
+        parent_sock, child_sock = socket.socketpair()
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get('PYTHONPATH')]))
+        with child_sock:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'services.manim_worker', str(child_sock.fileno())],
+                pass_fds=(child_sock.fileno(),), env=env)
+        self.conn = Connection(parent_sock.detach())
+        self.jobs_done = 0
+        self.started_at = time.time()
+
+        # Wait for the worker to finish importing manim before handing it work
+        try:
+            if self.conn.poll(self.pool.startup_timeout):
+                self.conn.recv()
+            else:
+                logger.error(f"Manim worker {self.index} did not become ready in time")
+        except EOFError:
+            logger.error(f"Manim worker {self.index} exited during startup")
+
+    def _stop(self, graceful: bool = True) -> None:
+        if not self.process:
+            return
+        if graceful and self._alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        if self._alive():
+            self.process.kill()
+        self.process.wait()
+        self.conn.close()
+        self.process = None
+
+    def _recycle(self, reason: str, graceful: bool = True) -> None:
+        logger.info(f"Recycling manim worker {self.index}: {reason}")
+        self._stop(graceful=graceful)
+        self.recycles += 1
+        if not self.pool.closed:
+            self._spawn()
+
+    def _loop(self) -> None:
+        self._spawn()
+        while True:
+            item = self.pool.jobs.get()
+            if item is None:
+                break
+            job, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            self.busy = True
+            self.current_job = f"{os.path.basename(job['source_file'])}:{job['scene_class']}"
+            try:
+                future.set_result(self._execute(job))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self.busy = False
+                self.current_job = None
+                self.jobs_done += 1
+                self.total_jobs += 1
+
+            too_old = time.time() - self.started_at > self.pool.max_worker_age
+            if self.jobs_done >= self.pool.max_jobs_per_worker or too_old:
+                self._recycle('job or age limit reached')
+        self._stop()
+
+    def _execute(self, job: Dict[str, Any]) -> subprocess.CompletedProcess:
+        args = ['manim-pool', job['source_file'], job['scene_class']]
+        if not self._alive():
+            self._recycle('worker not running', graceful=False)
+
+        try:
+            self.conn.send(job)
+            if not self.conn.poll(job['timeout']):
+                self._recycle('render timed out', graceful=False)
+                raise subprocess.TimeoutExpired(args, job['timeout'])
+            _, result = self.conn.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            self._recycle(f'worker crashed ({e})', graceful=False)
+            return subprocess.CompletedProcess(args, -1, '', 'Manim worker exited unexpectedly')
+
+        return subprocess.CompletedProcess(args, result['returncode'], result['stdout'], result['stderr'])
+
+
+class ManimWorkerPool:
+    """Dispatch render jobs from a local queue to warm manim worker processes."""
+
+    def __init__(self, size: int = 2, max_jobs_per_worker: int = 25, max_worker_age: float = 3600,
+                 startup_timeout: float = 60, queue_timeout: float = 120):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_worker_age = max_worker_age
+        self.startup_timeout = startup_timeout
+        self.queue_timeout = queue_timeout
+        self.jobs: 'queue.Queue' = queue.Queue()
+        self.closed = False
+        self.workers: List[_Worker] = [_Worker(self, i) for i in range(size)]
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.thread.start()
+
+    def render(self, source_file: str, scene_class: str, quality: str = 'l', media_dir: Optional[str] = None,
+               output_file: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+               timeout: float = 120) -> subprocess.CompletedProcess:
+        """Render a scene on the next free worker and return a CompletedProcess-like result.
+
+        Raises ``subprocess.TimeoutExpired`` if the render exceeds ``timeout``,
+        or if no worker has picked the job up within ``queue_timeout`` plus
+        ``timeout`` seconds; the queued job is then dropped.
+        """
+        if self.closed:
+            raise RuntimeError("Manim worker pool is shut down")
+        future: Future = Future()
+        self.jobs.put(({
+            'source_file': os.path.abspath(source_file),
+            'scene_class': scene_class,
+            'quality': quality,
+            'media_dir': os.path.abspath(media_dir or os.path.join(os.path.dirname(source_file), 'media')),
+            'output_file': output_file,
+            'env': env or {},
+            'timeout': timeout,
+        }, future))
+        try:
+            return future.result(timeout=self.queue_timeout + timeout)
+        except FutureTimeout:
+            if future.cancel():
+                # Still queued; the worker skips cancelled jobs
+                raise subprocess.TimeoutExpired(['manim-pool', source_file, scene_class],
+                                                self.queue_timeout + timeout)
+        # A worker started it just now, and enforces ``timeout`` itself
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and per-worker busy state."""
+        workers = [worker.snapshot() for worker in self.workers]
+        return {
+            'size': self.size,
+            'queue_depth': self.jobs.qsize(),
+            'busy_workers': sum(1 for w in workers if w['busy']),
+            'max_jobs_per_worker': self.max_jobs_per_worker,
+            'max_worker_age': self.max_worker_age,
+            'queue_timeout': self.queue_timeout,
+            'workers': workers,
+        }
+
+    def shutdown(self) -> None:
+        self.closed = True
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.thread.join(timeout=10)
+
+
+_pool: Optional[ManimWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_manim_pool() -> Optional[ManimWorkerPool]:
+    """Return the shared worker pool, starting it on first use.
+
+    Returns None unless ``MANIM_WORKER_POOL`` is set to a positive worker count.
+    """
+    global _pool
+    size = int(os.environ.get('MANIM_WORKER_POOL', 0))
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ManimWorkerPool(
+                size=size,
+                max_jobs_per_worker=int(os.environ.get('MANIM_WORKER_MAX_JOBS', 25)),
+                max_worker_age=float(os.environ.get('MANIM_WORKER_MAX_AGE', 3600)),
+                queue_timeout=float(os.environ.get('MANIM_WORKER_QUEUE_TIMEOUT', 120)),
+            )
+            _pool.start()
+            logger.info(f"Started manim worker pool with {size} workers")
+        return _pool
@@ -0,0 +1,113 @@
+"""Run Manim renders on the CLI or the warm worker pool, reporting progress."""
+
+import os
+import re
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional
+from services.manim_pool import get_manim_pool
+
+# Manim draws one tqdm bar per animation, e.g. "Animation 3: Write(Text):  45%|####  | 27/60"
+PROGRESS_RE = re.compile(r'Animation (\d+)[^%\r\n]*?(\d+)%\|')
+ANIMATION_CALL_RE = re.compile(r'\bself\.(play|wait)\(')
+
+
+def count_animations(source: str) -> int:
+    """Estimate the number of animations a scene plays from its source code."""
+    return max(1, len(ANIMATION_CALL_RE.findall(source)))
+
+
+def run_manim(args: List[str], cwd: Optional[str] = None, timeout: float = 120, env=None,
+              total_animations: int = 1,
+              on_progress: Optional[Callable[[float], None]] = None) -> subprocess.CompletedProcess:
+    """Run a Manim command and return the completed process.
+
+    ``on_progress(percent)`` is called with the overall rendering percentage as
+    Manim's per-animation progress bars advance. Raises
+    ``subprocess.TimeoutExpired`` if the render takes longer than ``timeout``.
+    """
+    process = subprocess.Popen(
+        args,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    stdout_chunks: List[bytes] = []
+    stderr_chunks: List[bytes] = []
+    last_percent = [-1]
+
+    def report(chunk: str) -> None:
+        if not on_progress:
+            return
+        for match in PROGRESS_RE.finditer(chunk):
+            index, percent = int(match.group(1)), int(match.group(2))
+            overall = min(100.0, (index + percent / 100) / total_animations * 100)
+            if int(overall) > last_percent[0]:
+                last_percent[0] = int(overall)
+                on_progress(overall)
+
+    def drain(stream, chunks: List[bytes], parse: bool) -> None:
+        # tqdm redraws with carriage returns, so read whatever is available instead of lines
+        while True:
+            data = os.read(stream.fileno(), 4096)
+            if not data:
+                break
+            chunks.append(data)
+            if parse:
+                report(data.decode(errors='replace'))
+
+    readers = [
+        threading.Thread(target=drain, args=(process.stdout, stdout_chunks, False), daemon=True),
+        threading.Thread(target=drain, args=(process.stderr, stderr_chunks, True), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join(timeout=5)
+
+    stdout = b''.join(stdout_chunks).decode(errors='replace')
+    stderr = b''.join(stderr_chunks).decode(errors='replace')
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def render_scene(source_file: str, scene_class: str, quality: str = 'l', cwd: Optional[str] = None,
+                 media_dir: Optional[str] = None, output_file: Optional[str] = None,
+                 env_overrides: Optional[Dict[str, str]] = None, preview: bool = False,
+                 timeout: float = 120, total_animations: int = 1,
+                 on_progress: Optional[Callable[[float], None]] = None) -> subprocess.CompletedProcess:
+    """Render a scene on the warm worker pool if configured, else with the manim CLI.
+
+    ``env_overrides`` are set only for the duration of the render. Pool renders
+    never preview and do not report per-frame progress.
+    """
+    pool = get_manim_pool()
+    if pool:
+        return pool.render(
+            source_file,
+            scene_class,
+            quality=quality,
+            media_dir=media_dir or os.path.join(cwd or os.path.dirname(source_file), 'media'),
+            output_file=output_file,
+            env=env_overrides,
+            timeout=timeout,
+        )
+
+    args = ['manim', f"-{'p' if preview else ''}q{quality}"]
+    if output_file:
+        args += ['--output_file', output_file]
+    if media_dir:
+        args += ['--media_dir', media_dir]
+    args += [source_file, scene_class]
+
+    env = {**os.environ, **env_overrides} if env_overrides else None
+    return run_manim(args, cwd=cwd, timeout=timeout, env=env,
+                     total_animations=total_animations, on_progress=on_progress)
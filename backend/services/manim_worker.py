@@ -0,0 +1,77 @@
+"""Entry point of a manim worker process started by ``services.manim_pool``.
+
+    python -m services.manim_worker <fd>
+
+``fd`` is the worker's end of a socket pair inherited from the pool. The
+module imports only the standard library and manim, so a worker never
+imports the Flask app, its routes or ``.env``.
+"""
+
+import importlib.util
+import os
+import sys
+import traceback
+import uuid
+from multiprocessing.connection import Connection
+from typing import Any, Dict
+
+QUALITY_NAMES = {
+    'l': 'low_quality',
+    'm': 'medium_quality',
+    'h': 'high_quality',
+    'p': 'production_quality',
+    'k': 'fourk_quality',
+}
+
+
+def worker_main(conn: Connection) -> None:
+    """Pre-import manim, then render jobs from ``conn`` until told to stop."""
+    import manim  # noqa: F401 - warm the import before the first job
+    from manim import tempconfig
+
+    conn.send(('ready', os.getpid()))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        conn.send(('result', render_job(job, tempconfig)))
+
+
+def render_job(job: Dict[str, Any], tempconfig) -> Dict[str, Any]:
+    """Render one scene, restoring environment and config afterwards."""
+    saved_environ = dict(os.environ)
+    os.environ.update(job.get('env') or {})
+    try:
+        options = {
+            'quality': QUALITY_NAMES[job['quality']],
+            'media_dir': job['media_dir'],
+            'input_file': job['source_file'],
+            'preview': False,
+        }
+        if job.get('output_file'):
+            options['output_file'] = job['output_file']
+
+        with tempconfig(options):
+            # Import inside tempconfig so module-level config changes do not leak into later jobs
+            module_name = f"manim_job_{uuid.uuid4().hex}"
+            spec = importlib.util.spec_from_file_location(module_name, job['source_file'])
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+            scene = getattr(module, job['scene_class'])()
+            scene.render()
+            movie_path = str(scene.renderer.file_writer.movie_file_path)
+
+        return {'returncode': 0, 'stdout': f"File ready at {movie_path}", 'stderr': ''}
+    except Exception:
+        return {'returncode': 1, 'stdout': '', 'stderr': traceback.format_exc()}
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+
+if __name__ == '__main__':
+    worker_main(Connection(int(sys.argv[1])))
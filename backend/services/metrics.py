@@ -0,0 +1,80 @@
+"""In-process latency histograms for outbound calls and request handling."""
+
+import bisect
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+# Upper bounds of the histogram buckets in milliseconds; the last bucket is open-ended
+DEFAULT_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of call durations."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        """Record one call that took ``seconds``."""
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            if error:
+                self.errors += 1
+
+    def _percentile_locked(self, fraction: float) -> Optional[float]:
+        """Return the upper bound of the bucket holding the given fraction of calls."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets_ms[i] if i < len(self.buckets_ms) else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counts, mean/max and bucketed p50/p95/p99 in milliseconds."""
+        with self._lock:
+            labels = [f"le_{b}" for b in self.buckets_ms] + ['inf']
+            return {
+                'count': self.count,
+                'errors': self.errors,
+                'mean_ms': round(self.total_ms / self.count, 1) if self.count else None,
+                'max_ms': round(self.max_ms, 1),
+                'p50_ms': self._percentile_locked(0.5),
+                'p95_ms': self._percentile_locked(0.95),
+                'p99_ms': self._percentile_locked(0.99),
+                'buckets': dict(zip(labels, self._counts)),
+            }
+
+
+class HistogramSet:
+    """Named latency histograms, created on first use."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(self.buckets_ms)
+        histogram.observe(seconds, error=error)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histogram.snapshot() for name, histogram in sorted(histograms.items())}
@@ -0,0 +1,132 @@
+"""bcrypt password hashing for the auth routes, off the request threads.
+
+``BCRYPT_LOG_ROUNDS`` sets the cost factor for new hashes (default 12, as
+Flask-Bcrypt). Each step doubles the time per hash. Logins verify against the
+cost stored in the hash. When it is below the configured cost, the password is
+rehashed at the new cost, so raising the setting upgrades accounts as users
+log in.
+
+Hashing and verification run on ``PASSWORD_HASH_WORKERS`` processes (default:
+one per CPU; 0 hashes inline on the request thread). A login storm then keeps
+the CPUs busy in the workers rather than in the server process, which matters
+most under eventlet/gevent, where a hash computed inline stops every
+connection. At most ``PASSWORD_HASH_MAX_PENDING`` hashes (default 4 per worker)
+are queued or running at once. Requests beyond that wait up to
+``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds (default 10) and then fail with
+``HashingBusyError``.
+
+Workers come from a forkserver, so they are not forked from a threaded
+server; the forkserver imports the entry point module once when it starts.
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from flask_bcrypt import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+_ROUNDS_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Return the cost factor stored in a bcrypt hash, or None if it is not one."""
+    match = _ROUNDS_PATTERN.match(hashed or '')
+    return int(match.group(1)) if match else None
+
+
+def _hash(password: str, rounds: int) -> str:
+    return generate_password_hash(password, rounds).decode('utf-8')
+
+
+class PasswordHasher:
+    """Hash and verify passwords at a configured cost on a bounded process pool."""
+
+    def __init__(self, rounds: int = 12, workers: int = 0, max_pending: Optional[int] = None,
+                 queue_timeout: float = 10):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending or max(1, workers) * 4
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.hashes = 0
+        self.verifications = 0
+        self.rehashes = 0
+        self.rejected = 0
+
+    def hash(self, password: str) -> str:
+        """Return a bcrypt hash of ``password`` at the configured cost."""
+        self.hashes += 1
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, hashed: str, password: str) -> bool:
+        self.verifications += 1
+        return self._run(check_password_hash, hashed, password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether ``hashed`` was made at a lower cost than the configured one."""
+        rounds = hash_rounds(hashed)
+        return rounds is not None and rounds < self.rounds
+
+    def rehash(self, password: str) -> str:
+        """Hash a just-verified password again at the configured cost."""
+        self.rehashes += 1
+        return self.hash(password)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.rejected += 1
+            raise HashingBusyError(f"{self.max_pending} password hashes already pending")
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['flask_bcrypt'])
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                logger.info(f"Started {self.workers} password hashing workers (cost {self.rounds})")
+            return self._executor
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rounds': self.rounds,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'hashes': self.hashes,
+            'verifications': self.verifications,
+            'rehashes': self.rehashes,
+            'rejected': self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_LOG_ROUNDS', 12)),
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0)) or None,
+    queue_timeout=float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 10)),
+)
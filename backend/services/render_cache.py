@@ -0,0 +1,143 @@
+"""Content-addressed cache of rendered Manim videos."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """Map a hash of Manim source and render flags to an already rendered video.
+
+    Entries live in a JSON index under ``media_dir`` and point at the
+    ``media/videos/<stem>`` directory Manim wrote. When the total size of
+    cached directories exceeds ``max_bytes`` the least recently used entries
+    are evicted and their directories removed.
+    """
+
+    def __init__(self, media_dir: str, max_bytes: int):
+        self.media_dir = media_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(media_dir, 'render_cache.json')
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @staticmethod
+    def key_for(source: str, flags: str) -> str:
+        """Return the cache key for a Manim source file rendered with ``flags``."""
+        return hashlib.sha256(f"{flags}\n{source}".encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for ``key`` if its video is still on disk."""
+        with self._lock:
+            entries = self._load_locked()
+            entry = entries.get(key)
+            if entry and not os.path.exists(os.path.join(self.media_dir, entry['video_path'])):
+                logger.info(f"Dropping render cache entry {key[:12]} with missing video")
+                del entries[key]
+                self._save_locked()
+                entry = None
+
+            if not entry:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry['last_access'] = time.time()
+            self._save_locked()
+            return dict(entry)
+
+    def store(self, key: str, video_dir: str, entry: Dict[str, Any]) -> None:
+        """Record a freshly rendered video and evict old entries if over budget.
+
+        ``video_dir`` and ``entry['video_path']`` are relative to ``media_dir``.
+        """
+        with self._lock:
+            entries = self._load_locked()
+            now = time.time()
+            entries[key] = {
+                **entry,
+                'video_dir': video_dir,
+                'size': _tree_size(os.path.join(self.media_dir, video_dir)),
+                'created_at': now,
+                'last_access': now,
+            }
+            self._evict_locked(keep=key)
+            self._save_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size."""
+        with self._lock:
+            entries = self._load_locked()
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'size_bytes': sum(e.get('size', 0) for e in entries.values()),
+                'max_bytes': self.max_bytes,
+            }
+
+    def _evict_locked(self, keep: str) -> None:
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        entries = self._entries
+        total = sum(e.get('size', 0) for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = entries.pop(key)
+            total -= entry.get('size', 0)
+            self.evictions += 1
+            shutil.rmtree(os.path.join(self.media_dir, entry['video_dir']), ignore_errors=True)
+            logger.info(f"Evicted render cache entry {key[:12]} ({entry['video_dir']})")
+
+    def _load_locked(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with open(self.index_path) as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logger.error(f"Ignoring unreadable render cache index: {e}")
+                self._entries = {}
+        return self._entries
+
+    def _save_locked(self) -> None:
+        os.makedirs(self.media_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def _tree_size(path: str) -> int:
+    """Return the total size in bytes of all files under ``path``."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+_manim_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'manim_gens')
+render_cache = RenderCache(
+    media_dir=os.path.join(_manim_dir, 'media'),
+    max_bytes=int(os.environ.get('RENDER_CACHE_MAX_MB', 1024)) * 1024 * 1024,
+)
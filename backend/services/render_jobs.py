@@ -0,0 +1,235 @@
+"""Background job queue for long-running presentation renders and other slow work."""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept more pending work."""
+
+
+class JobFailed(Exception):
+    """Raised by a job function to fail with a structured error payload."""
+
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.details = details or {}
+
+
+class RenderJobQueue:
+    """Bounded worker pool that runs pipeline jobs and tracks their progress.
+
+    Job functions are called as ``fn(*args, progress=report, **kwargs)`` where
+    ``report(stage, percent=None, **data)`` records a progress update. Listeners
+    registered with ``add_listener`` receive every update as ``(job_id, event)``,
+    and the per-job event history can be followed with ``wait_for_events``.
+
+    A job function may return a ``concurrent.futures.Future`` instead of its
+    result, e.g. for work handed to an event loop; the job then stays running,
+    without holding a worker, until the future resolves.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20, max_retained: int = 200,
+                 name: str = 'render-job'):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Register a callback invoked with ``(job_id, event)`` on every update."""
+        self._listeners.append(callback)
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> str:
+        """Queue ``fn`` for execution and return the new job id."""
+        return self._submit(None, fn, args, kwargs)[0]
+
+    def submit_once(self, key: str, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> Tuple[str, bool]:
+        """Queue ``fn`` unless a job with the same ``key`` is still queued or running.
+
+        Returns the job id and whether a new job was created.
+        """
+        return self._submit(key, fn, args, kwargs)
+
+    def _submit(self, key: Optional[str], fn: Callable[..., Dict[str, Any]], args, kwargs) -> Tuple[str, bool]:
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job['key'] == key and job['status'] not in FINISHED_STATUSES:
+                        return job['id'], False
+
+            pending = sum(1 for job in self._jobs.values() if job['status'] == 'queued')
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{self.name} queue is full ({pending} jobs pending)")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'key': key,
+                'status': 'queued',
+                'stage': 'queued',
+                'progress': 0,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+                'details': None,
+            }
+            self._events[job_id] = []
+            self._prune_locked()
+            event = self._record_locked(job_id, {'status': 'queued', 'stage': 'queued', 'progress': 0})
+
+        self._deliver(job_id, event)
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id, True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of a job, or None if it is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait_for_events(self, job_id: str, after: int = 0,
+                        timeout: float = 15) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return events with an ``id`` greater than ``after`` and whether the job is finished.
+
+        Blocks for up to ``timeout`` seconds while no newer events exist.
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: len(self._events.get(job_id, ())) > after or self._finished_locked(job_id),
+                timeout=timeout,
+            )
+            events = list(self._events.get(job_id, ())[after:])
+            return events, self._finished_locked(job_id)
+
+    def _finished_locked(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        return job is None or job['status'] in FINISHED_STATUSES
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counts by status."""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'jobs': counts,
+        }
+
+    def _run(self, job_id: str, fn: Callable[..., Dict[str, Any]], args, kwargs) -> None:
+        """Execute a job on a worker thread and record its outcome."""
+        self._update(job_id, status='running', stage='started', started_at=time.time())
+
+        def report(stage: str, percent: Optional[float] = None, **data) -> None:
+            changes: Dict[str, Any] = {'stage': stage}
+            if percent is not None:
+                changes['progress'] = percent
+            self._update(job_id, data=data, **changes)
+
+        try:
+            result = fn(*args, progress=report, **kwargs)
+        except Exception as e:
+            self._fail(job_id, e)
+            return
+        if isinstance(result, Future):
+            # The work continues elsewhere; record the outcome when it resolves
+            result.add_done_callback(lambda done: self._complete(job_id, done))
+        else:
+            self._succeed(job_id, result)
+
+    def _complete(self, job_id: str, done: Future) -> None:
+        error = done.exception()
+        if error is not None:
+            self._fail(job_id, error)
+        else:
+            self._succeed(job_id, done.result())
+
+    def _succeed(self, job_id: str, result: Any) -> None:
+        self._update(job_id, status='succeeded', stage='done', progress=100,
+                     result=result, finished_at=time.time())
+
+    def _fail(self, job_id: str, error: BaseException) -> None:
+        if isinstance(error, JobFailed):
+            logger.error(f"{self.name} {job_id} failed: {error}")
+            self._update(job_id, status='failed', stage='failed', error=str(error),
+                         details=error.details, finished_at=time.time())
+        else:
+            logger.error(f"{self.name} {job_id} crashed", exc_info=error)
+            self._update(job_id, status='failed', stage='failed', error=str(error),
+                         finished_at=time.time())
+
+    def _update(self, job_id: str, data: Optional[Dict[str, Any]] = None, **changes) -> None:
+        """Apply changes to a job record and notify listeners."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(changes)
+            event = {
+                'status': job['status'],
+                'stage': job['stage'],
+                'progress': job['progress'],
+            }
+            if job['status'] == 'succeeded':
+                event['result'] = job['result']
+            elif job['status'] == 'failed':
+                event['error'] = job['error']
+            if data:
+                event.update(data)
+            event = self._record_locked(job_id, event)
+        self._deliver(job_id, event)
+
+    def _record_locked(self, job_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an event to the job history and wake ``wait_for_events`` callers."""
+        history = self._events[job_id]
+        event = {'id': len(history) + 1, 'time': time.time(), **event}
+        history.append(event)
+        self._changed.notify_all()
+        return event
+
+    def _deliver(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Deliver an event to all listeners, isolating listener failures."""
+        for callback in self._listeners:
+            try:
+                callback(job_id, event)
+            except Exception as e:
+                logger.error(f"{self.name} listener failed for {job_id}: {e}")
+
+    def _prune_locked(self) -> None:
+        """Drop the oldest finished jobs once more than ``max_retained`` are held."""
+        if len(self._jobs) <= self.max_retained:
+            return
+        finished = sorted(
+            (job for job in self._jobs.values() if job['status'] in FINISHED_STATUSES),
+            key=lambda job: job['finished_at'] or job['created_at'],
+        )
+        for job in finished[:len(self._jobs) - self.max_retained]:
+            del self._jobs[job['id']]
+            self._events.pop(job['id'], None)
+
+
+render_jobs = RenderJobQueue(
+    max_workers=int(os.environ.get('RENDER_WORKERS', 2)),
+    max_pending=int(os.environ.get('RENDER_MAX_PENDING', 20)),
+)
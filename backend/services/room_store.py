@@ -0,0 +1,250 @@
+"""Room membership and AI agent state for the ``/meet`` signaling namespace.
+
+``MemoryRoomStore`` keeps the state in this process, as the signaling
+handlers always did. ``SQLiteRoomStore`` keeps it in a SQLite database in WAL
+mode, so several worker processes (joined by a Socket.IO message queue) see
+the same rooms, and room agents survive a restart.
+
+A socket connection lives on exactly one worker, so each worker only ever
+changes membership for its own sids. The SQLite store therefore answers
+"which room is this sid in" for local sids from memory, and only room
+listings and agents are read from the database.
+"""
+
+import abc
+import atexit
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RoomStore(abc.ABC):
+    """Interface shared by the room state backends."""
+
+    @abc.abstractmethod
+    def join(self, room_id: str, sid: str) -> List[str]:
+        """Put ``sid`` in ``room_id`` (leaving any other room) and return the room's participants."""
+
+    @abc.abstractmethod
+    def leave(self, sid: str) -> Optional[str]:
+        """Remove ``sid`` from its room and return that room, or None if it was in none."""
+
+    @abc.abstractmethod
+    def room_of(self, sid: str) -> Optional[str]:
+        """Return the room ``sid`` is in, or None."""
+
+    @abc.abstractmethod
+    def participants(self, room_id: str) -> List[str]:
+        """Return the sids in ``room_id``."""
+
+    @abc.abstractmethod
+    def set_agent(self, room_id: str, agent_data: Dict[str, Any]) -> None:
+        """Record the AI agent of ``room_id``."""
+
+    @abc.abstractmethod
+    def get_agent(self, room_id: str) -> Optional[Dict[str, Any]]:
+        """Return the AI agent of ``room_id``, or None."""
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return room and participant counts."""
+
+
+class MemoryRoomStore(RoomStore):
+    """Room state in this process only."""
+
+    def __init__(self):
+        self._rooms: Dict[str, set] = defaultdict(set)
+        self._user_rooms: Dict[str, str] = {}
+        self._agents: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def join(self, room_id: str, sid: str) -> List[str]:
+        with self._lock:
+            self._remove(sid)
+            self._rooms[room_id].add(sid)
+            self._user_rooms[sid] = room_id
+            return list(self._rooms[room_id])
+
+    def leave(self, sid: str) -> Optional[str]:
+        with self._lock:
+            return self._remove(sid)
+
+    def _remove(self, sid: str) -> Optional[str]:
+        room_id = self._user_rooms.pop(sid, None)
+        if room_id is not None:
+            self._rooms[room_id].discard(sid)
+            # Clean up empty rooms
+            if not self._rooms[room_id]:
+                del self._rooms[room_id]
+        return room_id
+
+    def room_of(self, sid: str) -> Optional[str]:
+        return self._user_rooms.get(sid)
+
+    def participants(self, room_id: str) -> List[str]:
+        with self._lock:
+            return list(self._rooms.get(room_id, ()))
+
+    def set_agent(self, room_id: str, agent_data: Dict[str, Any]) -> None:
+        self._agents[room_id] = agent_data
+
+    def get_agent(self, room_id: str) -> Optional[Dict[str, Any]]:
+        return self._agents.get(room_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': 'memory', 'rooms': len(self._rooms), 'participants': len(self._user_rooms),
+                    'agents': len(self._agents)}
+
+
+class SQLiteRoomStore(RoomStore):
+    """Room state shared by every worker process using the same database file.
+
+    Each participant row records the worker (``host:pid``) that owns the
+    connection. When a worker starts it drops rows left behind by workers on
+    this host that are no longer running, and a worker that shuts down
+    cleanly removes its own rows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.node = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._local_rooms: Dict[str, str] = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS room_participants (
+                    sid TEXT PRIMARY KEY,
+                    room_id TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    joined_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS room_participants_room ON room_participants (room_id);
+                CREATE TABLE IF NOT EXISTS room_agents (
+                    room_id TEXT PRIMARY KEY,
+                    agent_data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            ''')
+        self.prune_dead_nodes()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in WAL mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def join(self, room_id: str, sid: str) -> List[str]:
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT OR REPLACE INTO room_participants (sid, room_id, node, joined_at) VALUES (?, ?, ?, ?)',
+                         (sid, room_id, self.node, time.time()))
+            rows = conn.execute('SELECT sid FROM room_participants WHERE room_id = ?', (room_id,)).fetchall()
+        self._local_rooms[sid] = room_id
+        return [row[0] for row in rows]
+
+    def leave(self, sid: str) -> Optional[str]:
+        room_id = self._local_rooms.pop(sid, None) or self.room_of(sid)
+        self._connection().execute('DELETE FROM room_participants WHERE sid = ?', (sid,))
+        return room_id
+
+    def room_of(self, sid: str) -> Optional[str]:
+        room_id = self._local_rooms.get(sid)
+        if room_id is not None:
+            return room_id
+        row = self._connection().execute('SELECT room_id FROM room_participants WHERE sid = ?', (sid,)).fetchone()
+        return row[0] if row else None
+
+    def participants(self, room_id: str) -> List[str]:
+        rows = self._connection().execute('SELECT sid FROM room_participants WHERE room_id = ?',
+                                          (room_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def set_agent(self, room_id: str, agent_data: Dict[str, Any]) -> None:
+        self._connection().execute(
+            'INSERT OR REPLACE INTO room_agents (room_id, agent_data, updated_at) VALUES (?, ?, ?)',
+            (room_id, json.dumps(agent_data), time.time()))
+
+    def get_agent(self, room_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute('SELECT agent_data FROM room_agents WHERE room_id = ?',
+                                         (room_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def prune_dead_nodes(self) -> int:
+        """Drop participants owned by workers on this host that are no longer running."""
+        conn = self._connection()
+        host = socket.gethostname()
+        dead = []
+        for (node,) in conn.execute('SELECT DISTINCT node FROM room_participants').fetchall():
+            node_host, _, pid = node.rpartition(':')
+            if node_host == host and node != self.node and not _pid_alive(int(pid)):
+                dead.append(node)
+        removed = 0
+        for node in dead:
+            removed += conn.execute('DELETE FROM room_participants WHERE node = ?', (node,)).rowcount
+        if removed:
+            logger.info(f"Removed {removed} participants left by stopped signaling workers")
+        return removed
+
+    def close(self) -> None:
+        """Remove this worker's participants, e.g. on a clean shutdown."""
+        self._connection().execute('DELETE FROM room_participants WHERE node = ?', (self.node,))
+        self._local_rooms.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        rooms, participants = conn.execute(
+            'SELECT COUNT(DISTINCT room_id), COUNT(*) FROM room_participants').fetchone()
+        agents = conn.execute('SELECT COUNT(*) FROM room_agents').fetchone()[0]
+        return {'backend': 'sqlite', 'path': self.path, 'node': self.node, 'rooms': rooms,
+                'participants': participants, 'local_participants': len(self._local_rooms), 'agents': agents}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_store: Optional[RoomStore] = None
+_store_lock = threading.Lock()
+
+
+def get_room_store() -> RoomStore:
+    """Return the room store selected by ``ROOM_STORE`` (``memory`` or ``sqlite``)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = os.environ.get('ROOM_STORE', 'memory').lower()
+            if backend == 'sqlite':
+                # Relative to the backend, so workers started from any directory share one file
+                path = os.environ.get('ROOM_STORE_PATH', os.path.join('instance', 'rooms.db'))
+                _store = SQLiteRoomStore(os.path.join(BACKEND_DIR, path))
+                atexit.register(_store.close)
+            elif backend == 'memory':
+                _store = MemoryRoomStore()
+            else:
+                raise ValueError(f"Unknown ROOM_STORE {backend!r}; expected 'memory' or 'sqlite'")
+        return _store
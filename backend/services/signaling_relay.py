@@ -0,0 +1,103 @@
+"""Relay bookkeeping for the ``/meet`` signaling namespace.
+
+``RoomEmitCounters`` counts, per room, the signaling messages received and
+the emits and deliveries the server made for them, so the cost of room-wide
+broadcasts versus targeted or batched relays is visible at
+``/api/meet/metrics``.
+
+``CandidateBatcher`` coalesces ICE candidates. Candidates from one sender to
+one destination (a peer or the whole room) that arrive within
+``ICE_BATCH_WINDOW_MS`` go out as one ``ice-candidates`` event. Clients
+must handle that event when batching is enabled.
+"""
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('received', 'emits', 'deliveries', 'targeted', 'broadcast', 'candidates', 'batches')
+
+
+class RoomEmitCounters:
+    """Thread-safe per-room counters of signaling traffic on this worker."""
+
+    def __init__(self, max_rooms: int = 1000):
+        self.max_rooms = max_rooms
+        self._rooms: Dict[str, Dict[str, int]] = {}
+        self._totals = dict.fromkeys(COUNTER_FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, room_id: str, **counts: int) -> None:
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                if len(self._rooms) >= self.max_rooms:
+                    # Forget the oldest room rather than grow without bound
+                    self._rooms.pop(next(iter(self._rooms)))
+                room = self._rooms[room_id] = dict.fromkeys(COUNTER_FIELDS, 0)
+            for field, value in counts.items():
+                room[field] += value
+                self._totals[field] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            rooms = {room_id: dict(room) for room_id, room in self._rooms.items()}
+            totals = dict(self._totals)
+        return {'totals': totals, 'rooms': rooms}
+
+
+class CandidateBatcher:
+    """Collect ICE candidates per (sender, destination) and flush them every ``window`` seconds.
+
+    ``send(sender, room_id, target, candidates)`` is called for each flushed
+    batch; ``target`` is None for candidates meant for the whole room.
+    A single background task flushes every pending batch once per window.
+    """
+
+    def __init__(self, socketio, window: float, send: Callable[[str, str, Optional[str], List[Any]], None]):
+        self.socketio = socketio
+        self.window = window
+        self._send = send
+        self._pending: Dict[Tuple[str, str, Optional[str]], List[Any]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._task = None
+
+    def add(self, sender: str, room_id: str, target: Optional[str], candidate: Any) -> None:
+        with self._lock:
+            self._pending[(sender, room_id, target)].append(candidate)
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+
+    def discard(self, sender: str) -> None:
+        """Drop the pending candidates of a sender that left."""
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == sender]:
+                del self._pending[key]
+
+    def flush(self) -> int:
+        """Send every pending batch now and return how many were sent."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(list)
+        for (sender, room_id, target), candidates in pending.items():
+            try:
+                self._send(sender, room_id, target, candidates)
+            except Exception as e:
+                logger.error(f"Error relaying ICE candidates from {sender}: {e}")
+        return len(pending)
+
+    def _run(self) -> None:
+        while True:
+            self.socketio.sleep(self.window)
+            self.flush()
+
+
+def ice_batch_window() -> float:
+    """Return the ICE candidate coalescing window in seconds (0 disables batching)."""
+    return max(0.0, float(os.environ.get('ICE_BATCH_WINDOW_MS', 0)) / 1000)
+
+
+signaling_counters = RoomEmitCounters()
@@ -0,0 +1,97 @@
+"""Socket.IO message queue configuration for running signaling on several workers.
+
+``SOCKETIO_MESSAGE_QUEUE`` selects the queue that relays emits between worker
+processes, so a message for a room reaches participants connected to any
+worker:
+
+- ``redis://...``, ``amqp://...`` and other URLs Flask-SocketIO understands
+  are passed through as ``message_queue`` (they need the matching client
+  package installed).
+- ``sqlite:///path/to/queue.db`` uses ``SQLiteQueueManager``, a local stand-in
+  that needs no extra service. It suits several workers on one host.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+from socketio import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SQLiteQueueManager(PubSubManager):
+    """Socket.IO client manager that relays messages through a SQLite table.
+
+    Publishing appends a row; every worker polls for rows newer than the last
+    one it saw, every ``poll_interval`` seconds while idle. Rows older than
+    ``retention`` seconds are deleted.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, url: str = 'sqlite:///instance/socketio-queue.db', channel: str = 'flask-socketio',
+                 write_only: bool = False, logger=None, json=None, poll_interval: float = 0.01,
+                 retention: float = 60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+        # Relative to the backend, so workers started from any directory share one file
+        self.path = os.path.join(BACKEND_DIR, path)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute('''
+            CREATE TABLE IF NOT EXISTS socketio_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        ''')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _publish(self, data):
+        self._connection().execute('INSERT INTO socketio_messages (channel, payload, created) VALUES (?, ?, ?)',
+                                   (self.channel, self.json.dumps(data), time.time()))
+
+    def _listen(self):
+        conn = self._connection()
+        # Only messages published after this worker started are relevant to it
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+        last_prune = time.monotonic()
+        while True:
+            rows = conn.execute('SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                                (last_id, self.channel)).fetchall()
+            for message_id, payload in rows:
+                last_id = message_id
+                yield payload
+            if time.monotonic() - last_prune > self.retention:
+                conn.execute('DELETE FROM socketio_messages WHERE created < ?', (time.time() - self.retention,))
+                last_prune = time.monotonic()
+            if not rows:
+                self.server.sleep(self.poll_interval)
+
+
+def socketio_queue_options() -> Dict[str, Any]:
+    """Return the SocketIO keyword arguments for ``SOCKETIO_MESSAGE_QUEUE``, if set."""
+    url = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+    if url.startswith('sqlite://'):
+        logger.info(f"Relaying Socket.IO messages through {url}")
+        return {'client_manager': SQLiteQueueManager(url)}
+    return {'message_queue': url}
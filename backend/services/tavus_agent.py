@@ -1,66 +1,347 @@
-"""Tavus AI Agent Service for video calls."""
+"""Tavus AI Agent Service for video calls.
+
+All agents share one pooled ``requests.Session`` so consecutive calls reuse
+keep-alive connections instead of opening a new TCP+TLS connection each time.
+Idempotent requests are retried with backoff on 429 and 5xx responses, and
+every call is timed into a per-endpoint latency histogram.
+
+Replica status, conversation metadata and the list of active conversations
+are cached for a short TTL, and ``handle_tavus_callback`` invalidates them as
+Tavus reports changes, so provisioning an agent normally needs only the
+conversation create call.
+"""
 
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from services.metrics import HistogramSet
+from services.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+ACTIVE_STATUSES = ('active', 'processing', 'connecting', 'in_progress')
+ENDED_EVENTS = ('conversation_ended', 'system.shutdown')
+
+latency = HistogramSet()
+replica_cache = TTLCache(ttl=float(os.environ.get('TAVUS_REPLICA_TTL', 300)), max_entries=100)
+conversation_cache = TTLCache(ttl=float(os.environ.get('TAVUS_CONVERSATION_TTL', 600)), max_entries=1000)
+# Active conversations per base URL, as last listed and then kept up to date locally
+active_conversations = TTLCache(ttl=float(os.environ.get('TAVUS_ACTIVE_LIST_TTL', 60)), max_entries=10)
+_active_keys: set = set()
+# Set when Tavus reports a conversation ended, so cleanup can stop waiting for it early
+_ended_events: Dict[str, threading.Event] = {}
+_ended_events_lock = threading.Lock()
+# Conversations held for later use (e.g. warm pool slots) that cleanup must not end
+_reserved_conversations: set = set()
+_callback_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_agent: Optional['TavusAgent'] = None
+_agent_lock = threading.Lock()
+
+
+class _TavusRetry(Retry):
+    """Retry idempotent methods on 429/5xx, and POST only on 429 since Tavus has not acted on it.
+
+    No single wait, from backoff or a ``Retry-After`` header, exceeds ``max_wait`` seconds.
+    """
+
+    def __init__(self, *args, max_wait: float = 30, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_wait = max_wait
+
+    def new(self, **kwargs):
+        kwargs.setdefault('max_wait', self.max_wait)
+        return super().new(**kwargs)
+
+    def get_backoff_time(self):
+        return min(super().get_backoff_time(), self.max_wait)
+
+    def parse_retry_after(self, retry_after):
+        return min(super().parse_retry_after(retry_after), self.max_wait)
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == 'POST':
+            return status_code == 429 and super().is_retry('GET', status_code, has_retry_after)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def session_config() -> Dict[str, Any]:
+    """Return the connection pool, timeout and retry settings read from the environment."""
+    return {
+        'pool_size': int(os.environ.get('TAVUS_POOL_SIZE', 10)),
+        'connect_timeout': float(os.environ.get('TAVUS_CONNECT_TIMEOUT', 5)),
+        'read_timeout': float(os.environ.get('TAVUS_READ_TIMEOUT', 30)),
+        'max_retries': int(os.environ.get('TAVUS_MAX_RETRIES', 3)),
+        'backoff_factor': float(os.environ.get('TAVUS_RETRY_BACKOFF', 0.5)),
+        'retry_max_wait': float(os.environ.get('TAVUS_RETRY_MAX_WAIT', 30)),
+    }
+
+
+def build_session(config: Optional[Dict[str, Any]] = None) -> requests.Session:
+    """Create a session with a bounded keep-alive pool and retry policy."""
+    config = config or session_config()
+    retry = _TavusRetry(
+        total=config['max_retries'],
+        backoff_factor=config['backoff_factor'],
+        max_wait=config['retry_max_wait'],
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    # pool_block caps open connections at pool_size; extra concurrent calls wait for a free one
+    adapter = HTTPAdapter(pool_connections=config['pool_size'], pool_maxsize=config['pool_size'], pool_block=True,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_tavus_session() -> requests.Session:
+    """Return the process-wide Tavus session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def get_tavus_agent() -> 'TavusAgent':
+    """Return a shared agent for ``TAVUS_API_KEY``, recreating it if the key changes."""
+    global _agent
+    api_key = os.getenv('TAVUS_API_KEY', '')
+    with _agent_lock:
+        if _agent is None or _agent.api_key != api_key:
+            _agent = TavusAgent(api_key)
+        return _agent
+
+
+def tavus_metrics() -> Dict[str, Any]:
+    """Return the session settings, cache counters and per-endpoint latency histograms."""
+    return {
+        'config': session_config(),
+        'base_url': os.environ.get('TAVUS_BASE_URL', 'https://tavusapi.com'),
+        'caches': {
+            'replicas': replica_cache.stats(),
+            'conversations': conversation_cache.stats(),
+            'active_conversations': active_conversations.stats(),
+        },
+        'endpoints': latency.snapshot(),
+    }
+
+
+def _update_active(base_url: Optional[str], conversation_id: str, conversation: Optional[Dict[str, Any]]) -> None:
+    """Add (or with ``conversation=None`` remove) a conversation in the cached active lists.
+
+    ``base_url=None`` removes it from every list.
+    """
+    def apply(current: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        updated = {cid: conv for cid, conv in current.items() if cid != conversation_id}
+        if conversation is not None:
+            updated[conversation_id] = conversation
+        return updated
+
+    # Updates keep the list's expiry so it is still re-read from Tavus every TAVUS_ACTIVE_LIST_TTL
+    for key in ([base_url] if base_url else list(_active_keys)):
+        active_conversations.update(key, apply)
+
+
+def _conversation_age(conversation: Dict[str, Any]) -> Optional[float]:
+    """Return seconds since a conversation was created, or None if unknown."""
+    created_at = conversation.get('created_at')
+    if not created_at:
+        return None
+    try:
+        created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created).total_seconds()
+
+
+def reserve_conversation(conversation_id: str) -> None:
+    """Exclude a conversation from ``cleanup_active_conversations``."""
+    _reserved_conversations.add(conversation_id)
+
+
+def release_conversation(conversation_id: str) -> None:
+    """Make a reserved conversation eligible for cleanup again."""
+    _reserved_conversations.discard(conversation_id)
+
+
+def add_callback_listener(callback: Callable[[Dict[str, Any]], None]) -> None:
+    """Register a callback invoked with every Tavus webhook payload."""
+    _callback_listeners.append(callback)
+
+
+def handle_tavus_callback(payload: Dict[str, Any]) -> None:
+    """Invalidate cached Tavus state described by a webhook payload and notify listeners."""
+    properties = payload.get('properties') or {}
+    conversation_id = payload.get('conversation_id')
+    if conversation_id:
+        conversation_cache.invalidate(conversation_id)
+        if payload.get('event_type') in ENDED_EVENTS:
+            _update_active(None, conversation_id, None)
+            with _ended_events_lock:
+                event = _ended_events.get(conversation_id)
+            if event:
+                event.set()
+
+    replica_id = payload.get('replica_id') or properties.get('replica_id')
+    if replica_id:
+        replica_cache.invalidate(replica_id)
+
+    for callback in _callback_listeners:
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.error(f"Tavus callback listener failed: {e}")
+
+
+def conversation_payload(replica_id: str, persona_instructions: str, custom_script: str,
+                         conversation_style: str) -> Dict[str, Any]:
+    """Build the create-conversation request body for a script with ``[m:ss]`` timestamps."""
+    # Remove bracketed timestamps for greeting
+    processed_script = re.sub(r"\[\d+:\d+\]", "", custom_script).strip()
+    # Compute pacing durations
+    pacing = re.findall(r"\[(\d+):(\d+)\]\s*([^\[]+)", custom_script)
+    pacing_instructions = []
+    for i in range(len(pacing) - 1):
+        m1, s1, txt = pacing[i]
+        m2, s2, _ = pacing[i+1]
+        start = int(m1) * 60 + int(s1)
+        end = int(m2) * 60 + int(s2)
+        duration = end - start
+        pacing_instructions.append(f"speak '{txt.strip()}' in {duration} seconds")
+    # Build conversational context
+    conversational_context = _build_conversational_context(persona_instructions, processed_script, conversation_style)
+    if pacing_instructions:
+        guidance = "PACE: " + "; ".join(pacing_instructions)
+        conversational_context = f"{conversational_context} | {guidance}" if conversational_context else guidance
+
+    # Prepare API data
+    data = {
+        "replica_id": replica_id,
+        "conversation_name": "SpurHacks Video Call",
+        "custom_greeting": processed_script,
+    }
+    if conversational_context:
+        data["conversational_context"] = conversational_context
+        logger.info(f"Using conversational context: {conversational_context}")
+    return data
+
+
+def _build_conversational_context(persona_instructions: str, custom_script: str, conversation_style: str) -> str:
+    context_parts = []
+    
+    # Add persona instructions first - this is the core identity
+    if persona_instructions:
+        context_parts.append(f"PERSONA: {persona_instructions}")
+    
+    # Add conversation style
+    if conversation_style and conversation_style != "friendly":
+        context_parts.append(f"STYLE: Be {conversation_style} in your responses.")
+    
+    # Note: The opening greeting is now handled by custom_greeting field
+    # This context is for ongoing conversation behavior
+    if custom_script:
+        context_parts.append(f"CONVERSATION_GUIDANCE: After your initial greeting, continue the conversation naturally based on the user's responses.")
+    
+    if context_parts:
+        full_context = " | ".join(context_parts)
+        logger.info(f"Built conversational context: {full_context}")
+        return full_context
+    
+    return ""
+
+
+def _remember_created(base_url: str, conversation: Dict[str, Any]) -> None:
+    """Cache a create response and add it to the active list."""
+    conversation_id = conversation.get('conversation_id')
+    if conversation_id:
+        # The create response carries the URL, so get_conversation_url needs no extra GET
+        conversation_cache.set(conversation_id, conversation)
+        _update_active(base_url, conversation_id, {'status': 'active', **conversation})
+
+
+def _store_active(base_url: str, conversations: List[Dict[str, Any]]) -> None:
+    """Replace the cached active list for ``base_url`` with a fresh listing."""
+    _active_keys.add(base_url)
+    active_conversations.set(base_url, {
+        conv['conversation_id']: conv for conv in conversations
+        if isinstance(conv, dict) and conv.get('conversation_id')
+        and conv.get('status') in ACTIVE_STATUSES
+    })
+
+
+def _cleanup_targets(conversations: List[Dict[str, Any]], older_than: Optional[float]) -> List[str]:
+    """Return the ids of unreserved active conversations that cleanup should end."""
+    targets = []
+    for conv in conversations:
+        if isinstance(conv, dict):
+            status = conv.get('status', '')
+            conv_id = conv.get('conversation_id', '')
+            
+            if status in ACTIVE_STATUSES and conv_id and conv_id not in _reserved_conversations:
+                if older_than is not None:
+                    age = _conversation_age(conv)
+                    if age is None or age < older_than:
+                        continue
+                logger.info(f"Ending conversation {conv_id} with status {status}")
+                targets.append(conv_id)
+    return targets
+
+
 class TavusAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, session: Optional[requests.Session] = None):
         self.api_key = api_key
-        self.base_url = "https://tavusapi.com"
+        self.base_url = (base_url or os.environ.get('TAVUS_BASE_URL', 'https://tavusapi.com')).rstrip('/')
         self.headers = {
             "x-api-key": api_key,  # Tavus uses x-api-key header
             "Content-Type": "application/json"
         }
+        self.session = session or get_tavus_session()
+        config = session_config()
+        self.timeout = (config['connect_timeout'], config['read_timeout'])
+
+    def _request(self, method: str, endpoint: str, path: str, **kwargs) -> requests.Response:
+        """Send a request on the shared session and record its latency under ``endpoint``."""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", headers=self.headers,
+                                            timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            latency.observe(endpoint, time.perf_counter() - started, error=True)
+            raise
+        latency.observe(endpoint, time.perf_counter() - started, error=response.status_code >= 400)
+        return response
     
     def create_conversation(self, replica_id: str = "r1a4e22fa0d9", persona_instructions: str = "Read the script at the start", custom_script: str = "...", conversation_style: str = "friendly") -> Optional[Dict[str, Any]]:
         """Create a conversational video with your specific replica and custom instructions."""
         try:
-            import re
-            # Remove bracketed timestamps for greeting
-            processed_script = re.sub(r"\[\d+:\d+\]", "", custom_script).strip()
-            # Compute pacing durations
-            pacing = re.findall(r"\[(\d+):(\d+)\]\s*([^\[]+)", custom_script)
-            pacing_instructions = []
-            for i in range(len(pacing) - 1):
-                m1, s1, txt = pacing[i]
-                m2, s2, _ = pacing[i+1]
-                start = int(m1) * 60 + int(s1)
-                end = int(m2) * 60 + int(s2)
-                duration = end - start
-                pacing_instructions.append(f"speak '{txt.strip()}' in {duration} seconds")
-            # Build conversational context
-            conversational_context = self._build_conversational_context(persona_instructions, processed_script, conversation_style)
-            if pacing_instructions:
-                guidance = "PACE: " + "; ".join(pacing_instructions)
-                conversational_context = f"{conversational_context} | {guidance}" if conversational_context else guidance
-
-            # Prepare API data
-            data = {
-                "replica_id": replica_id,
-                "conversation_name": "SpurHacks Video Call",
-                "custom_greeting": processed_script,
-            }
-            if conversational_context:
-                data["conversational_context"] = conversational_context
-                logger.info(f"Using conversational context: {conversational_context}")
+            data = conversation_payload(replica_id, persona_instructions, custom_script, conversation_style)
             
             logger.info(f"Creating conversation with data: {data}")
             
-            response = requests.post(
-                f"{self.base_url}/v2/conversations",
-                headers=self.headers,
-                json=data,
-                timeout=30
-            )
+            response = self._request('POST', 'POST /v2/conversations', "/v2/conversations", json=data)
             
             logger.info(f"Tavus conversation creation response: {response.status_code} - {response.text}")
             
             if response.status_code in [200, 201]:
-                return response.json()
+                conversation = response.json()
+                _remember_created(self.base_url, conversation)
+                return conversation
             else:
                 logger.error(f"Tavus conversation API error: {response.status_code} - {response.text}")
                 return None
@@ -71,65 +352,59 @@ class TavusAgent:
     
     def _build_conversational_context(self, persona_instructions: str, custom_script: str, conversation_style: str) -> str:
         """Build a comprehensive conversational context for the AI."""
-        context_parts = []
-        
-        # Add persona instructions first - this is the core identity
-        if persona_instructions:
-            context_parts.append(f"PERSONA: {persona_instructions}")
-        
-        # Add conversation style
-        if conversation_style and conversation_style != "friendly":
-            context_parts.append(f"STYLE: Be {conversation_style} in your responses.")
-        
-        # Note: The opening greeting is now handled by custom_greeting field
-        # This context is for ongoing conversation behavior
-        if custom_script:
-            context_parts.append(f"CONVERSATION_GUIDANCE: After your initial greeting, continue the conversation naturally based on the user's responses.")
-        
-        if context_parts:
-            full_context = " | ".join(context_parts)
-            logger.info(f"Built conversational context: {full_context}")
-            return full_context
-        
-        return ""
+        return _build_conversational_context(persona_instructions, custom_script, conversation_style)
     
-    def get_conversation_url(self, conversation_id: str) -> Optional[str]:
-        """Get the conversation URL for iframe embedding."""
+    def get_conversation(self, conversation_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Get conversation details, from the metadata cache when possible."""
+        if use_cache:
+            cached = conversation_cache.get(conversation_id)
+            if cached is not None:
+                return cached
+
         try:
-            # Get conversation details
-            response = requests.get(
-                f"{self.base_url}/v2/conversations/{conversation_id}",
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._request('GET', 'GET /v2/conversations/{id}', f"/v2/conversations/{conversation_id}")
             
             logger.info(f"Tavus conversation details response: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
-                # Return the conversation URL for iframe embedding
-                return data.get('conversation_url') or f"https://tavus.io/conversations/{conversation_id}"
+                conversation_cache.set(conversation_id, data)
+                return data
             else:
                 logger.error(f"Tavus conversation details API error: {response.status_code} - {response.text}")
                 return None
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error getting conversation URL: {e}")
+            logger.error(f"Error getting conversation details: {e}")
+            return None
+    
+    def get_conversation_url(self, conversation_id: str) -> Optional[str]:
+        """Get the conversation URL for iframe embedding."""
+        data = self.get_conversation(conversation_id)
+        if not data:
             return None
+        # Return the conversation URL for iframe embedding
+        return data.get('conversation_url') or f"https://tavus.io/conversations/{conversation_id}"
     
-    def test_replica(self, replica_id: str = "r1a4e22fa0d9") -> Optional[Dict[str, Any]]:
-        """Test if the specific replica is available and working."""
+    def test_replica(self, replica_id: str = "r1a4e22fa0d9", use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Test if the specific replica is available and working.
+
+        Successful checks are cached for ``TAVUS_REPLICA_TTL`` seconds.
+        """
+        if use_cache:
+            cached = replica_cache.get(replica_id)
+            if cached is not None:
+                return cached
+
         try:
-            response = requests.get(
-                f"{self.base_url}/v2/replicas/{replica_id}",
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._request('GET', 'GET /v2/replicas/{id}', f"/v2/replicas/{replica_id}")
             
             logger.info(f"Tavus replica test response: {response.status_code} - {response.text}")
             
             if response.status_code == 200:
-                return response.json()
+                replica = response.json()
+                replica_cache.set(replica_id, replica)
+                return replica
             else:
                 logger.error(f"Tavus replica test error: {response.status_code} - {response.text}")
                 return None
@@ -141,11 +416,7 @@ class TavusAgent:
     def get_replicas(self) -> Optional[Dict[str, Any]]:
         """Get available replicas."""
         try:
-            response = requests.get(
-                f"{self.base_url}/v2/replicas",
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._request('GET', 'GET /v2/replicas', "/v2/replicas")
             
             logger.info(f"Tavus replicas response: {response.status_code} - {response.text}")
             
@@ -170,39 +441,68 @@ class TavusAgent:
             "note": "Real conversation happens in the Tavus video interface"
         }
     
-    def get_active_conversations(self) -> Optional[Dict[str, Any]]:
-        """Get all active conversations."""
+    def get_active_conversations(self, use_cache: bool = False) -> Optional[Dict[str, Any]]:
+        """Get all active conversations.
+
+        With ``use_cache`` the list is served from the local copy, which is
+        refreshed from Tavus every ``TAVUS_ACTIVE_LIST_TTL`` seconds and kept
+        current by creates, ends and callbacks in between.
+        """
+        if use_cache:
+            cached = active_conversations.get(self.base_url)
+            if cached is not None:
+                return {'data': list(cached.values())}
+
+        data = self.list_conversations()
+        if data is not None:
+            _store_active(self.base_url, data['data'])
+        return data
+    
+    def list_conversations(self, page_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """List conversations across all pages as ``{'data': [...], 'total_count': n}``."""
+        page_size = page_size or int(os.environ.get('TAVUS_PAGE_SIZE', 100))
+        conversations: Dict[str, Dict[str, Any]] = {}
+        page = 1
         try:
-            response = requests.get(
-                f"{self.base_url}/v2/conversations",
-                headers=self.headers,
-                timeout=30
-            )
-            
-            logger.info(f"Tavus conversations response: {response.status_code}")
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Tavus conversations API error: {response.status_code} - {response.text}")
-                return None
+            while True:
+                response = self._request('GET', 'GET /v2/conversations', "/v2/conversations",
+                                         params={'limit': page_size, 'page': page})
+                
+                logger.info(f"Tavus conversations response (page {page}): {response.status_code}")
+                
+                if response.status_code != 200:
+                    logger.error(f"Tavus conversations API error: {response.status_code} - {response.text}")
+                    return None
+                
+                body = response.json()
+                items = [conv for conv in body.get('data', []) if isinstance(conv, dict)]
+                before = len(conversations)
+                for conv in items:
+                    conversations[conv.get('conversation_id') or f"unknown-{len(conversations)}"] = conv
+                
+                total = body.get('total_count')
+                # Stop on a short page, once the total is reached, or if the server ignores paging
+                if (len(items) < page_size or (total is not None and len(conversations) >= total)
+                        or len(conversations) == before):
+                    break
+                page += 1
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting conversations: {e}")
             return None
+        
+        return {'data': list(conversations.values()), 'total_count': len(conversations)}
     
     def end_conversation(self, conversation_id: str) -> bool:
         """End an active conversation."""
         try:
-            response = requests.delete(
-                f"{self.base_url}/v2/conversations/{conversation_id}",
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._request('DELETE', 'DELETE /v2/conversations/{id}', f"/v2/conversations/{conversation_id}")
             
             logger.info(f"Tavus end conversation response: {response.status_code} - {response.text}")
             
             if response.status_code in [200, 204]:
+                conversation_cache.invalidate(conversation_id)
+                _update_active(self.base_url, conversation_id, None)
                 return True
             else:
                 logger.error(f"Tavus end conversation API error: {response.status_code} - {response.text}")
@@ -212,40 +512,88 @@ class TavusAgent:
             logger.error(f"Error ending conversation: {e}")
             return False
     
-    def cleanup_active_conversations(self) -> int:
-        """End all active conversations to free up slots."""
+    def cleanup_active_conversations(self, wait: bool = False, older_than: Optional[float] = None,
+                                     use_cache: bool = True) -> int:
+        """End active conversations to free up slots and return how many were ended.
+
+        Conversations are ended concurrently, at most ``TAVUS_CLEANUP_CONCURRENCY``
+        at a time; reserved conversations are skipped. ``older_than`` limits
+        cleanup to conversations created more than that many seconds ago. With
+        ``wait`` the call returns once Tavus reports them ended (by polling or
+        callback), or after ``TAVUS_CLEANUP_WAIT`` seconds.
+        """
         try:
-            conversations_data = self.get_active_conversations()
+            conversations_data = self.get_active_conversations(use_cache=use_cache)
             if not conversations_data:
                 return 0
             
-            conversations = conversations_data.get('data', [])
-            ended_count = 0
+            targets = _cleanup_targets(conversations_data.get('data', []), older_than)
+            if not targets:
+                return 0
+            
+            if wait:
+                with _ended_events_lock:
+                    for conv_id in targets:
+                        _ended_events.setdefault(conv_id, threading.Event())
+            
+            concurrency = int(os.environ.get('TAVUS_CLEANUP_CONCURRENCY', 8))
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(targets)),
+                                    thread_name_prefix='tavus-cleanup') as executor:
+                results = list(executor.map(self.end_conversation, targets))
+            ended = [conv_id for conv_id, ok in zip(targets, results) if ok]
             
-            for conv in conversations:
-                if isinstance(conv, dict):
-                    status = conv.get('status', '')
-                    conv_id = conv.get('conversation_id', '')
-                    
-                    if status in ['active', 'processing', 'connecting', 'in_progress'] and conv_id:
-                        logger.info(f"Ending conversation {conv_id} with status {status}")
-                        if self.end_conversation(conv_id):
-                            ended_count += 1
-                        
-            return ended_count
+            if wait:
+                try:
+                    self.wait_until_ended(ended, timeout=float(os.environ.get('TAVUS_CLEANUP_WAIT', 5)))
+                finally:
+                    with _ended_events_lock:
+                        for conv_id in targets:
+                            _ended_events.pop(conv_id, None)
+            
+            return len(ended)
             
         except Exception as e:
             logger.error(f"Error cleaning up conversations: {e}")
             return 0
+    
+    def wait_until_ended(self, conversation_ids, timeout: float = 5, poll_interval: float = 0.25) -> bool:
+        """Wait until every conversation has ended; return False on timeout.
+
+        A conversation counts as ended once Tavus reports ``status: ended``
+        or the callback webhook delivers its end event.
+        """
+        deadline = time.monotonic() + timeout
+        pending = set(conversation_ids)
+        while pending:
+            for conv_id in list(pending):
+                with _ended_events_lock:
+                    event = _ended_events.get(conv_id)
+                if event and event.is_set():
+                    pending.discard(conv_id)
+                    continue
+                details = self.get_conversation(conv_id, use_cache=False)
+                if details is None or details.get('status') == 'ended':
+                    pending.discard(conv_id)
+            
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            # Sleep until the next poll, waking early if a callback reports the first pending end
+            with _ended_events_lock:
+                event = _ended_events.get(next(iter(pending)))
+            if event:
+                event.wait(min(poll_interval, remaining))
+            else:
+                time.sleep(min(poll_interval, remaining))
+        
+        if pending:
+            logger.warning(f"Conversations still active after {timeout}s: {sorted(pending)}")
+        return not pending
 
     def get_video_status(self, video_id: str) -> Optional[Dict[str, Any]]:
         """Get the status of a video."""
         try:
-            response = requests.get(
-                f"{self.base_url}/v2/videos/{video_id}",
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._request('GET', 'GET /v2/videos/{id}', f"/v2/videos/{video_id}")
             
             logger.info(f"Tavus video status response: {response.status_code} - {response.text}")
             
@@ -0,0 +1,353 @@
+"""Asyncio counterpart of ``TavusAgent`` built on ``httpx.AsyncClient``.
+
+``AsyncTavusAgent`` has the same methods as ``TavusAgent`` as coroutines, so
+many agent creations can wait on Tavus from one event loop instead of holding
+one OS thread each. It shares the sync client's settings, retry policy,
+latency histograms and caches, so both clients see each other's conversations
+and the callback webhook invalidates state for both.
+
+An ``httpx.AsyncClient`` belongs to the event loop it was first used on, so
+``get_async_tavus_agent`` keeps one agent per loop. ``run_tavus_coroutine``
+runs a coroutine on a shared background loop for code on WSGI/SocketIO
+threads that should not block while Tavus responds.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, Optional
+import httpx
+from services.tavus_agent import (
+    RETRY_STATUSES, _cleanup_targets, _ended_events, _ended_events_lock, _remember_created, _store_active,
+    _update_active, active_conversations, conversation_cache, conversation_payload, latency, replica_cache,
+    session_config,
+)
+
+logger = logging.getLogger(__name__)
+
+_agents: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTavusAgent]' = weakref.WeakKeyDictionary()
+_agents_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def build_async_client(config: Optional[Dict[str, Any]] = None) -> httpx.AsyncClient:
+    """Create an async client with the same connection cap and timeouts as the sync session."""
+    config = config or session_config()
+    limits = httpx.Limits(max_connections=config['pool_size'], max_keepalive_connections=config['pool_size'])
+    timeout = httpx.Timeout(config['read_timeout'], connect=config['connect_timeout'], pool=None)
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def get_async_tavus_agent() -> 'AsyncTavusAgent':
+    """Return the agent for the running event loop, recreating it if ``TAVUS_API_KEY`` changes."""
+    loop = asyncio.get_running_loop()
+    api_key = os.getenv('TAVUS_API_KEY', '')
+    with _agents_lock:
+        agent = _agents.get(loop)
+        if agent is None or agent.api_key != api_key:
+            agent = _agents[loop] = AsyncTavusAgent(api_key)
+        return agent
+
+
+def run_tavus_coroutine(coro: Coroutine) -> Future:
+    """Schedule ``coro`` on the shared background event loop and return its future."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='tavus-async', daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop)
+
+
+class AsyncTavusAgent:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
+        self.api_key = api_key
+        self.base_url = (base_url or os.environ.get('TAVUS_BASE_URL', 'https://tavusapi.com')).rstrip('/')
+        self.headers = {
+            "x-api-key": api_key,
+            "Content-Type": "application/json"
+        }
+        self.config = session_config()
+        self.client = client or build_async_client(self.config)
+        # Like pool_block on the sync session, requests beyond pool_size wait for a free
+        # connection. Waiting here rather than in httpx's pool, which slows down sharply
+        # once hundreds of requests are queued in it.
+        self._slots = asyncio.Semaphore(self.config['pool_size'])
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _request(self, method: str, endpoint: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request with the sync session's retry policy and record its latency under ``endpoint``.
+
+        GET and DELETE are retried on 429/5xx and transport errors; POST only on
+        429 or when the connection could not be opened, since Tavus has not
+        acted on it then.
+        """
+        started = time.perf_counter()
+        retries = self.config['max_retries']
+        attempt = 0
+        while True:
+            try:
+                async with self._slots:
+                    response = await self.client.request(method, f"{self.base_url}{path}", headers=self.headers,
+                                                         **kwargs)
+            except httpx.TransportError as e:
+                safe = method != 'POST' or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not safe or attempt >= retries:
+                    latency.observe(endpoint, time.perf_counter() - started, error=True)
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                retryable = response.status_code == 429 or (method != 'POST' and response.status_code in RETRY_STATUSES)
+                if not retryable or attempt >= retries:
+                    latency.observe(endpoint, time.perf_counter() - started, error=response.status_code >= 400)
+                    return response
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        # Capped like _TavusRetry, so one large Retry-After cannot stall the retries
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = self.config['backoff_factor'] * (2 ** attempt)
+        return min(delay, self.config['retry_max_wait'])
+
+    async def create_conversation(self, replica_id: str = "r1a4e22fa0d9", persona_instructions: str = "Read the script at the start", custom_script: str = "...", conversation_style: str = "friendly") -> Optional[Dict[str, Any]]:
+        """Create a conversational video with your specific replica and custom instructions."""
+        try:
+            data = conversation_payload(replica_id, persona_instructions, custom_script, conversation_style)
+            response = await self._request('POST', 'POST /v2/conversations', "/v2/conversations", json=data)
+
+            logger.info(f"Tavus conversation creation response: {response.status_code} - {response.text}")
+
+            if response.status_code in [200, 201]:
+                conversation = response.json()
+                _remember_created(self.base_url, conversation)
+                return conversation
+            logger.error(f"Tavus conversation API error: {response.status_code} - {response.text}")
+            return None
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error creating Tavus conversation: {e}")
+            return None
+
+    async def get_conversation(self, conversation_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Get conversation details, from the metadata cache when possible."""
+        if use_cache:
+            cached = conversation_cache.get(conversation_id)
+            if cached is not None:
+                return cached
+
+        try:
+            response = await self._request('GET', 'GET /v2/conversations/{id}', f"/v2/conversations/{conversation_id}")
+            if response.status_code == 200:
+                data = response.json()
+                conversation_cache.set(conversation_id, data)
+                return data
+            logger.error(f"Tavus conversation details API error: {response.status_code} - {response.text}")
+            return None
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting conversation details: {e}")
+            return None
+
+    async def get_conversation_url(self, conversation_id: str) -> Optional[str]:
+        """Get the conversation URL for iframe embedding."""
+        data = await self.get_conversation(conversation_id)
+        if not data:
+            return None
+        return data.get('conversation_url') or f"https://tavus.io/conversations/{conversation_id}"
+
+    async def test_replica(self, replica_id: str = "r1a4e22fa0d9", use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Test if the specific replica is available and working.
+
+        Successful checks are cached for ``TAVUS_REPLICA_TTL`` seconds.
+        """
+        if use_cache:
+            cached = replica_cache.get(replica_id)
+            if cached is not None:
+                return cached
+
+        try:
+            response = await self._request('GET', 'GET /v2/replicas/{id}', f"/v2/replicas/{replica_id}")
+            if response.status_code == 200:
+                replica = response.json()
+                replica_cache.set(replica_id, replica)
+                return replica
+            logger.error(f"Tavus replica test error: {response.status_code} - {response.text}")
+            return None
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error testing replica: {e}")
+            return None
+
+    async def get_replicas(self) -> Optional[Dict[str, Any]]:
+        """Get available replicas."""
+        try:
+            response = await self._request('GET', 'GET /v2/replicas', "/v2/replicas")
+            if response.status_code == 200:
+                return response.json()
+            logger.error(f"Tavus replicas API error: {response.status_code} - {response.text}")
+            return None
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting replicas: {e}")
+            return None
+
+    async def send_message(self, conversation_id: str, message: str) -> Optional[Dict[str, Any]]:
+        """Note: Tavus doesn't support direct message injection. This is for compatibility."""
+        return {
+            "success": True,
+            "message": "Message noted (Tavus handles conversation through video interface)",
+            "conversation_id": conversation_id,
+            "note": "Real conversation happens in the Tavus video interface"
+        }
+
+    async def get_active_conversations(self, use_cache: bool = False) -> Optional[Dict[str, Any]]:
+        """Get all active conversations, from the shared active list when ``use_cache`` is set."""
+        if use_cache:
+            cached = active_conversations.get(self.base_url)
+            if cached is not None:
+                return {'data': list(cached.values())}
+
+        data = await self.list_conversations()
+        if data is not None:
+            _store_active(self.base_url, data['data'])
+        return data
+
+    async def list_conversations(self, page_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """List conversations across all pages as ``{'data': [...], 'total_count': n}``."""
+        page_size = page_size or int(os.environ.get('TAVUS_PAGE_SIZE', 100))
+        conversations: Dict[str, Dict[str, Any]] = {}
+        page = 1
+        try:
+            while True:
+                response = await self._request('GET', 'GET /v2/conversations', "/v2/conversations",
+                                               params={'limit': page_size, 'page': page})
+                if response.status_code != 200:
+                    logger.error(f"Tavus conversations API error: {response.status_code} - {response.text}")
+                    return None
+
+                body = response.json()
+                items = [conv for conv in body.get('data', []) if isinstance(conv, dict)]
+                before = len(conversations)
+                for conv in items:
+                    conversations[conv.get('conversation_id') or f"unknown-{len(conversations)}"] = conv
+
+                total = body.get('total_count')
+                # Stop on a short page, once the total is reached, or if the server ignores paging
+                if (len(items) < page_size or (total is not None and len(conversations) >= total)
+                        or len(conversations) == before):
+                    break
+                page += 1
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting conversations: {e}")
+            return None
+
+        return {'data': list(conversations.values()), 'total_count': len(conversations)}
+
+    async def end_conversation(self, conversation_id: str) -> bool:
+        """End an active conversation."""
+        try:
+            response = await self._request('DELETE', 'DELETE /v2/conversations/{id}',
+                                           f"/v2/conversations/{conversation_id}")
+            if response.status_code in [200, 204]:
+                conversation_cache.invalidate(conversation_id)
+                _update_active(self.base_url, conversation_id, None)
+                return True
+            logger.error(f"Tavus end conversation API error: {response.status_code} - {response.text}")
+            return False
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error ending conversation: {e}")
+            return False
+
+    async def cleanup_active_conversations(self, wait: bool = False, older_than: Optional[float] = None,
+                                           use_cache: bool = True) -> int:
+        """End active conversations to free up slots and return how many were ended.
+
+        Behaves like ``TavusAgent.cleanup_active_conversations``, with the
+        concurrent ends bounded by a semaphore instead of a thread pool.
+        """
+        try:
+            conversations_data = await self.get_active_conversations(use_cache=use_cache)
+            if not conversations_data:
+                return 0
+
+            targets = _cleanup_targets(conversations_data.get('data', []), older_than)
+            if not targets:
+                return 0
+
+            if wait:
+                with _ended_events_lock:
+                    for conv_id in targets:
+                        _ended_events.setdefault(conv_id, threading.Event())
+
+            semaphore = asyncio.Semaphore(int(os.environ.get('TAVUS_CLEANUP_CONCURRENCY', 8)))
+
+            async def end(conv_id: str) -> bool:
+                async with semaphore:
+                    return await self.end_conversation(conv_id)
+
+            results = await asyncio.gather(*(end(conv_id) for conv_id in targets))
+            ended = [conv_id for conv_id, ok in zip(targets, results) if ok]
+
+            if wait:
+                try:
+                    await self.wait_until_ended(ended, timeout=float(os.environ.get('TAVUS_CLEANUP_WAIT', 5)))
+                finally:
+                    with _ended_events_lock:
+                        for conv_id in targets:
+                            _ended_events.pop(conv_id, None)
+
+            return len(ended)
+
+        except Exception as e:
+            logger.error(f"Error cleaning up conversations: {e}")
+            return 0
+
+    async def wait_until_ended(self, conversation_ids, timeout: float = 5, poll_interval: float = 0.25) -> bool:
+        """Wait until every conversation has ended; return False on timeout."""
+        deadline = time.monotonic() + timeout
+        pending = set(conversation_ids)
+        while pending:
+            for conv_id in list(pending):
+                with _ended_events_lock:
+                    event = _ended_events.get(conv_id)
+                if event and event.is_set():
+                    pending.discard(conv_id)
+                    continue
+                details = await self.get_conversation(conv_id, use_cache=False)
+                if details is None or details.get('status') == 'ended':
+                    pending.discard(conv_id)
+
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            await asyncio.sleep(min(poll_interval, remaining))
+
+        if pending:
+            logger.warning(f"Conversations still active after {timeout}s: {sorted(pending)}")
+        return not pending
+
+    async def get_video_status(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Get the status of a video."""
+        try:
+            response = await self._request('GET', 'GET /v2/videos/{id}', f"/v2/videos/{video_id}")
+            if response.status_code == 200:
+                return response.json()
+            logger.error(f"Tavus video status API error: {response.status_code} - {response.text}")
+            return None
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting video status: {e}")
+            return None
@@ -0,0 +1,273 @@
+"""Warm pool of pre-created Tavus conversations.
+
+Tavus fixes a conversation's greeting and context when it is created, so
+slots are kept per conversation profile (persona, script and style). The
+pool keeps generic slots for the default tutor profile between a low and a
+high watermark. It also pre-creates slots for scripts that are likely to be
+requested soon, such as a presentation script that was just generated. When
+``request-ai-agent`` arrives for a profile with an idle slot, that slot is
+bound to the room without any Tavus round trip.
+
+Idle slots are ended after ``max_idle`` seconds, before Tavus would close
+them for having no participant. Held slots are reserved so conversation
+cleanup leaves them alone.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from typing import Any, Deque, Dict, Optional, Tuple
+from services.tavus_agent import (
+    ENDED_EVENTS, add_callback_listener, get_tavus_agent, release_conversation, reserve_conversation,
+)
+
+logger = logging.getLogger(__name__)
+
+ConversationProfile = namedtuple('ConversationProfile', 'persona_instructions custom_script conversation_style')
+
+
+def profile_key(profile: ConversationProfile) -> str:
+    return hashlib.sha256('\n'.join(profile).encode()).hexdigest()
+
+
+class ConversationPool:
+    """Keep Tavus conversations provisioned ahead of demand.
+
+    Generic slots for ``default_profile`` are refilled up to ``high_watermark``
+    once fewer than ``low_watermark`` are idle. ``prepare`` queues
+    ``per_script`` slots for a specific script. The pool never holds more than
+    ``high_watermark`` idle slots in total; a prepared script displaces the
+    oldest generic slot when the pool is full.
+    """
+
+    def __init__(self, default_profile: ConversationProfile, replica_id: str, low_watermark: int = 1,
+                 high_watermark: int = 2, max_idle: float = 240, per_script: int = 1):
+        self.default_profile = default_profile
+        self.default_key = profile_key(default_profile)
+        self.replica_id = replica_id
+        self.low_watermark = low_watermark
+        self.high_watermark = max(high_watermark, low_watermark)
+        self.max_idle = max_idle
+        self.per_script = per_script
+        self._idle: Dict[str, Deque[Tuple[float, Dict[str, Any]]]] = {}
+        self._wanted: 'OrderedDict[str, Tuple[ConversationProfile, int]]' = OrderedDict()
+        self._refilling = True
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counters = {'hits': 0, 'misses': 0, 'created': 0, 'create_failures': 0, 'expired': 0, 'ended_remotely': 0}
+
+    # Public API
+
+    def start(self) -> None:
+        add_callback_listener(self._on_callback)
+        self._thread = threading.Thread(target=self._loop, name='tavus-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self, end_slots: bool = True) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        if end_slots:
+            with self._lock:
+                slots = [conv for queue in self._idle.values() for _, conv in queue]
+                self._idle.clear()
+            for conversation in slots:
+                self._end(conversation)
+
+    def profile_for(self, custom_script: Optional[str]) -> ConversationProfile:
+        """Return the default tutor profile with ``custom_script`` as its script."""
+        if not custom_script:
+            return self.default_profile
+        return self.default_profile._replace(custom_script=custom_script)
+
+    def prepare(self, custom_script: str) -> None:
+        """Pre-create slots for a script that is likely to be requested soon."""
+        profile = self.profile_for(custom_script)
+        key = profile_key(profile)
+        with self._lock:
+            if key == self.default_key or key in self._wanted or self._idle.get(key):
+                return
+            self._wanted[key] = (profile, self.per_script)
+        self._wake.set()
+
+    def acquire(self, profile: ConversationProfile) -> Optional[Dict[str, Any]]:
+        """Take an idle conversation created for ``profile``, or return None on a miss."""
+        key = profile_key(profile)
+        now = time.monotonic()
+        conversation = None
+        with self._lock:
+            queue = self._idle.get(key)
+            while queue:
+                created, candidate = queue.popleft()
+                if now - created < self.max_idle:
+                    conversation = candidate
+                    break
+            if queue is not None and not queue:
+                del self._idle[key]
+            self._wanted.pop(key, None)
+            self.counters['hits' if conversation else 'misses'] += 1
+        # Let the refill thread top the pool back up
+        self._wake.set()
+        if conversation:
+            release_conversation(conversation['conversation_id'])
+        return conversation
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else None,
+                'idle': sum(len(queue) for queue in self._idle.values()),
+                'idle_default': len(self._idle.get(self.default_key, ())),
+                'pending_scripts': len(self._wanted),
+                'low_watermark': self.low_watermark,
+                'high_watermark': self.high_watermark,
+                'max_idle': self.max_idle,
+            }
+
+    # Refill thread
+
+    def _loop(self) -> None:
+        interval = max(1.0, min(30.0, self.max_idle / 4))
+        while not self._stop.is_set():
+            try:
+                self._expire()
+                self._fill()
+            except Exception as e:
+                logger.error(f"Tavus conversation pool maintenance failed: {e}")
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def _expire(self) -> None:
+        """End idle slots that are about to be closed by Tavus anyway."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key in list(self._idle):
+                queue = self._idle[key]
+                while queue and now - queue[0][0] >= self.max_idle:
+                    expired.append(queue.popleft()[1])
+                if not queue:
+                    del self._idle[key]
+            self.counters['expired'] += len(expired)
+        for conversation in expired:
+            self._end(conversation)
+
+    def _next_profile(self) -> Tuple[Optional[ConversationProfile], Optional[Dict[str, Any]]]:
+        """Pick the profile to create a slot for next, applying the watermarks.
+
+        Returns ``(profile, evicted)`` where ``evicted`` is a generic slot to
+        end to make room for a prepared script.
+        """
+        evicted = None
+        with self._lock:
+            total = sum(len(queue) for queue in self._idle.values())
+            default_queue = self._idle.get(self.default_key)
+            if total >= self.high_watermark and self._wanted and default_queue:
+                evicted = default_queue.popleft()[1]
+                if not default_queue:
+                    del self._idle[self.default_key]
+                total -= 1
+            if total >= self.high_watermark:
+                self._refilling = False
+                return None, evicted
+            # Scripts expected to be requested soon come before generic slots
+            if self._wanted:
+                key, (profile, remaining) = next(iter(self._wanted.items()))
+                if remaining <= 1:
+                    del self._wanted[key]
+                else:
+                    self._wanted[key] = (profile, remaining - 1)
+                return profile, evicted
+            default_idle = len(self._idle.get(self.default_key, ()))
+            if default_idle < self.low_watermark:
+                self._refilling = True
+            return (self.default_profile if self._refilling else None), evicted
+
+    def _fill(self) -> None:
+        while not self._stop.is_set():
+            profile, evicted = self._next_profile()
+            if evicted:
+                self._end(evicted)
+            if profile is None:
+                return
+            conversation = self._create(profile)
+            if conversation is None:
+                # Tavus refused (e.g. concurrency limit); try again on the next cycle
+                return
+            with self._lock:
+                self._idle.setdefault(profile_key(profile), deque()).append((time.monotonic(), conversation))
+
+    def _create(self, profile: ConversationProfile) -> Optional[Dict[str, Any]]:
+        agent = get_tavus_agent()
+        if not agent.api_key or not agent.test_replica(self.replica_id):
+            with self._lock:
+                self.counters['create_failures'] += 1
+            return None
+        conversation = agent.create_conversation(
+            replica_id=self.replica_id,
+            persona_instructions=profile.persona_instructions,
+            custom_script=profile.custom_script,
+            conversation_style=profile.conversation_style,
+        )
+        with self._lock:
+            self.counters['created' if conversation else 'create_failures'] += 1
+        if conversation:
+            reserve_conversation(conversation['conversation_id'])
+        return conversation
+
+    def _end(self, conversation: Dict[str, Any]) -> None:
+        release_conversation(conversation['conversation_id'])
+        get_tavus_agent().end_conversation(conversation['conversation_id'])
+
+    def _on_callback(self, payload: Dict[str, Any]) -> None:
+        """Drop slots that Tavus reports as ended."""
+        if payload.get('event_type') not in ENDED_EVENTS:
+            return
+        conversation_id = payload.get('conversation_id')
+        with self._lock:
+            for key in list(self._idle):
+                queue = self._idle[key]
+                kept = deque(item for item in queue if item[1].get('conversation_id') != conversation_id)
+                if len(kept) != len(queue):
+                    self.counters['ended_remotely'] += 1
+                    release_conversation(conversation_id)
+                if kept:
+                    self._idle[key] = kept
+                else:
+                    del self._idle[key]
+        self._wake.set()
+
+
+_pool: Optional[ConversationPool] = None
+
+
+def start_conversation_pool(default_profile: ConversationProfile) -> Optional[ConversationPool]:
+    """Start the warm pool when ``TAVUS_WARM_POOL`` is enabled."""
+    global _pool
+    if os.environ.get('TAVUS_WARM_POOL', '0').lower() not in ('1', 'true', 'yes'):
+        return None
+    if _pool is None:
+        _pool = ConversationPool(
+            default_profile,
+            replica_id=os.getenv('TAVUS_REPLICA_ID', 'r1a4e22fa0d9'),
+            low_watermark=int(os.environ.get('TAVUS_WARM_POOL_LOW', 1)),
+            high_watermark=int(os.environ.get('TAVUS_WARM_POOL_HIGH', 2)),
+            max_idle=float(os.environ.get('TAVUS_WARM_POOL_MAX_IDLE', 240)),
+            per_script=int(os.environ.get('TAVUS_WARM_POOL_PER_SCRIPT', 1)),
+        )
+        _pool.start()
+        logger.info(f"Started Tavus conversation pool ({_pool.low_watermark}-{_pool.high_watermark} slots)")
+    return _pool
+
+
+def get_conversation_pool() -> Optional[ConversationPool]:
+    """Return the warm pool, or None if it is disabled."""
+    return _pool
@@ -0,0 +1,99 @@
+"""Background reaper that ends stale Tavus conversations.
+
+Running cleanup on a timer keeps conversation slots free without making agent
+provisioning list and end conversations inline on the request path.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from services.tavus_agent import get_tavus_agent
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationReaper:
+    """Periodically end active conversations older than ``max_age`` seconds."""
+
+    def __init__(self, interval: float = 60, max_age: float = 1800):
+        self.interval = interval
+        self.max_age = max_age
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.ended = 0
+        self.errors = 0
+        self.last_run: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='tavus-reaper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def run_once(self) -> int:
+        """End stale conversations now and return how many were ended."""
+        agent = get_tavus_agent()
+        if not agent.api_key:
+            return 0
+        # Always list from Tavus here; this also refreshes the cached active list
+        ended = agent.cleanup_active_conversations(older_than=self.max_age, use_cache=False)
+        self.runs += 1
+        self.ended += ended
+        self.last_run = time.time()
+        if ended:
+            logger.info(f"Tavus reaper ended {ended} stale conversations")
+        return ended
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Tavus reaper run failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'max_age': self.max_age,
+            'runs': self.runs,
+            'ended': self.ended,
+            'errors': self.errors,
+            'last_run': self.last_run,
+        }
+
+
+_reaper: Optional[ConversationReaper] = None
+
+
+def start_conversation_reaper() -> Optional[ConversationReaper]:
+    """Start the reaper when ``TAVUS_REAPER_INTERVAL`` is a positive number of seconds."""
+    global _reaper
+    interval = float(os.environ.get('TAVUS_REAPER_INTERVAL', 0))
+    if interval <= 0:
+        return None
+    if _reaper is None:
+        _reaper = ConversationReaper(interval=interval,
+                                     max_age=float(os.environ.get('TAVUS_REAPER_MAX_AGE', 1800)))
+    _reaper.start()
+    logger.info(f"Started Tavus conversation reaper every {interval}s")
+    return _reaper
+
+
+def get_conversation_reaper() -> Optional[ConversationReaper]:
+    """Return the running reaper, or None if it is disabled."""
+    return _reaper if _reaper and _reaper.running else None
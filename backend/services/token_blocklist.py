@@ -0,0 +1,129 @@
+"""Revoked JWTs shared by every worker through the application database.
+
+Logout stores the token's ``jti`` in the ``revoked_token`` table until the
+token's own ``exp``, so the blocklist no longer grows forever and every
+worker process (and host, with a shared ``DATABASE_URL``) sees the same
+revocations.
+
+``check_if_token_is_revoked`` runs on every JWT-protected request. To keep
+the common "not revoked" answer free of database I/O, each process mirrors the
+unexpired revocations in memory. At most once every ``TOKEN_BLOCKLIST_SYNC``
+seconds (default 1), it pulls the rows revoked since its previous sync. A token
+revoked by another worker is therefore rejected here within that interval;
+one revoked by this process is rejected at once.
+
+Rows are matched by ``revoked_at`` rather than by id, because ids need not
+commit in order on a server database. Each sync re-reads rows up to
+``TOKEN_BLOCKLIST_SYNC_OVERLAP`` seconds (default 60) older than the previous
+sync, so a revocation whose commit was slow, or whose host clock is a little
+behind, is still picked up.
+
+Syncs and purges use their own database connection, so they never touch the
+session of the request being authenticated.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from models.account import RevokedToken, db
+
+logger = logging.getLogger(__name__)
+
+# Tokens without an exp claim are kept this long
+DEFAULT_TTL = 24 * 3600
+
+
+class TokenBlocklist:
+    """Database-backed JWT blocklist with an in-process mirror. Needs an app context."""
+
+    def __init__(self, sync_interval: float = 1.0, purge_interval: float = 600, sync_overlap: float = 60):
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.sync_overlap = sync_overlap
+        self._revoked: Dict[str, float] = {}
+        # Wall-clock time of the last sync; None until the first one reads every unexpired row
+        self._synced_at: Optional[float] = None
+        self._next_sync = 0.0
+        self._next_purge = 0.0
+        self._sync_lock = threading.Lock()
+        self.checks = 0
+        self.syncs = 0
+
+    def revoke(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """Revoke a token until ``expires_at`` (Unix time), usually its ``exp`` claim."""
+        if expires_at is None:
+            expires_at = time.time() + DEFAULT_TTL
+        db.session.add(RevokedToken(jti=jti, expires_at=expires_at))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Already revoked, e.g. a repeated logout
+            db.session.rollback()
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def sync(self) -> None:
+        """Pull revocations made since the last sync, purging expired ones when due."""
+        # Another thread already syncing keeps the mirror fresh enough
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            if time.monotonic() >= self._next_purge:
+                self.purge_expired(now)
+                self._next_purge = time.monotonic() + self.purge_interval
+            table = RevokedToken.__table__
+            query = select(table.c.jti, table.c.expires_at).where(table.c.expires_at > now)
+            if self._synced_at is not None:
+                query = query.where(table.c.revoked_at >= self._synced_at - self.sync_overlap)
+            with db.engine.connect() as conn:
+                rows = conn.execute(query).all()
+            for jti, expires_at in rows:
+                self._revoked[jti] = expires_at
+            self._synced_at = now
+            self.syncs += 1
+            self._next_sync = time.monotonic() + self.sync_interval
+        finally:
+            self._sync_lock.release()
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Delete revocations whose tokens have expired, here and in the database."""
+        now = time.time() if now is None else now
+        for jti, expires_at in list(self._revoked.items()):
+            if expires_at <= now:
+                self._revoked.pop(jti, None)
+        # Own transaction: this runs while a request is being authenticated, and must not commit its session
+        with db.engine.begin() as conn:
+            removed = conn.execute(delete(RevokedToken.__table__).where(RevokedToken.expires_at <= now)).rowcount
+        if removed:
+            logger.info(f"Purged {removed} expired revoked tokens")
+        return removed
+
+    def __contains__(self, jti: str) -> bool:
+        return self.is_revoked(jti)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'revoked': len(self._revoked),
+            'synced_at': self._synced_at,
+            'checks': self.checks,
+            'syncs': self.syncs,
+            'sync_interval': self.sync_interval,
+        }
+
+
+token_blocklist = TokenBlocklist(
+    sync_interval=float(os.environ.get('TOKEN_BLOCKLIST_SYNC', 1)),
+    purge_interval=float(os.environ.get('TOKEN_BLOCKLIST_PURGE_INTERVAL', 600)),
+    sync_overlap=float(os.environ.get('TOKEN_BLOCKLIST_SYNC_OVERLAP', 60)),
+)
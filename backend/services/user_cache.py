@@ -0,0 +1,146 @@
+"""Cached user profiles for ``/api/auth/me`` and other JWT-protected routes.
+
+``current_user_profile`` returns ``User.to_dict()`` for a user id, or just
+the requested ``fields`` of it. It looks in three places, in order:
+
+1. The token. With ``USER_CLAIMS_IN_JWT=1``, login embeds the
+   ``PROFILE_CLAIM_FIELDS`` of the profile in the access token as a
+   ``profile`` claim. The claim answers only lookups that ask for none but
+   those fields. Everything else, the email in particular, is never put in
+   the token.
+2. An in-process LRU of ``USER_CACHE_SIZE`` profiles (default 10000), each
+   kept for ``USER_CACHE_TTL`` seconds (default 60).
+3. The database.
+
+When a transaction that changed or deleted a user commits, that user's cache
+entry is dropped. Tokens issued before the change stop being trusted for
+their profile, so this process answers from the database until the user logs
+in again. Other worker processes only learn about the change when their
+entry expires, so they can serve a stale profile for up to ``USER_CACHE_TTL``
+seconds. Their embedded claims stay stale for the token's lifetime.
+
+``user_cache_metrics`` reports hits, misses and the hit rate of each source,
+plus lookup latency.
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models.account import User
+from services.metrics import HistogramSet
+from services.ttl_cache import TTLCache
+
+PROFILE_CLAIM = 'profile'
+# Token payloads are readable by anyone holding the token, so only these are embedded
+PROFILE_CLAIM_FIELDS = ('id', 'username', 'updated_at')
+
+# Lookups are sub-millisecond when cached, so the buckets start far below the default ones
+lookup_latency = HistogramSet(buckets_ms=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100))
+user_cache = TTLCache(ttl=float(os.environ.get('USER_CACHE_TTL', 60)),
+                      max_entries=int(os.environ.get('USER_CACHE_SIZE', 10000)))
+# When each user last changed, for as long as a token issued before it could still be in use
+user_changes = TTLCache(ttl=24 * 3600, max_entries=int(os.environ.get('USER_CACHE_SIZE', 10000)))
+claim_counts = {'hits': 0, 'stale': 0}
+
+
+def claims_enabled() -> bool:
+    return os.environ.get('USER_CLAIMS_IN_JWT', '0').lower() in ('1', 'true', 'yes')
+
+
+def profile_claims(user: User) -> Dict[str, Any]:
+    """Return the ``additional_claims`` for a new access token of ``user``."""
+    if not claims_enabled():
+        return {}
+    profile = user.to_dict()
+    return {PROFILE_CLAIM: {field: profile[field] for field in PROFILE_CLAIM_FIELDS}}
+
+
+def _select(profile: Optional[Dict[str, Any]], fields: Optional[Iterable[str]]) -> Optional[Dict[str, Any]]:
+    if profile is None or fields is None:
+        return profile
+    return {field: profile[field] for field in fields if field in profile}
+
+
+def current_user_profile(user_id: Any, jwt_claims: Optional[Dict[str, Any]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """Return the profile of ``user_id``, or None if there is no such user.
+
+    With ``fields``, only those keys are returned. ``jwt_claims`` are the
+    decoded claims of the request's token. Their embedded profile is used
+    only when every requested field is in ``PROFILE_CLAIM_FIELDS`` and the
+    token was issued after the user's last change here.
+    """
+    started = time.perf_counter()
+    key = str(user_id)
+    fields = tuple(fields) if fields is not None else None
+    profile = (jwt_claims or {}).get(PROFILE_CLAIM)
+    if (profile is not None and claims_enabled() and fields is not None
+            and set(fields) <= set(PROFILE_CLAIM_FIELDS)):
+        changed_at = user_changes.get(key)
+        if changed_at is None or jwt_claims.get('iat', 0) > changed_at:
+            claim_counts['hits'] += 1
+            lookup_latency.observe('claims', time.perf_counter() - started)
+            return _select(profile, fields)
+        claim_counts['stale'] += 1
+
+    profile = user_cache.get(key)
+    if profile is not None:
+        lookup_latency.observe('cache', time.perf_counter() - started)
+        return _select(profile, fields)
+
+    user = User.query.get(user_id)
+    profile = user.to_dict() if user else None
+    if profile is not None:
+        user_cache.set(key, profile)
+    lookup_latency.observe('database', time.perf_counter() - started)
+    return _select(profile, fields)
+
+
+def invalidate_user(user_id: Any) -> None:
+    """Forget the cached profile of ``user_id`` and distrust its older tokens' claims."""
+    key = str(user_id)
+    user_changes.set(key, time.time())
+    user_cache.invalidate(key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context) -> None:
+    changed = session.info.setdefault('changed_user_ids', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session) -> None:
+    # After the commit, so a concurrent lookup cannot cache the old row again
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session) -> None:
+    session.info.pop('changed_user_ids', None)
+
+
+def _hit_rate(hits: int, total: int) -> Optional[float]:
+    return round(hits / total, 3) if total else None
+
+
+def user_cache_metrics() -> Dict[str, Any]:
+    """Return hit counts and rates of the token claims and the cache, and lookup latency."""
+    cache = user_cache.stats()
+    lookups = lookup_latency.snapshot()
+    total = sum(histogram['count'] for histogram in lookups.values())
+    claim_hits = claim_counts['hits']
+    return {
+        'claims_in_jwt': claims_enabled(),
+        'lookups': total,
+        'claims': {**claim_counts, 'hit_rate': _hit_rate(claim_hits, total)},
+        'cache': {**cache, 'hit_rate': _hit_rate(cache['hits'], cache['hits'] + cache['misses'])},
+        # Share of lookups answered without a database query
+        'hit_rate': _hit_rate(claim_hits + cache['hits'], total),
+        'latency': lookups,
+    }
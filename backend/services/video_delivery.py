@@ -0,0 +1,135 @@
+"""Serve generated videos with range requests, strong ETags and cache headers.
+
+Rendered videos are never rewritten in place, so a strong ETag computed from
+the file's sha256 stays valid for as long as the file exists. ``send_video``
+lets Flask answer ``Range`` requests with 206 responses and
+``If-None-Match`` / ``If-Modified-Since`` with 304 responses, so seeking and
+replaying a video only transfers the bytes the browser does not have yet.
+
+With ``VIDEO_DELIVERY_MODE`` set to ``x-accel`` (nginx) or ``x-sendfile``
+(Apache mod_xsendfile, lighttpd) the route only resolves the file and returns
+an empty response carrying the offload header; the front proxy then streams
+the file and handles ranges and conditional requests itself, so no Flask
+thread is held for the transfer.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from flask import current_app, send_file
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELIVERY_MODES = ('direct', 'x-accel', 'x-sendfile')
+
+# Outputs whose path is unique to their content are cached for a year without revalidation
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_digests: Dict[str, Tuple[int, int, str]] = {}
+_digests_lock = threading.Lock()
+_MAX_DIGESTS = 1024
+
+
+def file_etag(path: str) -> str:
+    """Return the sha256 of a file, recomputed only when its size or mtime changes."""
+    stat = os.stat(path)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()
+
+    with _digests_lock:
+        if len(_digests) >= _MAX_DIGESTS:
+            _digests.pop(next(iter(_digests)))
+        _digests[path] = (stat.st_mtime_ns, stat.st_size, etag)
+    return etag
+
+
+def resolve_media_path(root: str, relative_path: str) -> Optional[str]:
+    """Join a requested path onto ``root``, or return None if it would escape it."""
+    return safe_join(os.path.abspath(root), relative_path)
+
+
+def accel_redirect_uri(path: str) -> Optional[str]:
+    """Map a file path to the proxy's internal location, or None if it is outside ``VIDEO_ACCEL_ROOT``.
+
+    With the defaults, nginx needs
+    ``location /protected-media/ { internal; alias <backend dir>/; }``.
+    """
+    root = os.path.abspath(os.environ.get('VIDEO_ACCEL_ROOT', BACKEND_DIR))
+    relative = os.path.relpath(os.path.abspath(path), root)
+    if relative.startswith('..'):
+        return None
+    prefix = os.environ.get('VIDEO_ACCEL_PREFIX', '/protected-media/')
+    return prefix.rstrip('/') + '/' + relative.replace(os.sep, '/')
+
+
+def _set_cache_headers(response, immutable: bool) -> None:
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = 0
+        response.cache_control.no_cache = True
+
+
+def _offload_response(path: str, mode: str, mimetype: str):
+    """Return an empty response telling the front proxy to send ``path``, or None if it cannot."""
+    if mode == 'x-accel':
+        uri = accel_redirect_uri(path)
+        if uri is None:
+            logger.warning(f"{path} is outside VIDEO_ACCEL_ROOT, sending it from Flask")
+            return None
+        header = ('X-Accel-Redirect', uri)
+    else:
+        header = ('X-Sendfile', os.path.abspath(path))
+
+    response = current_app.response_class(b'', mimetype=mimetype)
+    response.headers[header[0]] = header[1]
+    return response
+
+
+def send_video(path: str, immutable: bool = False, mimetype: Optional[str] = 'video/mp4'):
+    """Send a video file with byte-range, conditional GET and caching support.
+
+    ``immutable`` marks files whose URL changes whenever their content does;
+    those are cached with ``Cache-Control: immutable``. Other files are
+    revalidated on every use, which costs a 304 when nothing changed.
+    Pass ``mimetype=None`` to guess the type from the file name.
+
+    The transfer is handed to the front proxy when ``VIDEO_DELIVERY_MODE``
+    asks for it, falling back to ``send_file`` otherwise.
+    """
+    mode = os.environ.get('VIDEO_DELIVERY_MODE', 'direct')
+    if mode not in DELIVERY_MODES:
+        logger.warning(f"Unknown VIDEO_DELIVERY_MODE '{mode}', sending files from Flask")
+        mode = 'direct'
+
+    response = None
+    if mode != 'direct':
+        guessed = mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        response = _offload_response(path, mode, guessed)
+
+    if response is None:
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            conditional=True,
+            etag=file_etag(path),
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+
+    _set_cache_headers(response, immutable)
+    return response
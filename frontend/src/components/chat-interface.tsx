@@ -10,6 +10,12 @@ import { useAuth } from "@/lib/auth-context";
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { QuizDisplay } from "@/components/quiz-display";
+import {
+  startPresentationJob,
+  watchPresentationJob,
+  PresentationProgressEvent,
+  PresentationResult,
+} from "@/lib/services/gemini";
 
 interface Message {
   id: string;
@@ -26,6 +32,17 @@ interface PresentationData {
   scene_class?: string;
 }
 
+// Shown under the typing indicator while a presentation job runs
+const STAGE_LABELS: Record<string, string> = {
+  queued: "Waiting for a free worker",
+  started: "Writing the script",
+  script_generated: "Script written, generating animation code",
+  manim_code_generated: "Rendering the animation",
+  rendering: "Rendering the animation",
+  encode_done: "Encoding the video",
+  video_ready: "Video ready",
+};
+
 interface QuizQuestion {
   id: number;
   question: string;
@@ -291,6 +308,9 @@ export function ChatInterface() {
   ]);
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [jobProgress, setJobProgress] =
+    useState<PresentationProgressEvent | null>(null);
+  const closeJobStream = useRef<(() => void) | null>(null);
   const textareaRef = useRef<HTMLTextAreaElement>(null);
   const scrollAreaRef = useRef<HTMLDivElement>(null);
   const { token, user } = useAuth();
@@ -308,6 +328,9 @@ export function ChatInterface() {
     }
   }, [input]);
 
+  // Stop following a presentation job when the chat unmounts
+  useEffect(() => () => closeJobStream.current?.(), []);
+
   // Scroll to bottom when new message is added
   useEffect(() => {
     if (scrollAreaRef.current) {
@@ -335,32 +358,18 @@ export function ChatInterface() {
       // Get the latest message as the prompt
       const prompt = userMessage.content;
 
-      console.log("Making API request with prompt:", prompt);
-      console.log("API URL:", `${apiBaseUrl}/gemini/generate-presentation`);
-
-      // Make API call to generate-presentation endpoint for full workflow
-      const response = await fetch(
-        `${apiBaseUrl}/gemini/generate-presentation`,
-        {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          // Send the previously captured prompt, not the cleared input
-          body: JSON.stringify({ prompt }),
-        },
-      );
-
-      console.log("API response status:", response.status);
-      console.log("API response ok:", response.ok);
-
-      if (!response.ok) {
-        const errorText = await response.text();
-        console.error("API error response:", errorText);
-        throw new Error(`API Error: ${response.status} - ${errorText}`);
-      }
-
-      const data = await response.json();
+      // Queue the presentation and follow its progress until it finishes
+      const jobId = await startPresentationJob(prompt, token ?? undefined);
+      const data = await new Promise<PresentationResult>((resolve, reject) => {
+        closeJobStream.current = watchPresentationJob(jobId, (event) => {
+          setJobProgress(event);
+          if (event.status === "succeeded" && event.result) {
+            resolve(event.result);
+          } else if (event.status === "failed") {
+            reject(new Error(event.error || "Failed to generate presentation"));
+          }
+        });
+      });
 
       if (data.success) {
         // Show an inline presentation with video and AI agent
@@ -393,6 +402,9 @@ export function ChatInterface() {
       };
       setMessages((prev) => [...prev, errorMessage]);
     } finally {
+      closeJobStream.current?.();
+      closeJobStream.current = null;
+      setJobProgress(null);
       setIsLoading(false);
     }
   };
@@ -498,6 +510,12 @@ export function ChatInterface() {
                       style={{ animationDelay: "300ms" }}
                     ></div>
                   </div>
+                  {jobProgress && (
+                    <p className="mt-1 text-xs text-muted-foreground">
+                      {STAGE_LABELS[jobProgress.stage] ?? jobProgress.stage} (
+                      {Math.round(jobProgress.progress)}%)
+                    </p>
+                  )}
                 </div>
               </div>
             </div>
@@ -67,4 +67,72 @@ export const chatWithGemini = async (
   }
 
   return data;
-};
\ No newline at end of file
+};
+
+export interface PresentationResult {
+  success: boolean;
+  script: string;
+  video_url: string;
+  video_path?: string;
+  scene_class?: string;
+  error?: string;
+}
+
+export interface PresentationProgressEvent {
+  id: number;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stage: string;
+  progress: number;
+  script?: string;
+  render_percent?: number;
+  video_url?: string;
+  result?: PresentationResult;
+  error?: string;
+}
+
+/**
+ * Queue a presentation render and return its job id
+ */
+export const startPresentationJob = async (
+  prompt: string,
+  token?: string
+): Promise<string> => {
+  const response = await fetch(`${API_URL}/gemini/generate-presentation`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { "Authorization": `Bearer ${token}` } : {})
+    },
+    body: JSON.stringify({ prompt, async: true }),
+  });
+
+  const data = await response.json();
+
+  if (!response.ok) {
+    throw new Error(data.error || 'Failed to queue presentation');
+  }
+
+  return data.job_id;
+};
+
+/**
+ * Follow progress of a queued presentation via server-sent events.
+ * The script arrives with the `script_generated` stage, before the video renders.
+ * Returns a function that closes the stream.
+ */
+export const watchPresentationJob = (
+  jobId: string,
+  onEvent: (event: PresentationProgressEvent) => void
+): (() => void) => {
+  const source = new EventSource(`${API_URL}/gemini/jobs/${jobId}/events`);
+
+  source.addEventListener('progress', (message) => {
+    const event: PresentationProgressEvent = JSON.parse((message as MessageEvent).data);
+    onEvent(event);
+    if (event.status === 'succeeded' || event.status === 'failed') {
+      source.close();
+    }
+  });
+
+  return () => source.close();
+};